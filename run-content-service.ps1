@@ -11,5 +11,8 @@ Set-Location "C:\Users\user\Desktop\Digital-Information-System-Microservices\ser
 Write-Host "Installing dependencies..." -ForegroundColor Yellow
 python -m pip install -r requirements.txt
 
+Write-Host "Applying database migrations..." -ForegroundColor Yellow
+python migrate_db.py
+
 Write-Host "Starting server..." -ForegroundColor Green
 python -m uvicorn main:app --host 0.0.0.0 --port 8002 --reload
@@ -290,6 +290,9 @@ const requireAuthForMutations = (req, res, next) => {
 app.use('/api/v1/articles', requireAuthForMutations, createProxyMiddleware({
   target: services.content,
   changeOrigin: true,
+  // Адрес клиента дописывается в X-Forwarded-For: по нему content-service
+  // считает уникальные просмотры анонимных читателей
+  xfwd: true,
   onError: (err, req, res) => {
     logger.error('Content service error:', err.message);
     res.status(503).json({ error: 'Content service unavailable' });
@@ -298,6 +301,9 @@ app.use('/api/v1/articles', requireAuthForMutations, createProxyMiddleware({
     logger.info(`Proxying ${req.method} ${req.path} to ${services.content}`);
     if (req.user?.id) {
       proxyReq.setHeader('X-User-ID', req.user.id);
+    } else {
+      // X-User-ID задаёт только gateway по проверенному токену
+      proxyReq.removeHeader('X-User-ID');
     }
     if (req.body && Object.keys(req.body).length > 0) {
       const bodyData = JSON.stringify(req.body);
@@ -311,6 +317,9 @@ app.use('/api/v1/articles', requireAuthForMutations, createProxyMiddleware({
 app.use('/api/v1/books', requireAuthForMutations, createProxyMiddleware({
   target: services.content,
   changeOrigin: true,
+  // Адрес клиента дописывается в X-Forwarded-For: по нему content-service
+  // считает уникальные просмотры анонимных читателей
+  xfwd: true,
   onError: (err, req, res) => {
     logger.error('Content service error:', err.message);
     res.status(503).json({ error: 'Content service unavailable' });
@@ -319,6 +328,9 @@ app.use('/api/v1/books', requireAuthForMutations, createProxyMiddleware({
     logger.info(`Proxying ${req.method} ${req.path} to ${services.content}`);
     if (req.user?.id) {
       proxyReq.setHeader('X-User-ID', req.user.id);
+    } else {
+      // X-User-ID задаёт только gateway по проверенному токену
+      proxyReq.removeHeader('X-User-ID');
     }
     if (req.body && Object.keys(req.body).length > 0) {
       const bodyData = JSON.stringify(req.body);
@@ -361,6 +373,9 @@ app.use('/api/v1/books', requireAuthForMutations, createProxyMiddleware({
 app.use('/api/v1/dissertations', requireAuthForMutations, createProxyMiddleware({
   target: services.content,
   changeOrigin: true,
+  // Адрес клиента дописывается в X-Forwarded-For: по нему content-service
+  // считает уникальные просмотры анонимных читателей
+  xfwd: true,
   onError: (err, req, res) => {
     logger.error('Content service error:', err.message);
     res.status(503).json({ error: 'Content service unavailable' });
@@ -369,6 +384,9 @@ app.use('/api/v1/dissertations', requireAuthForMutations, createProxyMiddleware(
     logger.info(`Proxying ${req.method} ${req.path} to ${services.content}`);
     if (req.user?.id) {
       proxyReq.setHeader('X-User-ID', req.user.id);
+    } else {
+      // X-User-ID задаёт только gateway по проверенному токену
+      proxyReq.removeHeader('X-User-ID');
     }
     if (req.body && Object.keys(req.body).length > 0) {
       const bodyData = JSON.stringify(req.body);
@@ -555,6 +573,16 @@ app.use('/api/v1/dissertation-categories', createProxyMiddleware({
   }
 }));
 
+// Главная страница - один агрегированный и кэшированный ответ content-service
+app.use('/api/v1/home', createProxyMiddleware({
+  target: services.content,
+  changeOrigin: true,
+  onError: (err, req, res) => {
+    logger.error('Content service error:', err.message);
+    res.status(503).json({ error: 'Content service unavailable' });
+  }
+}));
+
 // Search Service Routes - /api/v1/search
 app.use('/api/v1/search', createProxyMiddleware({
   target: services.search,
@@ -0,0 +1,204 @@
+"""Admission control: per-route-class concurrency limits with load shedding.
+
+Requests are split into classes with different cost: cheap item reads,
+heavy lists/search/export, writes and the PDF proxy. Each class admits at
+most N requests at once; the rest wait in a bounded FIFO queue for at most
+the class deadline. A full queue or an expired deadline answers 503 with
+Retry-After right away, so when Postgres slows down the service sheds the
+excess instead of letting every request time out on the pool.
+
+Limits per class come from the environment, e.g. ADMISSION_LIST_CONCURRENCY,
+ADMISSION_LIST_QUEUE, ADMISSION_LIST_TIMEOUT_MS. Service endpoints outside
+/api/v1 (/health, /metrics, /admin, /docs) are never limited.
+
+The limits only isolate classes if admitted handlers do not block the event
+loop: a synchronous query inside an async def stalls every class on the
+worker. Handlers that talk to the database are therefore plain def (run in
+the threadpool) or offload their queries with run_in_threadpool, and
+size_threadpool() makes the threadpool large enough to hold every class at
+its limit, so classes do not queue behind each other for threads either.
+"""
+import asyncio
+import json
+import os
+import re
+import time
+from collections import deque
+from typing import Deque, Dict, Optional
+
+import anyio.to_thread
+
+from metrics import ADMISSION_IN_FLIGHT, ADMISSION_QUEUE_DEPTH, ADMISSION_QUEUE_WAIT, ADMISSION_SHED
+
+ADMISSION_CONTROL_ENABLED = os.getenv("ADMISSION_CONTROL_ENABLED", "true").strip().lower() in ("1", "true", "yes", "on")
+ADMISSION_RETRY_AFTER = os.getenv("ADMISSION_RETRY_AFTER", "1")
+
+# class -> (concurrency, queue, timeout_ms); лимиты списков и записи держим
+# ниже размера пула, чтобы дешёвым чтениям оставались соединения
+DEFAULT_LIMITS = {
+    "read": (64, 256, 1000),
+    "list": (16, 64, 2000),
+    "write": (16, 64, 2000),
+    "pdf": (8, 16, 500),
+}
+
+_PDF_PATH = re.compile(r"^/api/v1/books/[^/]+/(download|read)/?$")
+_LIST_PATH = re.compile(
+    r"^/api/v1/("
+    r"articles|books|dissertations|saved-articles|saved-books|saved-dissertations"
+    r"|home|highlights/sync|export/[^/]+"
+    r")/?$"
+)
+_READ_METHODS = ("GET", "HEAD")
+
+
+def route_class(method: str, path: str) -> Optional[str]:
+    """Admission class of a request, or None for unlimited service endpoints."""
+    if not path.startswith("/api/v1/"):
+        return None
+    if _PDF_PATH.match(path):
+        return "pdf"
+    if method not in _READ_METHODS:
+        return "write"
+    if _LIST_PATH.match(path):
+        return "list"
+    return "read"
+
+
+class AdmissionLimiter:
+    """Concurrency limit with a bounded FIFO queue and a wait deadline.
+
+    Only touched from the event loop thread, so plain counters are enough.
+    A released slot is handed to the oldest waiter directly, which keeps
+    new arrivals from overtaking the queue.
+    """
+
+    def __init__(self, name: str, concurrency: int, queue_size: int, timeout: float):
+        self.name = name
+        self.concurrency = concurrency
+        self.queue_size = queue_size
+        self.timeout = timeout
+        self.active = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    async def acquire(self) -> Optional[str]:
+        """None when admitted, otherwise the shed reason."""
+        if self.active < self.concurrency and not self._waiters:
+            self.active += 1
+            self._update_gauges()
+            return None
+        if len(self._waiters) >= self.queue_size:
+            return "queue_full"
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        self._update_gauges()
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(waiter, self.timeout)
+            return None
+        except asyncio.TimeoutError:
+            return "timeout"
+        except asyncio.CancelledError:
+            # Клиент ушёл в момент, когда слот уже передали - вернуть его
+            if waiter.done() and not waiter.cancelled():
+                self.release()
+            raise
+        finally:
+            ADMISSION_QUEUE_WAIT.labels(self.name).observe(time.perf_counter() - started)
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+            self._update_gauges()
+
+    def release(self) -> None:
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                # Слот переходит ожидающему, active не меняется
+                waiter.set_result(None)
+                self._update_gauges()
+                return
+        self.active -= 1
+        self._update_gauges()
+
+    def _update_gauges(self) -> None:
+        ADMISSION_IN_FLIGHT.labels(self.name).set(self.active)
+        ADMISSION_QUEUE_DEPTH.labels(self.name).set(len(self._waiters))
+
+
+def _limiter_from_env(name: str) -> AdmissionLimiter:
+    concurrency, queue_size, timeout_ms = DEFAULT_LIMITS[name]
+    prefix = f"ADMISSION_{name.upper()}_"
+    return AdmissionLimiter(
+        name,
+        concurrency=int(os.getenv(prefix + "CONCURRENCY", str(concurrency))),
+        queue_size=int(os.getenv(prefix + "QUEUE", str(queue_size))),
+        timeout=int(os.getenv(prefix + "TIMEOUT_MS", str(timeout_ms))) / 1000,
+    )
+
+
+LIMITERS: Dict[str, AdmissionLimiter] = {name: _limiter_from_env(name) for name in DEFAULT_LIMITS}
+
+
+def size_threadpool(limiters: Optional[Dict[str, AdmissionLimiter]] = None) -> int:
+    """Grow the default threadpool to the sum of class limits; returns its size. Call from the event loop."""
+    needed = sum(limiter.concurrency for limiter in (limiters or LIMITERS).values())
+    threads = anyio.to_thread.current_default_thread_limiter()
+    # Синхронные обработчики занимают поток на весь запрос: при меньшем пуле
+    # допущенные запросы разных классов ждали бы друг друга уже за потоками
+    threads.total_tokens = max(threads.total_tokens, needed)
+    return threads.total_tokens
+
+
+def admission_stats() -> Dict[str, dict]:
+    return {
+        name: {"concurrency": limiter.concurrency, "active": limiter.active, "queued": limiter.queued}
+        for name, limiter in LIMITERS.items()
+    }
+
+
+class AdmissionControlMiddleware:
+    """Pure ASGI middleware: admit, queue or shed a request by its route class."""
+
+    def __init__(self, app, limiters: Optional[Dict[str, AdmissionLimiter]] = None):
+        self.app = app
+        self.limiters = LIMITERS if limiters is None else limiters
+
+    async def __call__(self, scope, receive, send):
+        if scope.get("type") != "http" or not ADMISSION_CONTROL_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        limiter = self.limiters.get(route_class(scope.get("method", ""), scope.get("path", "")))
+        if limiter is None:
+            await self.app(scope, receive, send)
+            return
+
+        reason = await limiter.acquire()
+        if reason is not None:
+            ADMISSION_SHED.labels(limiter.name, reason).inc()
+            await _send_overloaded(send)
+            return
+        try:
+            # Слот держится до конца тела ответа, включая потоковые
+            await self.app(scope, receive, send)
+        finally:
+            limiter.release()
+
+
+async def _send_overloaded(send) -> None:
+    body = json.dumps({"detail": "Service overloaded, retry later"}).encode()
+    await send({
+        "type": "http.response.start",
+        "status": 503,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+            (b"retry-after", ADMISSION_RETRY_AFTER.encode()),
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
@@ -0,0 +1 @@
+"""Performance benchmarks for content-service (not collected by pytest)."""
@@ -0,0 +1,247 @@
+"""Realistic data generator for content-service benchmarks.
+
+Seeds articles, books and dissertations with multi-language text (tm, ru,
+en), flat and nested categories, saved items and highlights for a pool of
+users. Rows go in with multi-row Core INSERTs in batches, so 1M items is a
+matter of minutes rather than hours. Output is deterministic for a given
+--seed.
+
+    python -m benchmarks.datagen --url sqlite:///bench.db --scale 10000
+    python -m benchmarks.datagen --url postgresql://... --scale 1000000 --users 5000
+
+App modules (models, content_types) are imported inside generate(): they
+pull in database.py, which reads DATABASE_URL at import time, and
+benchmarks.load sets that from its own --url after parsing arguments.
+"""
+import argparse
+import random
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Dict, List
+
+from sqlalchemy import func, insert, select
+from sqlalchemy.engine import Engine
+
+WORDS = {
+    "tm": (
+        "bilim ylym kitap makala barlag usul netije ulgam maglumat döwlet "
+        "ösüş taslama hünär mugallym talyp uniwersitet tejribe derňew çeşme "
+        "hasabat meýilnama ykdysadyýet tehnologiýa medeniýet taryh"
+    ).split(),
+    "ru": (
+        "знание наука книга статья исследование метод результат система данные "
+        "развитие проект профессия преподаватель студент университет опыт анализ "
+        "источник отчёт план экономика технология культура история модель"
+    ).split(),
+    "en": (
+        "knowledge science book article research method result system data "
+        "development project profession teacher student university experience "
+        "analysis source report plan economy technology culture history model"
+    ).split(),
+}
+LANGUAGES = list(WORDS)
+COLORS = ["yellow", "green", "blue", "red"]
+
+
+@dataclass
+class Scale:
+    """Row counts per table for one generated dataset."""
+
+    items: int = 10000                # на каждый тип контента
+    categories: int = 40
+    users: int = 1000
+    saved_per_user: int = 20
+    highlights_per_user: int = 30
+    content_words: int = 400          # средняя длина текста в словах
+    batch_size: int = 2000
+
+
+def _text(rng: random.Random, language: str, words: int) -> str:
+    vocab = WORDS[language]
+    sentences = []
+    remaining = words
+    while remaining > 0:
+        n = min(remaining, rng.randint(6, 18))
+        sentence = " ".join(rng.choice(vocab) for _ in range(n))
+        sentences.append(sentence.capitalize() + ".")
+        remaining -= n
+    return " ".join(sentences)
+
+
+def _title(rng: random.Random, language: str) -> str:
+    return " ".join(rng.choice(WORDS[language]) for _ in range(rng.randint(3, 8))).capitalize()
+
+
+def _insert_batches(conn, table, rows_iter, batch_size: int) -> int:
+    total = 0
+    batch = []
+    for row in rows_iter:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            conn.execute(insert(table), batch)
+            total += len(batch)
+            batch = []
+    if batch:
+        conn.execute(insert(table), batch)
+        total += len(batch)
+    return total
+
+
+def _seed_categories(conn, ctype, count: int) -> List[int]:
+    name = ctype.name
+    table = ctype.category_model.__table__
+    prefix = name[:-1].capitalize()
+    if not ctype.category_has_parent:
+        conn.execute(insert(table), [{"name": f"{prefix} category {i}"} for i in range(count)])
+    else:
+        # Дерево: четверть категорий - корни, остальные - их дети
+        roots = max(1, count // 4)
+        conn.execute(insert(table), [{"name": f"{prefix} section {i}", "parent_id": None} for i in range(roots)])
+        root_ids = list(conn.execute(select(table.c.id).order_by(table.c.id)).scalars())
+        conn.execute(insert(table), [
+            {"name": f"{prefix} category {i}", "parent_id": root_ids[i % len(root_ids)]}
+            for i in range(count - roots)
+        ])
+    return list(conn.execute(select(table.c.id).order_by(table.c.id)).scalars())
+
+
+def _item_rows(rng: random.Random, name: str, scale: Scale):
+    base_date = datetime(2010, 1, 1)
+    for i in range(scale.items):
+        language = LANGUAGES[i % len(LANGUAGES)]
+        words = max(20, int(rng.gauss(scale.content_words, scale.content_words / 3)))
+        row = {
+            "title": _title(rng, language),
+            "author": f"{rng.choice(WORDS[language]).capitalize()} {i % (scale.items // 20 + 1)}",
+            "authors_workplace": f"University {i % 50}",
+            "thumbnail": f"http://example.com/thumbs/{name}/{i}.jpg",
+            "content": _text(rng, language, words),
+            "publication_date": base_date + timedelta(days=rng.randint(0, 5000)),
+            "language": language,
+            "type": "local" if rng.random() < 0.7 else "foreign",
+            "views": int(rng.paretovariate(1.2)) - 1,
+            "rating": 0.0,
+            "average_rating": 0.0,
+            "rating_count": 0,
+        }
+        if name == "books":
+            row["description"] = _text(rng, language, 40)
+            row["pdf_file_url"] = f"http://example.com/pdf/{i}.pdf"
+        yield row
+
+
+def _link_rows(rng: random.Random, ctype, item_ids: List[int], category_ids: List[int]):
+    for item_id in item_ids:
+        for category_id in rng.sample(category_ids, k=min(len(category_ids), rng.randint(1, 3))):
+            yield {ctype.link_column: item_id, "category_id": category_id}
+
+
+def _saved_rows(rng: random.Random, fk: str, item_ids: List[int], scale: Scale):
+    for user in range(scale.users):
+        for item_id in rng.sample(item_ids, k=min(len(item_ids), scale.saved_per_user)):
+            yield {"user_id": f"user-{user}", fk: item_id, "created_at": datetime.utcnow()}
+
+
+def _highlight_rows(rng: random.Random, fk: str, item_ids: List[int], scale: Scale):
+    for user in range(scale.users):
+        for _ in range(scale.highlights_per_user):
+            start = rng.randint(0, scale.content_words * 5)
+            length = rng.randint(10, 300)
+            now = datetime.utcnow()
+            yield {
+                "user_id": f"user-{user}",
+                fk: rng.choice(item_ids),
+                "text": "highlighted " * (length // 12 + 1),
+                "start_offset": start,
+                "end_offset": start + length,
+                "color": rng.choice(COLORS),
+                "note": None if rng.random() < 0.7 else "note",
+                "created_at": now,
+                "updated_at": now,
+            }
+
+
+def generate(engine: Engine, scale: Scale, seed: int = 42, log=print) -> Dict[str, int]:
+    """Fill an empty, migrated database; returns row counts per table."""
+    from content_types import CONTENT_TYPES
+    from models import (
+        ArticleHighlight,
+        BookHighlight,
+        DissertationHighlight,
+        SavedArticle,
+        SavedBook,
+        SavedDissertation,
+    )
+
+    saved_models = {"articles": SavedArticle, "books": SavedBook, "dissertations": SavedDissertation}
+    highlight_models = {
+        "articles": ArticleHighlight,
+        "books": BookHighlight,
+        "dissertations": DissertationHighlight,
+    }
+    rng = random.Random(seed)
+    counts: Dict[str, int] = {}
+    for name, ctype in CONTENT_TYPES.items():
+        fk = ctype.link_column
+        started = time.perf_counter()
+        with engine.begin() as conn:
+            category_ids = _seed_categories(conn, ctype, scale.categories)
+            table = ctype.model.__table__
+            first_id = conn.execute(select(func.coalesce(func.max(table.c.id), 0))).scalar_one()
+            counts[name] = _insert_batches(conn, table, _item_rows(rng, name, scale), scale.batch_size)
+            item_ids = list(conn.execute(
+                select(table.c.id).where(table.c.id > first_id).order_by(table.c.id)
+            ).scalars())
+            counts[ctype.link_table.name] = _insert_batches(
+                conn, ctype.link_table, _link_rows(rng, ctype, item_ids, category_ids), scale.batch_size
+            )
+            saved = saved_models[name].__table__
+            counts[saved.name] = _insert_batches(
+                conn, saved, _saved_rows(rng, fk, item_ids, scale), scale.batch_size
+            )
+            highlights = highlight_models[name].__table__
+            counts[highlights.name] = _insert_batches(
+                conn, highlights, _highlight_rows(rng, fk, item_ids, scale), scale.batch_size
+            )
+        log(f"{name}: {counts[name]} rows in {time.perf_counter() - started:.1f}s")
+    return counts
+
+
+def add_scale_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--scale", type=int, default=Scale.items, help="items per content type (10k-1M)")
+    parser.add_argument("--categories", type=int, default=Scale.categories)
+    parser.add_argument("--users", type=int, default=Scale.users)
+    parser.add_argument("--saved-per-user", type=int, default=Scale.saved_per_user)
+    parser.add_argument("--highlights-per-user", type=int, default=Scale.highlights_per_user)
+    parser.add_argument("--content-words", type=int, default=Scale.content_words)
+    parser.add_argument("--seed", type=int, default=42)
+
+
+def scale_from_args(args) -> Scale:
+    return Scale(
+        items=args.scale,
+        categories=args.categories,
+        users=args.users,
+        saved_per_user=args.saved_per_user,
+        highlights_per_user=args.highlights_per_user,
+        content_words=args.content_words,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", required=True, help="database URL; schema is migrated first")
+    add_scale_arguments(parser)
+    args = parser.parse_args()
+
+    from sqlalchemy import create_engine
+    from migrate_db import run_migrations
+
+    engine = create_engine(args.url)
+    run_migrations(engine)
+    generate(engine, scale_from_args(args), seed=args.seed)
+
+
+if __name__ == "__main__":
+    main()
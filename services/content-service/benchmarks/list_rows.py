@@ -0,0 +1,129 @@
+"""Microbenchmark: per-row cost of the list read path.
+
+Compares the old ORM loop (selectinload + manual dict copy) with the Core
+row path in queries.py on the same data.
+
+    python -m benchmarks.list_rows --rows 5000 --per-page 100
+    python -m benchmarks.list_rows --url postgresql://.../scratch --i-know-this-drops-tables
+
+The schema is dropped and recreated before seeding, so any database other
+than the default in-memory SQLite needs --i-know-this-drops-tables: point it
+at a throwaway database only.
+"""
+import argparse
+import statistics
+import time
+from datetime import datetime
+
+from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import Session, selectinload, sessionmaker, undefer
+
+from content_types import CONTENT_TYPES
+from database import Base
+from models import Article, ArticleCategory
+from queries import list_page
+
+
+def seed(session: Session, rows: int, categories: int = 20):
+    cats = [ArticleCategory(name=f"Category {i}") for i in range(categories)]
+    session.add_all(cats)
+    session.flush()
+    for i in range(rows):
+        article = Article(
+            title=f"Article {i}",
+            author=f"Author {i % 500}",
+            authors_workplace="University",
+            thumbnail="http://example.com/t.jpg",
+            content="Lorem ipsum dolor sit amet. " * 20,
+            publication_date=datetime(2024, 1, 1),
+            language=("tm", "ru", "en")[i % 3],
+            type="local",
+        )
+        article.categories = [cats[i % categories], cats[(i * 7) % categories]]
+        session.add(article)
+    session.commit()
+
+
+def orm_page(db: Session, page: int, per_page: int) -> dict:
+    """The list_articles body as it was before queries.py."""
+    query = db.query(Article)
+    total = query.count()
+    # Тело теперь отложенная колонка: без undefer база читала бы его отдельным
+    # SELECT на строку, а не одним запросом, как до queries.py
+    articles = query.options(
+        selectinload(Article.categories), undefer(Article.content)
+    ).offset((page - 1) * per_page).limit(per_page).all()
+    items = []
+    for article in articles:
+        items.append({
+            "id": article.id,
+            "title": article.title,
+            "author": article.author,
+            "authors_workplace": article.authors_workplace,
+            "thumbnail": article.thumbnail,
+            "content": article.content,
+            "publication_date": article.publication_date,
+            "language": article.language,
+            "type": article.type,
+            "views": article.views,
+            "rating": article.rating,
+            "average_rating": article.average_rating,
+            "rating_count": article.rating_count,
+            "categories": [{"id": c.id, "name": c.name} for c in article.categories],
+            "created_at": article.created_at,
+            "updated_at": article.updated_at
+        })
+    return {"items": items, "total": total}
+
+
+def core_page(db: Session, page: int, per_page: int) -> dict:
+    return list_page(db, CONTENT_TYPES["articles"], page, per_page)
+
+
+def measure(factory, fn, pages: int, per_page: int, repeat: int):
+    """Return per-row timings in microseconds, one sample per repeat."""
+    samples = []
+    for _ in range(repeat):
+        rows = 0
+        start = time.perf_counter()
+        for page in range(1, pages + 1):
+            # Новая сессия на страницу, как и в запросе
+            with factory() as db:
+                rows += len(fn(db, page, per_page)["items"])
+        samples.append((time.perf_counter() - start) / max(rows, 1) * 1e6)
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default="sqlite://", help="database URL (default: in-memory SQLite)")
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--per-page", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--i-know-this-drops-tables", action="store_true",
+                        help="allow a persistent --url; all its tables are dropped")
+    args = parser.parse_args()
+
+    url = make_url(args.url)
+    in_memory = url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:")
+    if not in_memory and not args.i_know_this_drops_tables:
+        parser.error(f"{url.render_as_string(hide_password=True)} is not in-memory SQLite and all its "
+                     "tables would be dropped; pass --i-know-this-drops-tables for a throwaway database")
+
+    engine = create_engine(url)
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    factory = sessionmaker(bind=engine, autoflush=False)
+    with factory() as db:
+        seed(db, args.rows)
+
+    pages = args.rows // args.per_page
+    for name, fn in (("orm", orm_page), ("core", core_page)):
+        samples = measure(factory, fn, pages, args.per_page, args.repeat)
+        print(f"{name:5s} median {statistics.median(samples):8.2f} us/row  "
+              f"min {min(samples):8.2f}  max {max(samples):8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+"""Concurrent load run against the ASGI app, with a JSON report.
+
+Drives the list / get / search / saved / highlight endpoints in-process via
+httpx's ASGI transport (no network, no uvicorn), so the numbers cover the
+app, the ORM and the database. Writes throughput and p50/p95/p99 per
+scenario to a JSON file that can be diffed between commits.
+
+    python -m benchmarks.load --url sqlite:///bench.db --generate --scale 10000
+    python -m benchmarks.load --url postgresql://... --concurrency 32 --duration 60 \\
+        --output bench-results/$(git rev-parse --short HEAD).json
+
+DATABASE_URL is taken from --url before the app is imported. Redis caching
+applies as in production if REDIS_URL points to a live server.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Tuple
+
+from benchmarks.datagen import add_scale_arguments, scale_from_args
+
+# (name, weight, request factory); factory(rng, ids) -> (path, headers)
+Scenario = Tuple[str, int, Callable]
+
+
+def _user(rng, ids) -> Dict[str, str]:
+    return {"X-User-ID": f"user-{rng.randrange(ids['users'])}"}
+
+
+def _pick(rng, ids, name: str) -> int:
+    return rng.choice(ids[name])
+
+
+SCENARIOS: List[Scenario] = [
+    ("list_articles", 20, lambda rng, ids: (f"/api/v1/articles?page={rng.randint(1, 50)}&per_page=20", {})),
+    ("list_books_by_category", 10, lambda rng, ids: (
+        f"/api/v1/books?category_id={rng.choice(ids['book_categories'])}&per_page=20", {})),
+    ("list_dissertations_by_language", 5, lambda rng, ids: (
+        f"/api/v1/dissertations?language={rng.choice(['tm', 'ru', 'en'])}&sort=views_desc", {})),
+    ("search_articles", 10, lambda rng, ids: (
+        f"/api/v1/articles?search={rng.choice(['bilim', 'наука', 'data', 'model'])}", {})),
+    ("get_article", 15, lambda rng, ids: (f"/api/v1/articles/{_pick(rng, ids, 'articles')}", {})),
+    ("get_book", 10, lambda rng, ids: (f"/api/v1/books/{_pick(rng, ids, 'books')}", {})),
+    ("get_article_content", 5, lambda rng, ids: (
+        f"/api/v1/articles/{_pick(rng, ids, 'articles')}/content?length=2000", {})),
+    ("saved_articles", 10, lambda rng, ids: ("/api/v1/saved-articles", _user(rng, ids))),
+    ("saved_books", 5, lambda rng, ids: ("/api/v1/saved-books", _user(rng, ids))),
+    ("article_highlights", 10, lambda rng, ids: (
+        f"/api/v1/highlights/{_pick(rng, ids, 'articles')}", _user(rng, ids))),
+]
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    k = (len(sorted_values) - 1) * q
+    lo = int(k)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (k - lo)
+
+
+def summarize(latencies: List[float], errors: int, elapsed: float) -> dict:
+    values = sorted(latencies)
+    return {
+        "requests": len(values),
+        "errors": errors,
+        "throughput_rps": round(len(values) / elapsed, 2) if elapsed else 0.0,
+        "p50_ms": round(percentile(values, 0.50) * 1000, 3),
+        "p95_ms": round(percentile(values, 0.95) * 1000, 3),
+        "p99_ms": round(percentile(values, 0.99) * 1000, 3),
+        "max_ms": round(values[-1] * 1000, 3) if values else 0.0,
+    }
+
+
+def _sample_ids(engine, limit: int = 5000) -> Dict[str, list]:
+    from sqlalchemy import func, select
+    from models import Article, Book, BookCategory, SavedArticle
+
+    with engine.connect() as conn:
+        return {
+            "articles": list(conn.execute(select(Article.id).limit(limit)).scalars()),
+            "books": list(conn.execute(select(Book.id).limit(limit)).scalars()),
+            "book_categories": list(conn.execute(select(BookCategory.id)).scalars()),
+            "users": max(1, conn.execute(select(func.count(func.distinct(SavedArticle.user_id)))).scalar_one()),
+        }
+
+
+async def run_load(app, ids: dict, concurrency: int, duration: float, warmup: float, seed: int) -> dict:
+    import httpx
+
+    names = [s[0] for s in SCENARIOS]
+    weights = [s[1] for s in SCENARIOS]
+    factories = {s[0]: s[2] for s in SCENARIOS}
+    latencies: Dict[str, List[float]] = {name: [] for name in names}
+    errors: Dict[str, int] = {name: 0 for name in names}
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        loop = asyncio.get_running_loop()
+        measure_from = loop.time() + warmup
+        stop_at = measure_from + duration
+
+        async def worker(worker_id: int):
+            rng = random.Random(seed + worker_id)
+            while loop.time() < stop_at:
+                name = rng.choices(names, weights)[0]
+                path, headers = factories[name](rng, ids)
+                started = time.perf_counter()
+                try:
+                    response = await client.get(path, headers=headers)
+                    ok = response.status_code < 400
+                except Exception:
+                    ok = False
+                elapsed = time.perf_counter() - started
+                if loop.time() < measure_from:
+                    continue
+                if ok:
+                    latencies[name].append(elapsed)
+                else:
+                    errors[name] += 1
+
+        await asyncio.gather(*(worker(i) for i in range(concurrency)))
+
+    scenarios = {name: summarize(latencies[name], errors[name], duration) for name in names}
+    everything = [v for values in latencies.values() for v in values]
+    return {"total": summarize(everything, sum(errors.values()), duration), "scenarios": scenarios}
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+    except Exception:
+        return "unknown"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default="sqlite:///bench.db")
+    parser.add_argument("--generate", action="store_true", help="migrate and seed the database first")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=30.0, help="measured seconds")
+    parser.add_argument("--warmup", type=float, default=5.0, help="seconds excluded from the report")
+    parser.add_argument("--output", default="bench-results.json")
+    add_scale_arguments(parser)
+    args = parser.parse_args()
+
+    # database.py читает DATABASE_URL при импорте
+    os.environ["DATABASE_URL"] = args.url
+    from database import engine
+    from main import app
+
+    if args.generate:
+        from benchmarks.datagen import generate
+        from migrate_db import run_migrations
+        run_migrations(engine)
+        generate(engine, scale_from_args(args), seed=args.seed)
+
+    ids = _sample_ids(engine)
+    if not ids["articles"] or not ids["books"]:
+        sys.exit("Database is empty: run with --generate or benchmarks.datagen first")
+
+    result = asyncio.run(run_load(app, ids, args.concurrency, args.duration, args.warmup, args.seed))
+    report = {
+        "meta": {
+            "commit": _git_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "dialect": engine.dialect.name,
+            "python": platform.python_version(),
+            "concurrency": args.concurrency,
+            "duration_s": args.duration,
+            "warmup_s": args.warmup,
+            "seed": args.seed,
+        },
+        **result,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+    total = report["total"]
+    print(f"{total['requests']} requests, {total['throughput_rps']} rps, "
+          f"p50 {total['p50_ms']} ms, p95 {total['p95_ms']} ms, p99 {total['p99_ms']} ms -> {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,7 +2,12 @@
 import json
 import os
 import logging
-from typing import Any, Optional
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from encoding import encode_default
+from metrics import record_cache
 
 logger = logging.getLogger(__name__)
 
@@ -32,26 +37,108 @@ def _get_client():
 
 def get_cache(key: str) -> Optional[Any]:
     """Return the cached value for *key*, or None if missing / Redis down."""
+    raw = get_raw_cache(key)
+    if raw is None:
+        return None
+    try:
+        return json.loads(raw)
+    except ValueError as exc:
+        logger.debug("Cache decode error for %s: %s", key, exc)
+        return None
+
+
+def set_cache(key: str, value: Any, ttl: int = 300) -> None:
+    """Serialise *value* to JSON and store it with the given TTL (seconds)."""
+    set_raw_cache(key, json.dumps(value, default=encode_default), ttl)
+
+
+def get_raw_cache(key: str) -> Optional[str]:
+    """Stored text for *key* as is (already encoded JSON), or None if missing / Redis down."""
     client = _get_client()
     if client is None:
+        record_cache(key, "get", "unavailable")
         return None
+    started = time.perf_counter()
     try:
         raw = client.get(key)
-        return json.loads(raw) if raw is not None else None
     except Exception as exc:
         logger.debug("Cache GET error for %s: %s", key, exc)
+        record_cache(key, "get", "error", time.perf_counter() - started)
         return None
+    record_cache(key, "get", "miss" if raw is None else "hit", time.perf_counter() - started)
+    return raw
 
 
-def set_cache(key: str, value: Any, ttl: int = 300) -> None:
-    """Serialise *value* to JSON and store it with the given TTL (seconds)."""
+def set_raw_cache(key: str, raw: str, ttl: int = 300) -> None:
+    """Store already encoded text under *key* with the given TTL (seconds)."""
     client = _get_client()
     if client is None:
         return
+    started = time.perf_counter()
     try:
-        client.setex(key, ttl, json.dumps(value, default=str))
+        client.setex(key, ttl, raw)
+        record_cache(key, "set", "ok", time.perf_counter() - started)
     except Exception as exc:
         logger.debug("Cache SET error for %s: %s", key, exc)
+        record_cache(key, "set", "error", time.perf_counter() - started)
+
+
+def get_many_cache(keys: List[str]) -> List[Optional[Any]]:
+    """Values for *keys* in order with a single MGET; None for misses."""
+    if not keys:
+        return []
+    client = _get_client()
+    if client is None:
+        record_cache(keys[0], "mget", "unavailable", count=len(keys))
+        return [None] * len(keys)
+    started = time.perf_counter()
+    try:
+        raws = client.mget(keys)
+        values = [json.loads(raw) if raw is not None else None for raw in raws]
+    except Exception as exc:
+        logger.debug("Cache MGET error for %s: %s", keys[0], exc)
+        record_cache(keys[0], "mget", "error", time.perf_counter() - started, count=len(keys))
+        return [None] * len(keys)
+    elapsed = time.perf_counter() - started
+    hits = sum(1 for raw in raws if raw is not None)
+    if hits:
+        record_cache(keys[0], "mget", "hit", elapsed, count=hits)
+    if hits < len(keys):
+        # Время уже учтено вместе с попаданиями
+        record_cache(keys[0], "mget", "miss", 0.0 if hits else elapsed, count=len(keys) - hits)
+    return values
+
+
+def set_many_cache(items: Dict[str, Any], ttl: int = 300) -> None:
+    """SETEX every key/value pair in one pipelined round trip."""
+    client = _get_client()
+    if client is None or not items:
+        return
+    first = next(iter(items))
+    started = time.perf_counter()
+    try:
+        pipe = client.pipeline(transaction=False)
+        for key, value in items.items():
+            pipe.setex(key, ttl, json.dumps(value, default=encode_default))
+        pipe.execute()
+        record_cache(first, "mset", "ok", time.perf_counter() - started, count=len(items))
+    except Exception as exc:
+        logger.debug("Cache pipelined SETEX error for %s: %s", first, exc)
+        record_cache(first, "mset", "error", time.perf_counter() - started, count=len(items))
+
+
+def delete_cache(*keys: str) -> None:
+    """Delete exact *keys* with a single DEL (no KEYS scan)."""
+    client = _get_client()
+    if client is None or not keys:
+        return
+    started = time.perf_counter()
+    try:
+        client.delete(*keys)
+        record_cache(keys[0], "delete", "ok", time.perf_counter() - started)
+    except Exception as exc:
+        logger.debug("Cache DELETE error for %s: %s", keys[0], exc)
+        record_cache(keys[0], "delete", "error", time.perf_counter() - started)
 
 
 def invalidate_cache(pattern: str) -> None:
@@ -59,9 +146,73 @@ def invalidate_cache(pattern: str) -> None:
     client = _get_client()
     if client is None:
         return
+    started = time.perf_counter()
     try:
         keys = client.keys(pattern)
         if keys:
             client.delete(*keys)
+        record_cache(pattern, "invalidate", "ok", time.perf_counter() - started)
     except Exception as exc:
         logger.debug("Cache INVALIDATE error for %s: %s", pattern, exc)
+        record_cache(pattern, "invalidate", "error", time.perf_counter() - started)
+
+
+# ----- per-content-type policy -----
+
+# Вызываются после сброса списков типа с его префиксом (прогрев кэша)
+_list_invalidation_listeners: List[Callable[[str], None]] = []
+
+
+def add_list_invalidation_listener(listener: Callable[[str], None]) -> None:
+    _list_invalidation_listeners.append(listener)
+
+
+@dataclass(frozen=True)
+class CachePolicy:
+    """Key layout, TTLs and invalidation for one content type.
+
+    Keys: '{prefix}:list:{page}:{per_page}:<filters>:{sort}', '{prefix}:item:{id}'
+    (the full document of GET /{type}/{id}), '{prefix}:card:{id}' (the list-shaped
+    card of ?ids=, without the body), '{prefix}:content:{id}:{offset}:{length}'. Routers, multi-get, bulk
+    import, rating updates and cache warm-up all go through the same
+    policy, so a new key family or TTL change lands in every code path at
+    once.
+    """
+
+    prefix: str
+    # Фильтры списка в порядке, в котором они входят в ключ
+    list_filters: Tuple[str, ...]
+    list_ttl: int = 300
+    item_ttl: int = 600
+    card_ttl: int = 600
+    content_ttl: int = 600
+
+    def list_page_key(self, page: int, per_page: int, sort: Optional[str] = None, **filters) -> str:
+        params = [page, per_page] + [filters.get(name) for name in self.list_filters] + [sort]
+        return f"{self.prefix}:list:" + ":".join(str(p) for p in params)
+
+    def item_key(self, item_id: int) -> str:
+        return f"{self.prefix}:item:{item_id}"
+
+    def card_key(self, item_id: int) -> str:
+        return f"{self.prefix}:card:{item_id}"
+
+    def content_key(self, item_id: int, offset: int, length: int) -> str:
+        return f"{self.prefix}:content:{item_id}:{offset}:{length}"
+
+    def invalidate_lists(self) -> None:
+        invalidate_cache(f"{self.prefix}:list:*")
+        for listener in list(_list_invalidation_listeners):
+            listener(self.prefix)
+
+    def invalidate_items(self, *item_ids: int, content: bool = True) -> None:
+        """Drop item and card keys (one DEL) and, by default, their text fragments."""
+        delete_cache(*(key for item_id in item_ids for key in (self.item_key(item_id), self.card_key(item_id))))
+        if content:
+            for item_id in item_ids:
+                invalidate_cache(f"{self.prefix}:content:{item_id}:*")
+
+    def invalidate_item(self, item_id: int) -> None:
+        """After create/update/delete: the item, its fragments and every list page."""
+        self.invalidate_items(item_id)
+        self.invalidate_lists()
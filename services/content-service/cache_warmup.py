@@ -0,0 +1,166 @@
+"""Background cache warm-up for hot list pages and items.
+
+After a deploy, a Redis flush or a list invalidation the first pages of
+every list and the most viewed items are cold, and the first readers pay
+the full query cost. CacheWarmer rebuilds them off the request path:
+
+- the first CACHE_WARMUP_LIST_PAGES pages of each list for every language
+  (and no language filter) and every sort, with default paging;
+- the cards ({type}:card:{id}, list columns without the body) of the
+  CACHE_WARMUP_TOP_ITEMS most viewed items, loaded in one query and written
+  with one pipelined SETEX.
+
+Runs on startup and after CachePolicy.invalidate_lists(). A single daemon
+thread does the work on the primary: a warm-up follows a write by seconds,
+less than the replica lag STICKY_PRIMARY_SECONDS allows for, and pages read
+from the replica would cache the state before the write for list_ttl.
+Requests for the same type are
+debounced (CACHE_WARMUP_DELAY) and spaced at least CACHE_WARMUP_MIN_INTERVAL
+apart, with a pause between queries, so a burst of writes turns into one
+gentle rebuild instead of a spike of read load.
+"""
+import logging
+import os
+import threading
+import time
+from typing import Dict, List, Optional
+
+from sqlalchemy import select
+
+import cache
+from cache import add_list_invalidation_listener, set_cache, set_many_cache
+from content_types import CONTENT_TYPES, ContentType
+from queries import fetch_items_by_id, list_page
+
+logger = logging.getLogger(__name__)
+
+CACHE_WARMUP_ENABLED = os.getenv("CACHE_WARMUP_ENABLED", "true").strip().lower() in ("1", "true", "yes", "on")
+CACHE_WARMUP_LIST_PAGES = int(os.getenv("CACHE_WARMUP_LIST_PAGES", "2"))
+CACHE_WARMUP_PER_PAGE = 20  # значение per_page по умолчанию в списках
+CACHE_WARMUP_LANGUAGES = [None] + [
+    lang.strip() for lang in os.getenv("CACHE_WARMUP_LANGUAGES", "tm,ru,en").split(",") if lang.strip()
+]
+CACHE_WARMUP_SORTS = (None, "views_desc", "rating_desc")
+CACHE_WARMUP_TOP_ITEMS = int(os.getenv("CACHE_WARMUP_TOP_ITEMS", "50"))
+# Сколько ждать после сброса, чтобы серия записей дала один прогрев
+CACHE_WARMUP_DELAY = float(os.getenv("CACHE_WARMUP_DELAY", "2"))
+CACHE_WARMUP_MIN_INTERVAL = float(os.getenv("CACHE_WARMUP_MIN_INTERVAL", "30"))
+CACHE_WARMUP_QUERY_PAUSE = int(os.getenv("CACHE_WARMUP_QUERY_PAUSE_MS", "20")) / 1000
+
+
+def warm_lists(db, ctype: ContentType, pause: float = 0.0) -> int:
+    """Rebuild hot list pages under the exact keys the list endpoints read."""
+    policy = ctype.cache
+    written = 0
+    for language in CACHE_WARMUP_LANGUAGES:
+        for sort in CACHE_WARMUP_SORTS:
+            for page in range(1, CACHE_WARMUP_LIST_PAGES + 1):
+                result = list_page(db, ctype, page, CACHE_WARMUP_PER_PAGE, sort=sort, language=language)
+                set_cache(
+                    policy.list_page_key(page, CACHE_WARMUP_PER_PAGE, sort, language=language),
+                    result,
+                    ttl=policy.list_ttl,
+                )
+                written += 1
+                if pause:
+                    time.sleep(pause)
+                if page >= result["pages"]:
+                    break
+    return written
+
+
+def warm_top_items(db, ctype: ContentType, limit: int) -> int:
+    """Cache the cards of the most viewed items, as GET /{type}?ids= reads them."""
+    model = ctype.model
+    ids = list(db.execute(select(model.id).order_by(model.views.desc()).limit(limit)).scalars())
+    items = fetch_items_by_id(db, ctype, ids)
+    set_many_cache({ctype.cache.card_key(item_id): item for item_id, item in items.items()}, ttl=ctype.cache.card_ttl)
+    return len(items)
+
+
+class CacheWarmer:
+    """Debounced, rate-limited warm-up requests served by one background thread."""
+
+    def __init__(self, delay: float = CACHE_WARMUP_DELAY, min_interval: float = CACHE_WARMUP_MIN_INTERVAL):
+        self.delay = delay
+        self.min_interval = min_interval
+        self._due: Dict[str, float] = {}
+        self._last_run: Dict[str, float] = {}
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+
+    def schedule(self, name: str, delay: Optional[float] = None) -> None:
+        if name not in CONTENT_TYPES:
+            return
+        with self._cond:
+            if name in self._due:
+                # Уже запланирован: серия сбросов сливается в один прогрев
+                return
+            now = time.monotonic()
+            earliest = self._last_run.get(name, now - self.min_interval) + self.min_interval
+            self._due[name] = max(now + (self.delay if delay is None else delay), earliest)
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._loop, name="cache-warmup", daemon=True)
+                self._thread.start()
+            self._cond.notify()
+
+    def pending(self) -> List[str]:
+        with self._cond:
+            return sorted(self._due)
+
+    def _next(self) -> str:
+        with self._cond:
+            while True:
+                if self._due:
+                    name, due = min(self._due.items(), key=lambda item: item[1])
+                    wait = due - time.monotonic()
+                    if wait <= 0:
+                        del self._due[name]
+                        self._last_run[name] = time.monotonic()
+                        return name
+                    self._cond.wait(wait)
+                else:
+                    self._cond.wait()
+
+    def _loop(self) -> None:
+        while True:
+            name = self._next()
+            try:
+                self.warm(name)
+            except Exception:
+                logger.exception("Cache warm-up for %s failed", name)
+
+    def warm(self, name: str, pause: float = CACHE_WARMUP_QUERY_PAUSE) -> dict:
+        """Synchronous warm-up of one content type; returns what was written."""
+        from database import SessionLocal
+
+        if cache._get_client() is None:
+            return {"lists": 0, "items": 0}
+        ctype = CONTENT_TYPES[name]
+        started = time.perf_counter()
+        db = SessionLocal()
+        try:
+            lists = warm_lists(db, ctype, pause)
+            items = warm_top_items(db, ctype, CACHE_WARMUP_TOP_ITEMS)
+        finally:
+            db.close()
+        logger.info("Cache warm-up %s: %d list pages, %d items in %.2fs",
+                    name, lists, items, time.perf_counter() - started)
+        return {"lists": lists, "items": items}
+
+
+warmer = CacheWarmer()
+
+
+def _on_lists_invalidated(prefix: str) -> None:
+    if CACHE_WARMUP_ENABLED:
+        warmer.schedule(prefix)
+
+
+add_list_invalidation_listener(_on_lists_invalidated)
+
+
+def warm_all_on_startup() -> None:
+    if CACHE_WARMUP_ENABLED:
+        for name in CONTENT_TYPES:
+            warmer.schedule(name, delay=0)
@@ -0,0 +1,271 @@
+"""Response compression: zstd, brotli or gzip by Accept-Encoding.
+
+Document bodies, content fragments, lists and highlight feeds are plain text
+that shrinks 4-10x, which matters most for readers on slow links.
+CompressionMiddleware picks the best encoding the client accepts (zstd, then
+br, then gzip; libraries that are not installed are skipped) and compresses
+
+- single-body responses of at least COMPRESSION_MIN_SIZE bytes in one shot;
+  bodies from COMPRESSION_OFFLOAD_SIZE up are compressed in a worker thread
+  so the event loop keeps serving other requests;
+- streaming responses (NDJSON/CSV export) chunk by chunk with a sync flush,
+  so the client still receives data as it is produced.
+
+Levels are set per admission route class (admission.route_class): item reads
+and content fragments get stronger levels than lists and writes, e.g.
+COMPRESSION_READ_LEVELS=zstd:6,br:5,gzip:6.
+
+Responses served from the Redis cache produce the same bytes on every hit,
+so compressed variants are kept in an in-process LRU keyed by the body
+digest (COMPRESSION_CACHE_MB) and a hit costs a hash instead of compression.
+
+Already encoded responses, binary content types (PDF, images), ranges and
+HEAD requests pass through untouched.
+"""
+import hashlib
+import os
+import zlib
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+import anyio
+from starlette.datastructures import Headers, MutableHeaders
+
+from admission import route_class
+
+try:
+    import brotli  # type: ignore
+except ImportError:  # pragma: no cover
+    brotli = None
+
+try:
+    import zstandard  # type: ignore
+except ImportError:  # pragma: no cover
+    zstandard = None
+
+COMPRESSION_ENABLED = os.getenv("COMPRESSION_ENABLED", "true").strip().lower() in ("1", "true", "yes", "on")
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+COMPRESSION_OFFLOAD_SIZE = int(os.getenv("COMPRESSION_OFFLOAD_SIZE", str(256 * 1024)))
+COMPRESSION_CACHE_BYTES = int(float(os.getenv("COMPRESSION_CACHE_MB", "32")) * 1024 * 1024)
+# Больше этого в памяти не держим: такой ответ вытеснил бы всё остальное
+COMPRESSION_CACHE_MAX_ITEM = 1024 * 1024
+
+# Порядок предпочтения сервера среди того, что принимает клиент
+ENCODINGS = tuple(name for name, lib in (("zstd", zstandard), ("br", brotli), ("gzip", zlib)) if lib is not None)
+
+# класс маршрута -> уровни; тексты документов повторяются и жмутся сильнее
+DEFAULT_LEVELS: Dict[Optional[str], Dict[str, int]] = {
+    "read": {"zstd": 6, "br": 5, "gzip": 6},
+    "list": {"zstd": 3, "br": 4, "gzip": 5},
+    "write": {"zstd": 3, "br": 3, "gzip": 4},
+    None: {"zstd": 3, "br": 4, "gzip": 5},
+}
+
+_COMPRESSIBLE_TYPES = (
+    "text/", "application/json", "application/x-ndjson", "application/msgpack",
+    "application/javascript", "application/xml", "image/svg+xml",
+)
+
+
+def _levels_from_env(name: Optional[str]) -> Dict[str, int]:
+    levels = dict(DEFAULT_LEVELS[name])
+    raw = os.getenv(f"COMPRESSION_{(name or 'other').upper()}_LEVELS", "")
+    for part in raw.split(","):
+        encoding, _, level = part.partition(":")
+        if encoding.strip() in levels and level.strip().isdigit():
+            levels[encoding.strip()] = int(level)
+    return levels
+
+
+LEVELS: Dict[Optional[str], Dict[str, int]] = {name: _levels_from_env(name) for name in DEFAULT_LEVELS}
+
+
+def choose_encoding(accept_encoding: str) -> Optional[str]:
+    """Best supported encoding listed in Accept-Encoding with q > 0, or None."""
+    accepted = set()
+    for part in accept_encoding.lower().split(","):
+        token, *params = [item.strip() for item in part.split(";")]
+        q = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if token and q > 0:
+            accepted.add(token)
+    for encoding in ENCODINGS:
+        if encoding in accepted or "*" in accepted:
+            return encoding
+    return None
+
+
+def compress(encoding: str, level: int, body: bytes) -> bytes:
+    if encoding == "zstd":
+        return zstandard.ZstdCompressor(level=level).compress(body)
+    if encoding == "br":
+        return brotli.compress(body, quality=level)
+    return zlib.compress(body, level, wbits=31)  # 31 - формат gzip
+
+
+class _StreamCompressor:
+    """Incremental compressor; every chunk is flushed so streaming stays streaming."""
+
+    def __init__(self, encoding: str, level: int):
+        self.encoding = encoding
+        if encoding == "zstd":
+            self._obj = zstandard.ZstdCompressor(level=level).compressobj()
+        elif encoding == "br":
+            self._obj = brotli.Compressor(quality=level)
+        else:
+            self._obj = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def chunk(self, data: bytes) -> bytes:
+        if self.encoding == "zstd":
+            return self._obj.compress(data) + self._obj.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+        if self.encoding == "br":
+            return self._obj.process(data) + self._obj.flush()
+        return self._obj.compress(data) + self._obj.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        if self.encoding == "br":
+            return self._obj.finish()
+        return self._obj.flush()
+
+
+class PrecompressedCache:
+    """LRU of compressed bodies keyed by (encoding, level, body digest), bounded in bytes."""
+
+    def __init__(self, max_bytes: int = COMPRESSION_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self._items: "OrderedDict[Tuple[str, int, bytes], bytes]" = OrderedDict()
+
+    @staticmethod
+    def key(encoding: str, level: int, body: bytes) -> Tuple[str, int, bytes]:
+        return encoding, level, hashlib.blake2b(body, digest_size=16).digest()
+
+    def get(self, key) -> Optional[bytes]:
+        value = self._items.get(key)
+        if value is not None:
+            self._items.move_to_end(key)
+            self.hits += 1
+        return value
+
+    def put(self, key, value: bytes) -> None:
+        if len(value) > COMPRESSION_CACHE_MAX_ITEM or len(value) > self.max_bytes or key in self._items:
+            return
+        self._items[key] = value
+        self.size += len(value)
+        while self.size > self.max_bytes:
+            _, evicted = self._items.popitem(last=False)
+            self.size -= len(evicted)
+
+
+def _add_vary(headers: MutableHeaders) -> None:
+    vary = headers.get("vary", "")
+    if "accept-encoding" not in vary.lower():
+        headers["vary"] = f"{vary}, Accept-Encoding" if vary else "Accept-Encoding"
+
+
+class CompressionMiddleware:
+    """Pure ASGI middleware; only touches the response messages."""
+
+    def __init__(self, app, minimum_size: int = COMPRESSION_MIN_SIZE,
+                 cache: Optional[PrecompressedCache] = None):
+        self.app = app
+        self.minimum_size = minimum_size
+        # Память общая для всех запросов процесса; трогается только из цикла событий
+        self.cache = PrecompressedCache() if cache is None else cache
+
+    async def __call__(self, scope, receive, send):
+        if scope.get("type") != "http" or not COMPRESSION_ENABLED or scope.get("method") == "HEAD":
+            await self.app(scope, receive, send)
+            return
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        # У pdf своих уровней нет: двоичное тело всё равно не сжимается
+        levels = LEVELS.get(route_class(scope.get("method", ""), scope.get("path", "")), LEVELS[None])
+        await _Responder(self, encoding, levels[encoding], send).run(scope, receive)
+
+
+class _Responder:
+    def __init__(self, middleware: CompressionMiddleware, encoding: str, level: int, send):
+        self.middleware = middleware
+        self.app = middleware.app
+        self.encoding = encoding
+        self.level = level
+        self.send = send
+        self.start: Optional[dict] = None
+        self.mode: Optional[str] = None  # passthrough | stream
+        self.stream: Optional[_StreamCompressor] = None
+
+    async def run(self, scope, receive) -> None:
+        await self.app(scope, receive, self.on_send)
+
+    def _compressible(self, headers: Headers) -> bool:
+        if self.start["status"] in (204, 206, 304) or "content-encoding" in headers:
+            return False
+        content_type = headers.get("content-type", "").lower()
+        return content_type.startswith(_COMPRESSIBLE_TYPES)
+
+    async def on_send(self, message) -> None:
+        kind = message["type"]
+        if kind == "http.response.start":
+            # Заголовки зависят от тела: отправим вместе с первым фрагментом
+            self.start = message
+            return
+        if kind != "http.response.body":
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more = message.get("more_body", False)
+        if self.mode == "passthrough":
+            await self.send(message)
+            return
+        if self.mode == "stream":
+            data = self.stream.chunk(body) if body else b""
+            if not more:
+                data += self.stream.finish()
+            await self.send({"type": "http.response.body", "body": data, "more_body": more})
+            return
+
+        headers = MutableHeaders(scope=self.start)
+        if not self._compressible(headers) or (not more and len(body) < self.middleware.minimum_size):
+            self.mode = "passthrough"
+            await self.send(self.start)
+            await self.send(message)
+            return
+
+        headers["content-encoding"] = self.encoding
+        _add_vary(headers)
+        if more:
+            self.mode = "stream"
+            self.stream = _StreamCompressor(self.encoding, self.level)
+            del headers["content-length"]
+            await self.send(self.start)
+            await self.send({"type": "http.response.body", "body": self.stream.chunk(body), "more_body": True})
+            return
+
+        data = await self._compress_whole(body)
+        headers["content-length"] = str(len(data))
+        await self.send(self.start)
+        await self.send({"type": "http.response.body", "body": data})
+
+    async def _compress_whole(self, body: bytes) -> bytes:
+        cache = self.middleware.cache
+        key = cache.key(self.encoding, self.level, body)
+        data = cache.get(key)
+        if data is not None:
+            return data
+        if len(body) >= COMPRESSION_OFFLOAD_SIZE:
+            data = await anyio.to_thread.run_sync(compress, self.encoding, self.level, body)
+        else:
+            data = compress(self.encoding, self.level, body)
+        cache.put(key, data)
+        return data
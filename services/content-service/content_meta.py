@@ -0,0 +1,153 @@
+"""Derived card fields computed from the document body at write time.
+
+Cards show a short excerpt, a word count and a reading-time estimate. They
+used to be computed by the frontend from the full `content`; now the
+create/update paths of every content router (and the NDJSON import) store
+
+- excerpt          - plain text without HTML, cut on a word boundary;
+- word_count       - words in that plain text;
+- reading_minutes  - word_count / READING_WORDS_PER_MINUTE rounded up;
+- content_hash     - sha256 of the body, so unchanged bodies can be detected;
+- content_length   - body length in characters, so /content chunks report
+                     the total without reading the whole body;
+
+and the list endpoints select these columns instead of the body.
+
+Rows written before the columns existed are filled by a backfill that
+derives the fields in a process pool (the work is CPU-bound regex over large
+bodies) and writes each batch with one executemany UPDATE:
+
+    python content_meta.py                  # rows not processed yet
+    python content_meta.py --all            # recompute every row
+    python content_meta.py --workers 4 --batch 200 --type books
+"""
+import argparse
+import hashlib
+import html
+import logging
+import math
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import bindparam, select, update
+from sqlalchemy.orm import Session
+
+from content_types import CONTENT_TYPES, ContentType
+
+logger = logging.getLogger(__name__)
+
+EXCERPT_LENGTH = int(os.getenv("EXCERPT_LENGTH", "300"))
+READING_WORDS_PER_MINUTE = int(os.getenv("READING_WORDS_PER_MINUTE", "200"))
+CONTENT_META_BATCH = int(os.getenv("CONTENT_META_BATCH", "500"))
+DERIVED_FIELDS = ("excerpt", "word_count", "reading_minutes", "content_hash", "content_length")
+
+_SKIPPED_BLOCKS = re.compile(r"<(script|style)\b.*?</\1\s*>", re.IGNORECASE | re.DOTALL)
+_TAGS = re.compile(r"<[^>]+>")
+_SPACES = re.compile(r"\s+")
+
+
+def plain_text(content: Optional[str]) -> str:
+    """HTML body -> text with entities decoded and whitespace collapsed."""
+    if not content:
+        return ""
+    text = _TAGS.sub(" ", _SKIPPED_BLOCKS.sub(" ", content))
+    return _SPACES.sub(" ", html.unescape(text)).strip()
+
+
+def make_excerpt(text: str, length: int = EXCERPT_LENGTH) -> str:
+    if len(text) <= length:
+        return text
+    cut = text[:length]
+    # Не рвём слово, если пробел есть во второй половине отрывка
+    space = cut.rfind(" ")
+    if space > length // 2:
+        cut = cut[:space]
+    return cut.rstrip(" ,.;:-") + "…"
+
+
+def content_fields(content: Optional[str]) -> Dict[str, object]:
+    """Column values derived from *content*, ready for Model(**...) or setattr."""
+    text = plain_text(content)
+    words = len(text.split())
+    return {
+        "excerpt": make_excerpt(text) if text else None,
+        "word_count": words,
+        "reading_minutes": max(1, math.ceil(words / READING_WORDS_PER_MINUTE)) if words else 0,
+        "content_hash": hashlib.sha256((content or "").encode("utf-8")).hexdigest(),
+        "content_length": len(content or ""),
+    }
+
+
+def _derive_row(row: Tuple[int, Optional[str]]) -> Dict[str, object]:
+    item_id, content = row
+    # Ключи колонок заняты в SET, поэтому параметры с префиксом
+    return {"row_id": item_id, **{f"new_{name}": value for name, value in content_fields(content).items()}}
+
+
+def backfill(db: Session, ctype: ContentType, pool: Optional[ProcessPoolExecutor] = None,
+             batch: int = CONTENT_META_BATCH, recompute_all: bool = False) -> int:
+    """Fill derived fields in id order, one SELECT and one executemany UPDATE per batch.
+
+    pool=None derives in this process (tests, small tables). Returns rows updated.
+    """
+    table = ctype.model.__table__
+    stmt = (
+        update(table)
+        .where(table.c.id == bindparam("row_id"))
+        .values(**{name: bindparam(f"new_{name}") for name in DERIVED_FIELDS})
+    )
+    done = 0
+    last_id = 0
+    while True:
+        query = select(table.c.id, table.c.content).where(table.c.id > last_id)
+        if not recompute_all:
+            # content_length появился позже остальных полей (0009)
+            query = query.where(table.c.content_hash.is_(None) | table.c.content_length.is_(None))
+        rows = [tuple(row) for row in db.execute(query.order_by(table.c.id).limit(batch))]
+        if not rows:
+            return done
+        if pool is None:
+            params = [_derive_row(row) for row in rows]
+        else:
+            # Крупные куски: меньше пересылок между процессами
+            params = list(pool.map(_derive_row, rows, chunksize=max(1, len(rows) // 32)))
+        db.execute(stmt, params)
+        db.commit()
+        done += len(rows)
+        last_id = rows[-1][0]
+        logger.info("%s: %d rows (up to id %d)", ctype.name, done, last_id)
+
+
+def run_backfill(names: Iterable[str], workers: Optional[int], batch: int, recompute_all: bool) -> Dict[str, int]:
+    from database import SessionLocal
+
+    totals: Dict[str, int] = {}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for name in names:
+            started = time.perf_counter()
+            db = SessionLocal()
+            try:
+                totals[name] = backfill(db, CONTENT_TYPES[name], pool, batch, recompute_all)
+            finally:
+                db.close()
+            logger.info("%s: backfilled %d rows in %.1fs", name, totals[name], time.perf_counter() - started)
+    return totals
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Backfill excerpt, word_count, reading_minutes, content_hash")
+    parser.add_argument("--type", choices=sorted(CONTENT_TYPES), action="append",
+                        help="content type (repeatable); all types by default")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--batch", type=int, default=CONTENT_META_BATCH)
+    parser.add_argument("--all", action="store_true", help="recompute rows that already have the fields")
+    args = parser.parse_args(argv)
+    run_backfill(args.type or list(CONTENT_TYPES), args.workers, args.batch, args.all)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
@@ -0,0 +1,72 @@
+"""Per-content-type metadata shared by routers that treat articles, books and
+dissertations generically (bulk import/export and friends)."""
+from dataclasses import dataclass
+from typing import Dict, Optional, Type
+
+from sqlalchemy import Table
+
+from cache import CachePolicy
+
+from models import (
+    Article,
+    ArticleCategory,
+    Book,
+    BookCategory,
+    Dissertation,
+    DissertationCategory,
+    article_categories,
+    book_categories,
+    dissertation_categories,
+)
+from schemas import ArticleCreate, BookCreate, DissertationCreate
+
+
+@dataclass(frozen=True)
+class ContentType:
+    name: str  # URL segment and cache key prefix, e.g. "articles"
+    model: Type
+    category_model: Type
+    link_table: Table  # many-to-many table between items and categories
+    link_column: str  # column of link_table that points at the item
+    create_schema: Type
+    category_has_parent: bool
+    cache: CachePolicy
+
+
+CONTENT_TYPES: Dict[str, ContentType] = {
+    "articles": ContentType(
+        name="articles",
+        model=Article,
+        category_model=ArticleCategory,
+        link_table=article_categories,
+        link_column="article_id",
+        create_schema=ArticleCreate,
+        category_has_parent=False,
+        cache=CachePolicy("articles", ("author", "language", "type", "category_id", "search")),
+    ),
+    "books": ContentType(
+        name="books",
+        model=Book,
+        category_model=BookCategory,
+        link_table=book_categories,
+        link_column="book_id",
+        create_schema=BookCreate,
+        category_has_parent=True,
+        cache=CachePolicy("books", ("author", "language", "category_id", "search")),
+    ),
+    "dissertations": ContentType(
+        name="dissertations",
+        model=Dissertation,
+        category_model=DissertationCategory,
+        link_table=dissertation_categories,
+        link_column="dissertation_id",
+        create_schema=DissertationCreate,
+        category_has_parent=True,
+        cache=CachePolicy("dissertations", ("author", "language", "category_id", "search")),
+    ),
+}
+
+
+def get_content_type(name: str) -> Optional[ContentType]:
+    """Return the ContentType registered under *name*, or None."""
+    return CONTENT_TYPES.get(name)
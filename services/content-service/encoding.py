@@ -0,0 +1,103 @@
+"""Response wire formats: JSON or MessagePack.
+
+Routers created with default_response_class=NegotiatedResponse (articles,
+books, dissertations, saved) answer
+
+- Accept: application/msgpack      -> MessagePack body (C packer), same
+                                      structure as the JSON one;
+- anything else                    -> plain JSON, as before.
+
+WireFormatMiddleware reads Accept once per request into a context variable,
+so handlers stay unchanged. msgpack is optional: without it the service keeps
+answering JSON. Compression (zstd, br, gzip) is done for every response by
+CompressionMiddleware, see compression.py.
+
+encode_default is the one fallback encoder for values JSON and MessagePack
+cannot encode natively (datetimes become ISO 8601, as in FastAPI responses);
+the Redis cache uses it too.
+"""
+import contextvars
+from datetime import date, datetime, time
+from decimal import Decimal
+from typing import Any, Optional, Tuple
+
+from fastapi.responses import JSONResponse
+
+try:
+    import msgpack  # type: ignore
+except ImportError:  # pragma: no cover
+    msgpack = None
+
+MSGPACK_MEDIA_TYPES = ("application/msgpack", "application/x-msgpack")
+
+# MessagePack для текущего запроса
+_wire_format: contextvars.ContextVar[bool] = contextvars.ContextVar("wire_format", default=False)
+
+
+def encode_default(value: Any) -> Any:
+    """Fallback for json.dumps / msgpack.packb: ISO dates, float decimals, str for the rest."""
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    return str(value)
+
+
+def _accepts(header: str, tokens: Tuple[str, ...]) -> bool:
+    """True if *header* lists one of *tokens* without q=0."""
+    for part in header.split(","):
+        token, *params = [item.strip() for item in part.split(";")]
+        if token.lower() not in tokens:
+            continue
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    return float(value) > 0
+                except ValueError:
+                    return False
+        return True
+    return False
+
+
+def negotiate(accept: str) -> bool:
+    return msgpack is not None and _accepts(accept, MSGPACK_MEDIA_TYPES)
+
+
+class NegotiatedResponse(JSONResponse):
+    """JSONResponse that switches to MessagePack by the Accept header."""
+
+    def __init__(self, content: Any = None, status_code: int = 200, headers: Optional[dict] = None,
+                 media_type: Optional[str] = None, background=None):
+        self._msgpack = _wire_format.get()
+        if media_type is None and self._msgpack:
+            media_type = MSGPACK_MEDIA_TYPES[0]
+        super().__init__(content, status_code, headers, media_type, background)
+        # Ответ зависит от заголовков запроса - кэшам и прокси это нужно знать
+        self.headers.append("vary", "Accept")
+
+    def render(self, content: Any) -> bytes:
+        if self._msgpack:
+            return msgpack.packb(content, default=encode_default, use_bin_type=True)
+        return super().render(content)
+
+
+class WireFormatMiddleware:
+    """Pure ASGI middleware: store the negotiated wire format for the request."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope.get("type") != "http":
+            await self.app(scope, receive, send)
+            return
+        accept = ""
+        for name, value in scope.get("headers", []):
+            if name == b"accept":
+                accept = value.decode("latin-1")
+        token = _wire_format.set(negotiate(accept))
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _wire_format.reset(token)
@@ -0,0 +1,63 @@
+"""Multi-get of content cards through the Redis card cache.
+
+Search results and saved-item screens carry only ids. Instead of one
+GET /{type}/{id} per card, GET /{type}?ids=1,2,3 reads all card keys
+(ContentType.cache) with one MGET, loads only the misses with one
+id = ANY(...) query, backfills them with pipelined SETEX and returns the
+cards in the requested order.
+
+Cards have the list shape: content is the stored excerpt, so the body is read
+only for rows the content_meta backfill has not reached yet. Full documents
+stay under the item keys of GET /{type}/{id}.
+"""
+from typing import List
+
+from fastapi import HTTPException
+from sqlalchemy.orm import Session
+
+from cache import get_many_cache, set_many_cache
+from content_types import ContentType
+from queries import fetch_items_by_id
+
+# Сколько id можно запросить за раз
+MULTI_GET_MAX = 100
+
+
+def parse_ids(raw: str) -> List[int]:
+    """'3,1,3' -> [3, 1]: order kept, duplicates dropped."""
+    ids: List[int] = []
+    try:
+        for part in raw.split(","):
+            if part.strip():
+                item_id = int(part)
+                if item_id not in ids:
+                    ids.append(item_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="ids must be a comma-separated list of integers")
+    if not ids:
+        raise HTTPException(status_code=400, detail="ids must not be empty")
+    if len(ids) > MULTI_GET_MAX:
+        raise HTTPException(status_code=400, detail=f"At most {MULTI_GET_MAX} ids per request")
+    return ids
+
+
+def get_items(db: Session, ctype: ContentType, ids: List[int]) -> dict:
+    """{items, missing}: cards for *ids* in request order, unknown ids in missing."""
+    policy = ctype.cache
+    keys = [policy.card_key(item_id) for item_id in ids]
+    found = {item_id: value for item_id, value in zip(ids, get_many_cache(keys)) if value is not None}
+
+    misses = [item_id for item_id in ids if item_id not in found]
+    if misses:
+        # Колонки списков: вместо тела - excerpt, как в карточках списков
+        loaded = fetch_items_by_id(db, ctype, misses)
+        set_many_cache(
+            {policy.card_key(item_id): item for item_id, item in loaded.items()},
+            ttl=policy.card_ttl,
+        )
+        found.update(loaded)
+
+    return {
+        "items": [found[item_id] for item_id in ids if item_id in found],
+        "missing": [item_id for item_id in ids if item_id not in found],
+    }
@@ -1,17 +1,35 @@
-from fastapi import FastAPI, Depends, HTTPException, status
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Depends, HTTPException, Response, status
 from fastapi.middleware.cors import CORSMiddleware
 from starlette.middleware.trustedhost import TrustedHostMiddleware
 from sqlalchemy.orm import Session
 import uvicorn
 import os
 
-from database import engine, Base, get_db
-from routers import articles, books, dissertations, categories, saved
+from database import get_db, pool_stats
+from routers import articles, books, dissertations, categories, saved, bulk, admin, ratings, popular, home
 from middleware import auth_middleware
 from request_middleware import RequestNormalizationMiddleware
+from metrics import MetricsMiddleware, register_pool_collector, render_latest
+from admission import AdmissionControlMiddleware, admission_stats, size_threadpool
+from encoding import WireFormatMiddleware
+from compression import CompressionMiddleware
+from cache_warmup import warm_all_on_startup
+from unique_views import start_view_rollup
+
+# Схема БД создаётся и обновляется отдельно: python migrate_db.py
+# (импорт приложения не обращается к базе)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Прогрев идёт в фоновом потоке и не задерживает старт
+    warm_all_on_startup()
+    start_view_rollup()
+    # Обработчики с запросами к базе синхронные и работают в пуле потоков
+    size_threadpool()
+    yield
 
-# Создание таблиц
-Base.metadata.create_all(bind=engine)
 
 app = FastAPI(
     title="Content Service API",
@@ -19,12 +37,26 @@ app = FastAPI(
     version="1.0.0",
     docs_url="/docs",
     redoc_url="/redoc",
-    redirect_slashes=False
+    redirect_slashes=False,
+    lifespan=lifespan
 )
 
 # Request normalization FIRST
 app.add_middleware(RequestNormalizationMiddleware)
 
+# Допуск по классам маршрутов - до чтения тела запроса, чтобы отказ был дешёвым
+app.add_middleware(AdmissionControlMiddleware)
+
+# Формат ответа (JSON / MessagePack) по Accept
+app.add_middleware(WireFormatMiddleware)
+
+# Сжатие zstd / br / gzip по Accept-Encoding - поверх готового тела ответа
+app.add_middleware(CompressionMiddleware)
+
+# Метрики - снаружи нормализации, чтобы время включало весь стек
+app.add_middleware(MetricsMiddleware)
+register_pool_collector(pool_stats)
+
 # Allowed hosts
 allowed_hosts_env = os.getenv("ALLOWED_HOSTS", "*")
 allowed_hosts = [host.strip() for host in allowed_hosts_env.split(",") if host.strip()]
@@ -40,20 +72,32 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Total-Length", "Server-Timing", "Retry-After"],
 )
 
 # Health check
 @app.get("/health")
 async def health_check():
-    return {"status": "ok", "service": "content-service"}
+    return {"status": "ok", "service": "content-service", "db_pool": pool_stats(), "admission": admission_stats()}
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    body, content_type = render_latest()
+    return Response(content=body, media_type=content_type)
 
 # Подключение роутеров с префиксами как в монолите
 # Убираем trailing slash из префиксов, т.к. роуты начинаются с "/"
+# popular - до роутеров типов, чтобы /articles/popular не совпал с /articles/{article_id}
+app.include_router(popular.router, prefix="/api/v1", tags=["Popular"])
+app.include_router(home.router, prefix="/api/v1", tags=["Home"])
 app.include_router(articles.router, prefix="/api/v1", tags=["Articles"])
 app.include_router(books.router, prefix="/api/v1", tags=["Books"])
 app.include_router(dissertations.router, prefix="/api/v1", tags=["Dissertations"])
 app.include_router(categories.router, prefix="/api/v1", tags=["Categories"])
 app.include_router(saved.router, prefix="/api/v1", tags=["Saved & Highlights"])
+app.include_router(bulk.router, prefix="/api/v1", tags=["Bulk"])
+app.include_router(ratings.router, prefix="/api/v1", tags=["Ratings"])
+app.include_router(admin.router, prefix="/admin", tags=["Admin"])
 
 if __name__ == "__main__":
     uvicorn.run("main:app", host="0.0.0.0", port=8002, reload=True)
@@ -0,0 +1,277 @@
+"""Prometheus metrics for content-service hot paths.
+
+HTTP latency and status per route template, DB query count and time per
+request, cache hit/miss by key family, PDF proxy traffic, auth validation
+latency, connection pool state and admission control. Exposed at /metrics.
+
+The same per-request counters feed the Server-Timing response header and
+the repeated-statement (N+1) warning.
+"""
+import logging
+import os
+import time
+from collections import Counter as StatementCounter
+from contextvars import ContextVar
+from typing import Callable, List, Optional
+
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, Counter, Gauge, Histogram, generate_latest
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+# Отдавать ли Server-Timing клиенту (раскрывает время в БД и кэше)
+SERVER_TIMING_ENABLED = os.getenv("SERVER_TIMING_ENABLED", "true").strip().lower() in ("1", "true", "yes", "on")
+# Сколько раз один и тот же SQL может выполниться за запрос до предупреждения
+N_PLUS_ONE_THRESHOLD = int(os.getenv("N_PLUS_ONE_THRESHOLD", "10"))
+
+HTTP_REQUEST_DURATION = Histogram(
+    "content_http_request_duration_seconds",
+    "HTTP request latency by route template",
+    ["method", "route"],
+)
+HTTP_REQUESTS = Counter(
+    "content_http_requests_total",
+    "HTTP responses by route template and status code",
+    ["method", "route", "status"],
+)
+DB_QUERIES_PER_REQUEST = Histogram(
+    "content_db_queries_per_request",
+    "SQL statements executed while serving one request",
+    ["route"],
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100, 200),
+)
+DB_TIME_PER_REQUEST = Histogram(
+    "content_db_time_per_request_seconds",
+    "Time spent in SQL statements while serving one request",
+    ["route"],
+)
+CACHE_OPERATIONS = Counter(
+    "content_cache_operations_total",
+    "Redis cache operations by key family and result",
+    ["family", "operation", "result"],
+)
+PDF_PROXY_DURATION = Histogram(
+    "content_pdf_proxy_duration_seconds",
+    "Latency of upstream PDF fetches",
+    ["outcome"],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60),
+)
+PDF_PROXY_BYTES = Counter(
+    "content_pdf_proxy_bytes_total",
+    "Bytes received from upstream PDF fetches",
+)
+AUTH_VALIDATION_DURATION = Histogram(
+    "content_auth_validation_duration_seconds",
+    "Latency of token validation calls to auth-service",
+    ["outcome"],
+)
+ADMISSION_IN_FLIGHT = Gauge(
+    "content_admission_in_flight",
+    "Requests currently admitted per route class",
+    ["route_class"],
+)
+ADMISSION_QUEUE_DEPTH = Gauge(
+    "content_admission_queue_depth",
+    "Requests waiting for admission per route class",
+    ["route_class"],
+)
+ADMISSION_QUEUE_WAIT = Histogram(
+    "content_admission_queue_wait_seconds",
+    "Time queued requests waited for admission",
+    ["route_class"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2, 5),
+)
+ADMISSION_SHED = Counter(
+    "content_admission_shed_total",
+    "Requests rejected with 503 by admission control",
+    ["route_class", "reason"],
+)
+
+
+# ----- per-request query stats -----
+
+class QueryStats:
+    __slots__ = ("path", "count", "seconds", "statements", "cache_count", "cache_seconds")
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self.count = 0
+        self.seconds = 0.0
+        # Текст SQL уже параметризован, поэтому одинаковые ленивые загрузки
+        # дают один и тот же ключ
+        self.statements = StatementCounter()
+        self.cache_count = 0
+        self.cache_seconds = 0.0
+
+    def repeated_statements(self, threshold: int):
+        return [(sql, n) for sql, n in self.statements.most_common() if n > threshold]
+
+    def server_timing(self, total_seconds: float) -> str:
+        return (
+            f'db;dur={self.seconds * 1000:.1f};desc="{self.count} queries", '
+            f'cache;dur={self.cache_seconds * 1000:.1f};desc="{self.cache_count} ops", '
+            f"total;dur={total_seconds * 1000:.1f}"
+        )
+
+
+# Объект общий для задачи запроса и потоков threadpool (контекст копируется,
+# а ссылка на QueryStats остаётся той же)
+query_stats: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+
+# Время старта - на контексте выполнения, а не в conn.info: упавший запрос
+# не доходит до after_cursor_execute, и стек на соединении из пула копил бы
+# чужие отметки
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context._query_start = time.perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, "_query_start", None)
+    stats = query_stats.get()
+    if stats is not None and started is not None:
+        stats.count += 1
+        stats.seconds += time.perf_counter() - started
+        stats.statements[statement] += 1
+
+
+def cache_family(key: str) -> str:
+    """'articles:list:1:20:...' -> 'articles:list'; 'articles:*' -> 'articles'."""
+    parts = key.split(":")
+    if len(parts) > 1 and parts[1] and "*" not in parts[1]:
+        return f"{parts[0]}:{parts[1]}"
+    return parts[0]
+
+
+def record_cache(key: str, operation: str, result: str, seconds: float = 0.0, count: int = 1) -> None:
+    """count - число ключей для пакетных операций (MGET); на время запроса это одна операция."""
+    CACHE_OPERATIONS.labels(cache_family(key), operation, result).inc(count)
+    stats = query_stats.get()
+    if stats is not None and result != "unavailable":
+        stats.cache_count += 1
+        stats.cache_seconds += seconds
+
+
+# Подписчики на завершение запроса: (method, path, route, stats); используется
+# плагином query_budget в тестах
+_request_listeners: List[Callable[[str, str, str, QueryStats], None]] = []
+
+
+def add_request_listener(listener: Callable[[str, str, str, QueryStats], None]) -> None:
+    _request_listeners.append(listener)
+
+
+def remove_request_listener(listener: Callable[[str, str, str, QueryStats], None]) -> None:
+    _request_listeners.remove(listener)
+
+
+# ----- middleware -----
+
+class MetricsMiddleware:
+    """Pure ASGI middleware: latency, status and DB usage per route template."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope.get("type") != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+        stats = QueryStats(scope.get("path"))
+        started = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if SERVER_TIMING_ENABLED:
+                    header = stats.server_timing(time.perf_counter() - started)
+                    message["headers"] = list(message.get("headers", [])) + [
+                        (b"server-timing", header.encode("latin-1"))
+                    ]
+            await send(message)
+
+        token = query_stats.set(stats)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            query_stats.reset(token)
+            # Шаблон маршрута, а не сырой путь: id в URL не раздувают число рядов
+            route = scope.get("route")
+            route_label = getattr(route, "path", None) or "unmatched"
+            method = scope.get("method", "")
+            HTTP_REQUEST_DURATION.labels(method, route_label).observe(elapsed)
+            HTTP_REQUESTS.labels(method, route_label, str(status_code)).inc()
+            DB_QUERIES_PER_REQUEST.labels(route_label).observe(stats.count)
+            DB_TIME_PER_REQUEST.labels(route_label).observe(stats.seconds)
+
+            path = stats.path or ""
+            for sql, times in stats.repeated_statements(N_PLUS_ONE_THRESHOLD):
+                logger.warning(
+                    "Possible N+1: %s %s ran the same statement %d times: %s",
+                    method, path, times, " ".join(sql.split())[:300],
+                )
+            for listener in list(_request_listeners):
+                listener(method, path, route_label, stats)
+
+
+# ----- connection pool -----
+
+class _PoolCollector:
+    """Reads pool counters at scrape time from a pool_stats()-like callable."""
+
+    def __init__(self, stats_provider: Callable[[], dict]):
+        self.stats_provider = stats_provider
+
+    def collect(self):
+        gauges = {
+            name: GaugeMetricFamily(f"content_db_pool_{name}", help_text, labels=["role"])
+            for name, help_text in (
+                ("size", "Configured pool size"),
+                ("checked_out", "Connections currently in use"),
+                ("idle", "Connections idle in the pool"),
+                ("overflow", "Connections open above pool size"),
+            )
+        }
+        checkouts = CounterMetricFamily(
+            "content_db_pool_checkouts", "Connections handed out by the pool", labels=["role"])
+        timeouts = CounterMetricFamily(
+            "content_db_pool_timeouts", "Checkouts that hit pool_timeout", labels=["role"])
+        wait = CounterMetricFamily(
+            "content_db_pool_wait_seconds", "Total time spent waiting for a connection", labels=["role"])
+
+        for role, stats in self.stats_provider().items():
+            if "checkouts" not in stats:
+                continue
+            for name, family in gauges.items():
+                family.add_metric([role], stats[name])
+            checkouts.add_metric([role], stats["checkouts"])
+            timeouts.add_metric([role], stats["timeouts"])
+            wait.add_metric([role], stats["wait_seconds_total"])
+
+        yield from gauges.values()
+        yield checkouts
+        yield timeouts
+        yield wait
+
+
+_pool_collector: Optional[_PoolCollector] = None
+
+
+def register_pool_collector(stats_provider: Callable[[], dict]) -> None:
+    global _pool_collector
+    if _pool_collector is None:
+        _pool_collector = _PoolCollector(stats_provider)
+        REGISTRY.register(_pool_collector)
+
+
+def render_latest():
+    """Body and content type for the /metrics response."""
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
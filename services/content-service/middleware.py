@@ -3,6 +3,8 @@ from fastapi import Request, HTTPException
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 import httpx
 import os
+import time
+from metrics import AUTH_VALIDATION_DURATION
 
 security = HTTPBearer()
 
@@ -11,6 +13,8 @@ AUTH_SERVICE_URL = os.getenv("AUTH_SERVICE_URL", "http://localhost:8001")
 async def verify_token(credentials: HTTPAuthorizationCredentials):
     """Валидация токена через Auth Service"""
     token = credentials.credentials
+    started = time.perf_counter()
+    outcome = "unavailable"
     
     async with httpx.AsyncClient() as client:
         try:
@@ -20,11 +24,15 @@ async def verify_token(credentials: HTTPAuthorizationCredentials):
             )
             
             if response.status_code == 200:
+                outcome = "valid"
                 return response.json()
             else:
+                outcome = "invalid"
                 raise HTTPException(status_code=401, detail="Invalid token")
         except httpx.RequestError:
             raise HTTPException(status_code=503, detail="Auth service unavailable")
+        finally:
+            AUTH_VALIDATION_DURATION.labels(outcome).observe(time.perf_counter() - started)
 
 def auth_middleware(required: bool = True):
     """Middleware для проверки аутентификации"""
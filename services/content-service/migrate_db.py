@@ -1,65 +1,101 @@
 """
-Ð¡ÐºÑ€Ð¸Ð¿Ñ‚ Ð´Ð»Ñ ÑÐ¾Ð·Ð´Ð°Ð½Ð¸Ñ/Ð¾Ð±Ð½Ð¾Ð²Ð»ÐµÐ½Ð¸Ñ Ñ‚Ð°Ð±Ð»Ð¸Ñ† Ð±Ð°Ð·Ñ‹ Ð´Ð°Ð½Ð½Ñ‹Ñ…
+Применение миграций схемы базы данных content-service.
+
+    python migrate_db.py            # применить недостающие миграции
+    python migrate_db.py --status   # показать применённые и ожидающие
+
+Запускается отдельно от приложения (перед стартом воркеров), поэтому импорт
+main.py не обращается к базе.
 """
-from sqlalchemy import inspect, text
-from database import Base, engine
-from models import (
-    Article, Book, Dissertation,
-    ArticleCategory, BookCategory, DissertationCategory,
-    SavedArticle, SavedBook, SavedDissertation,
-    ArticleHighlight, BookHighlight, DissertationHighlight
+import argparse
+from datetime import datetime
+from typing import List
+
+from sqlalchemy import Column, DateTime, MetaData, String, Table, inspect, select, text
+from sqlalchemy.engine import Engine
+
+from database import engine
+from migrations import MIGRATIONS
+
+# Таблица учёта миграций намеренно не входит в Base.metadata
+schema_migrations = Table(
+    "schema_migrations",
+    MetaData(),
+    Column("version", String(32), primary_key=True),
+    Column("description", String(255), nullable=False),
+    Column("applied_at", DateTime, nullable=False),
 )
 
-def create_tables():
-    """Ð¡Ð¾Ð·Ð´Ð°ÐµÑ‚ Ð²ÑÐµ Ñ‚Ð°Ð±Ð»Ð¸Ñ†Ñ‹ Ð² Ð±Ð°Ð·Ðµ Ð´Ð°Ð½Ð½Ñ‹Ñ…"""
-    print("Ð¡Ð¾Ð·Ð´Ð°Ð½Ð¸Ðµ Ñ‚Ð°Ð±Ð»Ð¸Ñ† Ð² Ð±Ð°Ð·Ðµ Ð´Ð°Ð½Ð½Ñ‹Ñ…...")
-    Base.metadata.create_all(bind=engine)
-    ensure_columns()
-    print("âœ“ Ð¢Ð°Ð±Ð»Ð¸Ñ†Ñ‹ ÑƒÑÐ¿ÐµÑˆÐ½Ð¾ ÑÐ¾Ð·Ð´Ð°Ð½Ñ‹!")
-    print("\nÐ¡Ð¾Ð·Ð´Ð°Ð½Ð½Ñ‹Ðµ Ñ‚Ð°Ð±Ð»Ð¸Ñ†Ñ‹:")
-    print("- articles")
-    print("- books")
-    print("- dissertations")
-    print("- article_categories_table")
-    print("- book_categories_table")
-    print("- dissertation_categories_table")
-    print("- saved_articles")
-    print("- saved_books")
-    print("- saved_dissertations")
-    print("- article_highlights")
-    print("- book_highlights")
-    print("- dissertation_highlights")
-
-def ensure_columns():
-    """Ð”Ð¾Ð±Ð°Ð²Ð»ÑÐµÑ‚ Ð½ÐµÐ´Ð¾ÑÑ‚Ð°ÑŽÑ‰Ð¸Ðµ ÐºÐ¾Ð»Ð¾Ð½ÐºÐ¸ Ð² ÑÑƒÑ‰ÐµÑÑ‚Ð²ÑƒÑŽÑ‰Ð¸Ðµ Ñ‚Ð°Ð±Ð»Ð¸Ñ†Ñ‹"""
-    inspector = inspect(engine)
-
-    def add_column_if_missing(table_name: str, column_name: str, column_type: str):
-        columns = {col["name"] for col in inspector.get_columns(table_name)}
-        if column_name not in columns:
-            print(f"Ð”Ð¾Ð±Ð°Ð²Ð»ÐµÐ½Ð¸Ðµ ÐºÐ¾Ð»Ð¾Ð½ÐºÐ¸ {table_name}.{column_name}...")
-            with engine.begin() as conn:
-                conn.execute(text(f"ALTER TABLE {table_name} ADD COLUMN {column_name} {column_type};"))
-
-    def drop_not_null_if_present(table_name: str, column_name: str):
-        columns = {col["name"]: col for col in inspector.get_columns(table_name)}
-        col = columns.get(column_name)
-        if col and not col.get("nullable", True):
-            print(f"Ð£Ð±Ð¸Ñ€Ð°ÐµÐ¼ NOT NULL Ñ {table_name}.{column_name}...")
-            with engine.begin() as conn:
-                conn.execute(text(f"ALTER TABLE {table_name} ALTER COLUMN {column_name} DROP NOT NULL;"))
-
-    add_column_if_missing("articles", "authors_workplace", "VARCHAR(255)")
-    add_column_if_missing("articles", "thumbnail", "VARCHAR(500)")
-    add_column_if_missing("books", "authors_workplace", "VARCHAR(255)")
-    add_column_if_missing("books", "thumbnail", "VARCHAR(500)")
-    add_column_if_missing("books", "description", "TEXT")
-    add_column_if_missing("books", "content", "TEXT")
-    add_column_if_missing("books", "pdf_file_url", "VARCHAR(500)")
-    add_column_if_missing("books", "epub_file_url", "VARCHAR(500)")
-    drop_not_null_if_present("books", "content")
-    add_column_if_missing("dissertations", "authors_workplace", "VARCHAR(255)")
-    add_column_if_missing("dissertations", "thumbnail", "VARCHAR(500)")
+# Произвольный ключ advisory-блокировки: два процесса не накатывают миграции одновременно
+ADVISORY_LOCK_KEY = 802002
+
+
+def applied_versions(conn) -> set:
+    return set(conn.execute(select(schema_migrations.c.version)).scalars().all())
+
+
+def run_migrations(bind: Engine = engine) -> List[str]:
+    """Apply pending migrations in order; returns the versions applied."""
+    is_postgres = bind.dialect.name == "postgresql"
+
+    applied = []
+    # Всё на одном соединении, которое держит блокировку: и создание таблицы
+    # учёта, и шаги. Иначе две реплики, стартующие вместе, гоняются за CREATE TABLE
+    with bind.connect() as conn:
+        if is_postgres:
+            conn.execute(text("SELECT pg_advisory_lock(:key)"), {"key": ADVISORY_LOCK_KEY})
+            # Блокировка сессионная и переживает commit
+            conn.commit()
+        try:
+            with conn.begin():
+                schema_migrations.create(bind=conn, checkfirst=True)
+                done = applied_versions(conn)
+            for version, description, upgrade in MIGRATIONS:
+                if version in done:
+                    continue
+                print(f"→ {version}: {description}")
+                # Каждый шаг и отметка о нём - в одной транзакции
+                with conn.begin():
+                    upgrade(conn)
+                    conn.execute(schema_migrations.insert().values(
+                        version=version,
+                        description=description,
+                        applied_at=datetime.utcnow(),
+                    ))
+                applied.append(version)
+        finally:
+            if is_postgres:
+                # После ошибки шага транзакция уже откатана, разблокировка пройдёт
+                conn.rollback()
+                conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": ADVISORY_LOCK_KEY})
+                conn.commit()
+    return applied
+
+
+def print_status(bind: Engine = engine):
+    # Только чтение: таблицу учёта создаёт run_migrations под блокировкой
+    with bind.connect() as conn:
+        done = applied_versions(conn) if inspect(conn).has_table(schema_migrations.name) else set()
+    for version, description, _ in MIGRATIONS:
+        mark = "x" if version in done else " "
+        print(f"[{mark}] {version}  {description}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Миграции схемы content-service")
+    parser.add_argument("--status", action="store_true", help="только показать состояние")
+    args = parser.parse_args()
+
+    if args.status:
+        print_status()
+        return
+
+    applied = run_migrations()
+    if applied:
+        print(f"✓ Применено миграций: {len(applied)}")
+    else:
+        print("✓ База данных в актуальном состоянии")
+
 
 if __name__ == "__main__":
-    create_tables()
+    main()
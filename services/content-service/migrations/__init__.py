@@ -0,0 +1,30 @@
+"""Versioned schema migrations for content-service.
+
+Steps run in order, each exactly once, and are recorded in the
+schema_migrations table. Add new steps at the end of MIGRATIONS; never
+renumber or edit a step that has already shipped.
+"""
+from migrations import (
+    add_book_fields,
+    content_length_column,
+    content_meta_columns,
+    daily_views,
+    highlight_range_index,
+    highlight_sync,
+    initial_schema,
+    legacy_columns,
+    rating_aggregates,
+)
+
+# (version, description, upgrade(conn))
+MIGRATIONS = [
+    ("0001", "initial schema", initial_schema.upgrade),
+    ("0002", "legacy content columns and category link indexes", legacy_columns.upgrade),
+    ("0003", "book fields and reading progress indexes", add_book_fields.upgrade),
+    ("0004", "rating aggregates and rating sort index", rating_aggregates.upgrade),
+    ("0005", "highlight viewport range index", highlight_range_index.upgrade),
+    ("0006", "highlight soft delete and sync index", highlight_sync.upgrade),
+    ("0007", "daily unique views table", daily_views.upgrade),
+    ("0008", "derived card fields: excerpt, word count, reading time, content hash", content_meta_columns.upgrade),
+    ("0009", "content length column for content chunks", content_length_column.upgrade),
+]
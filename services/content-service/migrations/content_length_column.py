@@ -0,0 +1,11 @@
+"""0009: content_length on content tables.
+
+/content chunks report the total body length; length(content) reads the
+whole body. Existing rows are filled by `python content_meta.py`.
+"""
+from migrations.helpers import add_column_if_missing
+
+
+def upgrade(conn):
+    for table in ("articles", "books", "dissertations"):
+        add_column_if_missing(conn, table, "content_length", "INTEGER")
@@ -0,0 +1,14 @@
+"""0008: excerpt, word_count, reading_minutes and content_hash on content tables.
+
+Columns only; existing rows are filled by `python content_meta.py`, which
+derives the values in a process pool instead of a long migration transaction.
+"""
+from migrations.helpers import add_column_if_missing
+
+
+def upgrade(conn):
+    for table in ("articles", "books", "dissertations"):
+        add_column_if_missing(conn, table, "excerpt", "TEXT")
+        add_column_if_missing(conn, table, "word_count", "INTEGER DEFAULT 0")
+        add_column_if_missing(conn, table, "reading_minutes", "INTEGER DEFAULT 0")
+        add_column_if_missing(conn, table, "content_hash", "VARCHAR(64)")
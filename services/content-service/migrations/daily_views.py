@@ -0,0 +1,7 @@
+"""0007: daily_views - per-day unique views rolled up from Redis HyperLogLog."""
+from models import DailyView
+
+
+def upgrade(conn):
+    # Таблица вместе с уникальным ключом и индексом; на свежих базах её уже создал шаг 0001
+    DailyView.__table__.create(bind=conn, checkfirst=True)
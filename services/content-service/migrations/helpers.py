@@ -0,0 +1,33 @@
+"""Idempotent DDL helpers shared by migration steps.
+
+Every step must be safe to run against a database that already has the
+change: older installations were upgraded by hand or by create_all.
+"""
+from sqlalchemy import inspect, text
+
+
+def has_table(conn, table_name: str) -> bool:
+    return inspect(conn).has_table(table_name)
+
+
+def add_column_if_missing(conn, table_name: str, column_name: str, column_type: str):
+    columns = {col["name"] for col in inspect(conn).get_columns(table_name)}
+    if column_name not in columns:
+        print(f"  + {table_name}.{column_name}")
+        conn.execute(text(f"ALTER TABLE {table_name} ADD COLUMN {column_name} {column_type}"))
+
+
+def drop_not_null_if_present(conn, table_name: str, column_name: str):
+    columns = {col["name"]: col for col in inspect(conn).get_columns(table_name)}
+    col = columns.get(column_name)
+    if col and not col.get("nullable", True):
+        if conn.dialect.name == "sqlite":
+            # SQLite не умеет ALTER COLUMN; такие базы бывают только в тестах
+            return
+        print(f"  ~ {table_name}.{column_name} DROP NOT NULL")
+        conn.execute(text(f"ALTER TABLE {table_name} ALTER COLUMN {column_name} DROP NOT NULL"))
+
+
+def create_index_if_missing(conn, index_name: str, table_name: str, columns: str, unique: bool = False):
+    kind = "UNIQUE INDEX" if unique else "INDEX"
+    conn.execute(text(f"CREATE {kind} IF NOT EXISTS {index_name} ON {table_name} ({columns})"))
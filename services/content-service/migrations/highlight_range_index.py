@@ -0,0 +1,20 @@
+"""0005: composite index for viewport-range highlight queries."""
+from sqlalchemy import text
+
+HIGHLIGHT_TABLES = {
+    "article_highlights": "article_id",
+    "book_highlights": "book_id",
+    "dissertation_highlights": "dissertation_id",
+}
+
+
+def upgrade(conn):
+    for table, doc_column in HIGHLIGHT_TABLES.items():
+        index = f"ix_{table}_user_doc_start"
+        # На PostgreSQL end_offset кладём в INCLUDE: фильтр пересечения
+        # проверяется по индексу, без обращения к строке
+        include = " INCLUDE (end_offset)" if conn.dialect.name == "postgresql" else ""
+        conn.execute(text(
+            f"CREATE INDEX IF NOT EXISTS {index} ON {table} "
+            f"(user_id, {doc_column}, start_offset){include}"
+        ))
@@ -0,0 +1,13 @@
+"""0006: soft-deleted highlights (sync tombstones) and the per-user change feed index."""
+from sqlalchemy import text
+
+from migrations.helpers import add_column_if_missing, create_index_if_missing
+from migrations.highlight_range_index import HIGHLIGHT_TABLES
+
+
+def upgrade(conn):
+    for table in HIGHLIGHT_TABLES:
+        add_column_if_missing(conn, table, "deleted_at", "TIMESTAMP")
+        # Курсор синхронизации идёт по updated_at; у старых строк он мог остаться пустым
+        conn.execute(text(f"UPDATE {table} SET updated_at = created_at WHERE updated_at IS NULL"))
+        create_index_if_missing(conn, f"ix_{table}_user_updated", table, "user_id, updated_at, id")
@@ -0,0 +1,8 @@
+"""0001: tables that the service used to create with create_all at import time."""
+from database import Base
+import models  # noqa: F401  - регистрирует все таблицы в Base.metadata
+
+
+def upgrade(conn):
+    # checkfirst: на существующих базах таблицы уже есть
+    Base.metadata.create_all(bind=conn, checkfirst=True)
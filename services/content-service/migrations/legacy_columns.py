@@ -0,0 +1,22 @@
+"""0002: columns added to the content tables after their first release,
+formerly applied by migrate_db.ensure_columns."""
+from migrations.helpers import add_column_if_missing, create_index_if_missing, drop_not_null_if_present
+
+
+def upgrade(conn):
+    add_column_if_missing(conn, "articles", "authors_workplace", "VARCHAR(255)")
+    add_column_if_missing(conn, "articles", "thumbnail", "VARCHAR(500)")
+    add_column_if_missing(conn, "books", "authors_workplace", "VARCHAR(255)")
+    add_column_if_missing(conn, "books", "thumbnail", "VARCHAR(500)")
+    add_column_if_missing(conn, "books", "description", "TEXT")
+    add_column_if_missing(conn, "books", "content", "TEXT")
+    add_column_if_missing(conn, "books", "pdf_file_url", "VARCHAR(500)")
+    add_column_if_missing(conn, "books", "epub_file_url", "VARCHAR(500)")
+    drop_not_null_if_present(conn, "books", "content")
+    add_column_if_missing(conn, "dissertations", "authors_workplace", "VARCHAR(255)")
+    add_column_if_missing(conn, "dissertations", "thumbnail", "VARCHAR(500)")
+
+    # Индексы на таблицах связей с категориями (create_all не добавляет их в существующие таблицы)
+    for item in ("article", "book", "dissertation"):
+        create_index_if_missing(conn, f"ix_{item}_categories_{item}_id", f"{item}_categories", f"{item}_id, category_id")
+        create_index_if_missing(conn, f"ix_{item}_categories_category_id", f"{item}_categories", f"category_id, {item}_id")
@@ -0,0 +1,15 @@
+"""0004: rating aggregates maintained by deltas, index for rating_desc sort."""
+from sqlalchemy import text
+
+from migrations.helpers import create_index_if_missing
+
+
+def upgrade(conn):
+    for table in ("articles", "books", "dissertations"):
+        # Дельты прибавляются к текущим значениям, NULL их бы съел
+        conn.execute(text(
+            f"UPDATE {table} SET rating_count = COALESCE(rating_count, 0), "
+            f"average_rating = COALESCE(average_rating, 0), rating = COALESCE(rating, 0) "
+            f"WHERE rating_count IS NULL OR average_rating IS NULL OR rating IS NULL"
+        ))
+        create_index_if_missing(conn, f"ix_{table}_average_rating_id", table, "average_rating, id")
@@ -1,5 +1,5 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Table, Boolean, Float
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, Text, Date, DateTime, ForeignKey, Table, Boolean, Float, Index, UniqueConstraint
+from sqlalchemy.orm import relationship, deferred
 from datetime import datetime
 from database import Base
 
@@ -8,21 +8,28 @@ article_categories = Table(
     'article_categories',
     Base.metadata,
     Column('article_id', Integer, ForeignKey('articles.id')),
-    Column('category_id', Integer, ForeignKey('article_categories_table.id'))
+    Column('category_id', Integer, ForeignKey('article_categories_table.id')),
+    # Покрывающие индексы: агрегация категорий по элементу и фильтр по категории
+    Index('ix_article_categories_article_id', 'article_id', 'category_id'),
+    Index('ix_article_categories_category_id', 'category_id', 'article_id'),
 )
 
 book_categories = Table(
     'book_categories',
     Base.metadata,
     Column('book_id', Integer, ForeignKey('books.id')),
-    Column('category_id', Integer, ForeignKey('book_categories_table.id'))
+    Column('category_id', Integer, ForeignKey('book_categories_table.id')),
+    Index('ix_book_categories_book_id', 'book_id', 'category_id'),
+    Index('ix_book_categories_category_id', 'category_id', 'book_id'),
 )
 
 dissertation_categories = Table(
     'dissertation_categories',
     Base.metadata,
     Column('dissertation_id', Integer, ForeignKey('dissertations.id')),
-    Column('category_id', Integer, ForeignKey('dissertation_categories_table.id'))
+    Column('category_id', Integer, ForeignKey('dissertation_categories_table.id')),
+    Index('ix_dissertation_categories_dissertation_id', 'dissertation_id', 'category_id'),
+    Index('ix_dissertation_categories_category_id', 'category_id', 'dissertation_id'),
 )
 
 # Категории
@@ -54,13 +61,18 @@ class DissertationCategory(Base):
 # Контент
 class Article(Base):
     __tablename__ = "articles"
+    __table_args__ = (
+        # Сортировка rating_desc: ORDER BY average_rating DESC, id DESC
+        Index('ix_articles_average_rating_id', 'average_rating', 'id'),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String(500), nullable=False, index=True)
     author = Column(String(255), nullable=False, index=True)
     authors_workplace = Column(String(255))
     thumbnail = Column(String(500))  # image URL
-    content = Column(Text, nullable=False)  # text content
+    # Тело документа грузится только явно (undefer) на детальной странице
+    content = deferred(Column(Text, nullable=False))  # text content
     publication_date = Column(DateTime, index=True)
     language = Column(String(10), default="tm", index=True)  # tm, ru, en
     type = Column(String(10), default="local", index=True)  # local, foreign
@@ -70,6 +82,13 @@ class Article(Base):
     rating = Column(Float, default=0.0)
     average_rating = Column(Float, default=0.0)
     rating_count = Column(Integer, default=0)
+
+    # Поля карточки из тела документа, считаются при записи (content_meta.py)
+    excerpt = Column(Text)
+    word_count = Column(Integer, default=0)
+    reading_minutes = Column(Integer, default=0)
+    content_hash = Column(String(64))  # sha256 тела; NULL - строку ещё не обработал backfill
+    content_length = Column(Integer)  # длина тела в символах, для фрагментов /content
     
     categories = relationship("ArticleCategory", secondary=article_categories, back_populates="articles")
     
@@ -78,6 +97,9 @@ class Article(Base):
 
 class Book(Base):
     __tablename__ = "books"
+    __table_args__ = (
+        Index('ix_books_average_rating_id', 'average_rating', 'id'),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String(500), nullable=False, index=True)
@@ -85,7 +107,7 @@ class Book(Base):
     authors_workplace = Column(String(255))
     thumbnail = Column(String(500))  # image URL
     description = Column(Text)  # описание книги (необязательное)
-    content = Column(Text)  # текстовый контент (необязательное, для совместимости)
+    content = deferred(Column(Text))  # текстовый контент (необязательное, для совместимости)
     pdf_file_url = Column(String(500))  # URL PDF файла
     epub_file_url = Column(String(500))  # URL EPUB файла
     publication_date = Column(DateTime, index=True)
@@ -97,6 +119,13 @@ class Book(Base):
     rating = Column(Float, default=0.0)
     average_rating = Column(Float, default=0.0)
     rating_count = Column(Integer, default=0)
+
+    # Поля карточки из тела документа, считаются при записи (content_meta.py)
+    excerpt = Column(Text)
+    word_count = Column(Integer, default=0)
+    reading_minutes = Column(Integer, default=0)
+    content_hash = Column(String(64))  # sha256 тела; NULL - строку ещё не обработал backfill
+    content_length = Column(Integer)  # длина тела в символах, для фрагментов /content
     
     categories = relationship("BookCategory", secondary=book_categories, back_populates="books")
     
@@ -105,13 +134,16 @@ class Book(Base):
 
 class Dissertation(Base):
     __tablename__ = "dissertations"
+    __table_args__ = (
+        Index('ix_dissertations_average_rating_id', 'average_rating', 'id'),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String(500), nullable=False, index=True)
     author = Column(String(255), nullable=False, index=True)
     authors_workplace = Column(String(255))
     thumbnail = Column(String(500))  # image URL
-    content = Column(Text, nullable=False)  # text, e-pub, pdf
+    content = deferred(Column(Text, nullable=False))  # text, e-pub, pdf
     publication_date = Column(DateTime, index=True)
     language = Column(String(10), default="tm", index=True)  # tm, ru, en
     type = Column(String(10), default="local", index=True)  # local, foreign
@@ -121,6 +153,13 @@ class Dissertation(Base):
     rating = Column(Float, default=0.0)
     average_rating = Column(Float, default=0.0)
     rating_count = Column(Integer, default=0)
+
+    # Поля карточки из тела документа, считаются при записи (content_meta.py)
+    excerpt = Column(Text)
+    word_count = Column(Integer, default=0)
+    reading_minutes = Column(Integer, default=0)
+    content_hash = Column(String(64))  # sha256 тела; NULL - строку ещё не обработал backfill
+    content_length = Column(Integer)  # длина тела в символах, для фрагментов /content
     
     categories = relationship("DissertationCategory", secondary=dissertation_categories, back_populates="dissertations")
     
@@ -140,6 +179,13 @@ class SavedArticle(Base):
 # Выделенный текст
 class ArticleHighlight(Base):
     __tablename__ = "article_highlights"
+    __table_args__ = (
+        # Выделения в окне текста: равенство по пользователю и документу, диапазон по start_offset
+        Index('ix_article_highlights_user_doc_start', 'user_id', 'article_id', 'start_offset',
+              postgresql_include=['end_offset']),
+        # Дельта-синхронизация: изменения пользователя по (updated_at, id)
+        Index('ix_article_highlights_user_updated', 'user_id', 'updated_at', 'id'),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(String(255), nullable=False, index=True)  # ID пользователя
@@ -152,6 +198,7 @@ class ArticleHighlight(Base):
     note = Column(Text)  # Заметка к выделению
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    deleted_at = Column(DateTime, nullable=True)  # Мягкое удаление: строка остаётся надгробием для синхронизации
 
 # Сохраненные книги (закладки)
 class SavedBook(Base):
@@ -166,6 +213,11 @@ class SavedBook(Base):
 # Выделенный текст книги
 class BookHighlight(Base):
     __tablename__ = "book_highlights"
+    __table_args__ = (
+        Index('ix_book_highlights_user_doc_start', 'user_id', 'book_id', 'start_offset',
+              postgresql_include=['end_offset']),
+        Index('ix_book_highlights_user_updated', 'user_id', 'updated_at', 'id'),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(String(255), nullable=False, index=True)
@@ -178,6 +230,7 @@ class BookHighlight(Base):
     note = Column(Text)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    deleted_at = Column(DateTime, nullable=True)
 
 # Сохраненные диссертации (закладки)
 class SavedDissertation(Base):
@@ -192,6 +245,11 @@ class SavedDissertation(Base):
 # Выделенный текст диссертаций
 class DissertationHighlight(Base):
     __tablename__ = "dissertation_highlights"
+    __table_args__ = (
+        Index('ix_dissertation_highlights_user_doc_start', 'user_id', 'dissertation_id', 'start_offset',
+              postgresql_include=['end_offset']),
+        Index('ix_dissertation_highlights_user_updated', 'user_id', 'updated_at', 'id'),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(String(255), nullable=False, index=True)
@@ -204,6 +262,7 @@ class DissertationHighlight(Base):
     note = Column(Text)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    deleted_at = Column(DateTime, nullable=True)
 
 # Прогресс чтения книги (закладки страниц)
 class BookReadingProgress(Base):
@@ -219,3 +278,18 @@ class BookReadingProgress(Base):
     last_position = Column(Text)  # JSON с позицией в документе (для EPUB/PDF)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+# Уникальные просмотры за день: свёртка HyperLogLog из Redis (unique_views.py)
+class DailyView(Base):
+    __tablename__ = "daily_views"
+    __table_args__ = (
+        UniqueConstraint('content_type', 'item_id', 'day', name='uq_daily_views_item_day'),
+        # Рейтинг за день/период: равенство по типу, диапазон по дню
+        Index('ix_daily_views_type_day_views', 'content_type', 'day', 'views'),
+    )
+
+    id = Column(Integer, primary_key=True)
+    content_type = Column(String(20), nullable=False)  # articles, books, dissertations
+    item_id = Column(Integer, nullable=False)
+    day = Column(Date, nullable=False)  # день по UTC
+    views = Column(Integer, default=0, nullable=False)  # уникальные зрители за день
@@ -0,0 +1,161 @@
+"""Popular and trending content from Redis sorted sets.
+
+sort=views_desc is ORDER BY views DESC over the filtered set with OFFSET
+paging. The leaderboards here answer the same question with O(log N + M)
+range reads:
+
+- popular:{type}[:{language}] - members are item ids, scores are total
+  views. Every change of the views column updates the score (ZADD with the
+  value RETURNING gave), and the set is rebuilt from the database when its marker key is missing
+  (first use, Redis flush).
+- trending:{type}[:{language}]:{window} - views per time bucket (hourly for
+  24h, daily for 7d), merged with ZUNIONSTORE using exponentially decaying
+  weights and kept for TRENDING_REFRESH_SECONDS.
+
+Items are hydrated in one batch through the item cache (item_cache.get_items).
+"""
+import logging
+import os
+import time
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+import cache
+from content_types import CONTENT_TYPES, ContentType
+from metrics import record_cache
+from queries import add_view_listener
+
+logger = logging.getLogger(__name__)
+
+# Сколько самых просматриваемых записей загружать при перестройке
+POPULAR_REBUILD_SIZE = int(os.getenv("POPULAR_REBUILD_SIZE", "10000"))
+TRENDING_REFRESH_SECONDS = int(os.getenv("TRENDING_REFRESH_SECONDS", "60"))
+LANGUAGES = ("tm", "ru", "en")
+
+# окно -> (размер корзины в секундах, число корзин, период полураспада веса)
+TRENDING_WINDOWS: Dict[str, Tuple[int, int, float]] = {
+    "24h": (3600, 24, 12 * 3600),
+    "7d": (86400, 7, 3.5 * 86400),
+}
+
+
+def popular_key(name: str, language: Optional[str] = None) -> str:
+    return f"popular:{name}:{language}" if language else f"popular:{name}"
+
+
+def _ready_key(name: str) -> str:
+    return f"popular:{name}:ready"
+
+
+def trending_key(name: str, window: str, language: Optional[str] = None) -> str:
+    scope = f"{name}:{language}" if language else name
+    return f"trending:{scope}:{window}"
+
+
+def _bucket_key(name: str, window: str, language: Optional[str], bucket: int) -> str:
+    return f"{trending_key(name, window, language)}:b:{bucket}"
+
+
+def record_view(name: str, item_id: int, views: int, language: Optional[str], delta: int = 1) -> None:
+    """View listener: set the popular score, add *delta* to the current trending buckets."""
+    client = cache._get_client()
+    if client is None or name not in CONTENT_TYPES:
+        return
+    started = time.perf_counter()
+    now = time.time()
+    try:
+        pipe = client.pipeline(transaction=False)
+        for lang in (None, language) if language else (None,):
+            pipe.zadd(popular_key(name, lang), {item_id: views})
+            for window, (size, count, _) in TRENDING_WINDOWS.items():
+                key = _bucket_key(name, window, lang, int(now // size))
+                pipe.zincrby(key, delta, item_id)
+                pipe.expire(key, size * (count + 1))
+        pipe.execute()
+        record_cache(popular_key(name), "zadd", "ok", time.perf_counter() - started)
+    except Exception as exc:
+        logger.debug("Popularity update error for %s:%s: %s", name, item_id, exc)
+        record_cache(popular_key(name), "zadd", "error", time.perf_counter() - started)
+
+
+add_view_listener(record_view)
+
+
+def rebuild_popular(client, db: Session, ctype: ContentType) -> int:
+    """Load the top POPULAR_REBUILD_SIZE items by views into the popular sets."""
+    model = ctype.model
+    rows = db.execute(
+        select(model.id, model.views, model.language)
+        .order_by(model.views.desc())
+        .limit(POPULAR_REBUILD_SIZE)
+    ).all()
+    scores: Dict[Optional[str], Dict[int, int]] = {None: {}}
+    for item_id, views, language in rows:
+        scores[None][item_id] = views or 0
+        if language:
+            scores.setdefault(language, {})[item_id] = views or 0
+
+    pipe = client.pipeline(transaction=False)
+    for language, mapping in scores.items():
+        if mapping:
+            pipe.zadd(popular_key(ctype.name, language), mapping)
+    pipe.set(_ready_key(ctype.name), int(time.time()))
+    pipe.execute()
+    return len(rows)
+
+
+def _window_weights(name: str, window: str, language: Optional[str], now: float) -> Dict[str, float]:
+    size, count, half_life = TRENDING_WINDOWS[window]
+    current = int(now // size)
+    return {
+        _bucket_key(name, window, language, current - age): 0.5 ** (age * size / half_life)
+        for age in range(count)
+    }
+
+
+def top_ids(db: Session, ctype: ContentType, offset: int, limit: int,
+            language: Optional[str] = None, window: Optional[str] = None) -> Optional[Tuple[List[Tuple[int, float]], int]]:
+    """([(id, score)], total) from Redis, or None when Redis is unavailable.
+
+    window=None reads the all-time popular set, otherwise the trending set.
+    """
+    client = cache._get_client()
+    if client is None:
+        return None
+    started = time.perf_counter()
+    try:
+        if window is None:
+            key = popular_key(ctype.name, language)
+            if not client.exists(_ready_key(ctype.name)):
+                rebuild_popular(client, db, ctype)
+        else:
+            key = trending_key(ctype.name, window, language)
+            if not client.exists(key):
+                pipe = client.pipeline(transaction=False)
+                pipe.zunionstore(key, _window_weights(ctype.name, window, language, time.time()))
+                pipe.expire(key, TRENDING_REFRESH_SECONDS)
+                pipe.execute()
+        entries = client.zrevrange(key, offset, offset + limit - 1, withscores=True)
+        total = client.zcard(key)
+    except Exception as exc:
+        logger.debug("Leaderboard read error for %s: %s", ctype.name, exc)
+        record_cache(popular_key(ctype.name), "zrange", "error", time.perf_counter() - started)
+        return None
+    record_cache(popular_key(ctype.name), "zrange", "hit" if entries else "miss", time.perf_counter() - started)
+    return [(int(member), score) for member, score in entries], total
+
+
+def forget(ctype: ContentType, item_ids: List[int]) -> None:
+    """Drop ids of deleted items from the popular sets (trending buckets expire on their own)."""
+    client = cache._get_client()
+    if client is None or not item_ids:
+        return
+    try:
+        pipe = client.pipeline(transaction=False)
+        for language in (None,) + LANGUAGES:
+            pipe.zrem(popular_key(ctype.name, language), *item_ids)
+        pipe.execute()
+    except Exception as exc:
+        logger.debug("Leaderboard cleanup error for %s: %s", ctype.name, exc)
@@ -0,0 +1,324 @@
+"""Shared read path for the content list endpoints.
+
+List handlers used to load full ORM instances (identity map, instance state,
+relationship collections) only to copy a fixed set of attributes into dicts.
+Here we select plain column rows with Core, aggregate categories in SQL and
+build the response dicts straight from the row mappings.
+"""
+import json
+import math
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import Integer, any_, bindparam, case, exists, func, select, update
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.orm import Session
+
+from content_types import ContentType
+
+# Колонки, которые отдают списки, в порядке ключей ответа
+LIST_COLUMNS = {
+    "articles": [
+        "id", "title", "author", "authors_workplace", "thumbnail", "content",
+        "excerpt", "word_count", "reading_minutes",
+        "publication_date", "language", "type", "views", "rating",
+        "average_rating", "rating_count",
+    ],
+    "books": [
+        "id", "title", "author", "authors_workplace", "thumbnail", "description",
+        "content", "excerpt", "word_count", "reading_minutes",
+        "pdf_file_url", "epub_file_url", "publication_date", "language",
+        "type", "views", "rating", "average_rating", "rating_count",
+    ],
+    "dissertations": [
+        "id", "title", "author", "authors_workplace", "thumbnail", "content",
+        "excerpt", "word_count", "reading_minutes",
+        "publication_date", "language", "type", "views", "rating",
+        "average_rating", "rating_count",
+    ],
+}
+TRAILING_COLUMNS = ["created_at", "updated_at"]
+
+# Списки тело не читают: content в карточке - сохранённый при записи excerpt
+# (content_meta.py); начало тела берётся только у строк, которые ещё не прошёл
+# backfill. Целиком content читает лишь детальная страница
+LIST_CONTENT_PREVIEW = 500
+
+
+def _categories_subquery(db: Session, ctype: ContentType):
+    """Correlated subquery returning the item's categories as one JSON value."""
+    category = ctype.category_model
+    link = ctype.link_table
+    fields = ["id", "name"] + (["parent_id"] if ctype.category_has_parent else [])
+
+    if db.get_bind().dialect.name == "postgresql":
+        obj = func.json_build_object(*[arg for f in fields for arg in (f, category.__table__.c[f])])
+        agg = func.json_agg(obj)
+    else:
+        obj = func.json_object(*[arg for f in fields for arg in (f, category.__table__.c[f])])
+        agg = func.json_group_array(obj)
+
+    return (
+        select(agg)
+        .select_from(link.join(category.__table__, link.c.category_id == category.id))
+        .where(link.c[ctype.link_column] == ctype.model.id)
+        .scalar_subquery()
+        .label("categories")
+    )
+
+
+def _decode_categories(value) -> list:
+    # json_agg по пустому множеству даёт NULL, json_group_array - "[]"
+    if value is None:
+        return []
+    if isinstance(value, str):
+        return json.loads(value)
+    return value
+
+
+def list_filters(
+    ctype: ContentType,
+    author: Optional[str] = None,
+    language: Optional[str] = None,
+    type: Optional[str] = None,
+    category_id: Optional[int] = None,
+    search: Optional[str] = None,
+) -> list:
+    """WHERE clauses shared by all list endpoints."""
+    model = ctype.model
+    link = ctype.link_table
+    conditions = []
+    if author:
+        conditions.append(model.author.ilike(f"%{author}%"))
+    if language:
+        conditions.append(model.language == language)
+    if type:
+        conditions.append(model.type == type)
+    if category_id:
+        conditions.append(model.id.in_(
+            select(link.c[ctype.link_column]).where(link.c.category_id == category_id)
+        ))
+    if search:
+        conditions.append(
+            (model.title.ilike(f"%{search}%")) |
+            (model.author.ilike(f"%{search}%"))
+        )
+    return conditions
+
+
+def list_order_by(ctype: ContentType, sort: Optional[str]) -> list:
+    if sort == "views_desc":
+        return [ctype.model.views.desc()]
+    if sort == "rating_desc":
+        # Совпадает с индексом ix_<table>_average_rating_id (обратный проход)
+        return [ctype.model.average_rating.desc(), ctype.model.id.desc()]
+    if sort == "newest":
+        # id растёт вместе с created_at, а обратный проход по первичному ключу индекса не требует
+        return [ctype.model.id.desc()]
+    return []
+
+
+def serialize_rows(ctype: ContentType, rows) -> List[dict]:
+    """Turn row mappings from fetch_rows into response dicts."""
+    columns = LIST_COLUMNS[ctype.name]
+    items = []
+    for row in rows:
+        item = {name: row[name] for name in columns}
+        item["categories"] = _decode_categories(row["categories"])
+        item["created_at"] = row["created_at"]
+        item["updated_at"] = row["updated_at"]
+        items.append(item)
+    return items
+
+
+def fetch_rows(db: Session, ctype: ContentType, conditions: list, order_by: list,
+               offset: int = 0, limit: Optional[int] = None,
+               content_preview: Optional[int] = LIST_CONTENT_PREVIEW):
+    """Select list columns plus aggregated categories as plain mappings.
+
+    content_preview=None selects the full body.
+    """
+    table = ctype.model.__table__
+    columns = [
+        # COALESCE ленив: при заполненном excerpt тело не читается
+        func.coalesce(table.c.excerpt, func.substr(table.c.content, 1, content_preview)).label("content")
+        if name == "content" and content_preview is not None else table.c[name]
+        for name in LIST_COLUMNS[ctype.name] + TRAILING_COLUMNS
+    ]
+    stmt = (
+        select(*columns, _categories_subquery(db, ctype))
+        .where(*conditions)
+        .order_by(*order_by)
+        .offset(offset)
+    )
+    if limit is not None:
+        stmt = stmt.limit(limit)
+    return db.execute(stmt).mappings().all()
+
+
+def list_page(
+    db: Session,
+    ctype: ContentType,
+    page: int,
+    per_page: int,
+    sort: Optional[str] = None,
+    **filters,
+) -> dict:
+    """One page of a list endpoint: {items, total, page, per_page, pages}."""
+    conditions = list_filters(ctype, **filters)
+    total = db.execute(
+        select(func.count()).select_from(ctype.model).where(*conditions)
+    ).scalar_one()
+    rows = fetch_rows(
+        db, ctype, conditions, list_order_by(ctype, sort),
+        offset=(page - 1) * per_page, limit=per_page,
+    )
+    return {
+        "items": serialize_rows(ctype, rows),
+        "total": total,
+        "page": page,
+        "per_page": per_page,
+        "pages": math.ceil(total / per_page),
+    }
+
+
+def id_in(db: Session, model, ids: List[int]):
+    """model.id IN ids; on PostgreSQL as = ANY(:ids) with one array parameter."""
+    if db.get_bind().dialect.name == "postgresql":
+        # Один и тот же текст запроса при любом числе id - план кэшируется
+        return model.id == any_(bindparam("item_ids", ids, type_=ARRAY(Integer)))
+    return model.id.in_(ids)
+
+
+def fetch_items_by_id(db: Session, ctype: ContentType, ids: Iterable[int]) -> Dict[int, dict]:
+    """List-shaped items (cards) for the given ids, keyed by id (missing ids are skipped)."""
+    ids = list(ids)
+    if not ids:
+        return {}
+    rows = fetch_rows(db, ctype, [id_in(db, ctype.model, ids)], [])
+    return {item["id"]: item for item in serialize_rows(ctype, rows)}
+
+
+def item_exists(db: Session, model, item_id: int) -> bool:
+    """EXISTS check that never loads the row itself."""
+    return db.query(exists().where(model.id == item_id)).scalar()
+
+
+# Подписчики на просмотры: (table, item_id, views, language, delta) после коммита;
+# через них обновляются рейтинги популярности в Redis
+_view_listeners: List[Callable[[str, int, int, Optional[str], int], None]] = []
+
+
+def add_view_listener(listener: Callable[[str, int, int, Optional[str], int], None]) -> None:
+    _view_listeners.append(listener)
+
+
+def notify_view_listeners(table: str, item_id: int, views: int, language: Optional[str], delta: int) -> None:
+    for listener in list(_view_listeners):
+        listener(table, item_id, views, language, delta)
+
+
+def increment_view_count(db: Session, model, item_id: int) -> Optional[int]:
+    """Atomically bump the view counter; returns the new value or None if missing."""
+    row = db.execute(
+        update(model)
+        .where(model.id == item_id)
+        .values(views=model.views + 1)
+        .returning(model.views, model.language)
+        .execution_options(synchronize_session=False, sticky_primary=False)
+    ).one_or_none()
+    db.commit()
+    if row is None:
+        return None
+    notify_view_listeners(model.__tablename__, item_id, row.views, row.language, 1)
+    return row.views
+
+
+def apply_view_deltas(db: Session, model, deltas: Dict[int, int]) -> List[Tuple[int, int, Optional[str]]]:
+    """Add view deltas with one executemany UPDATE; returns (id, views, language) of existing rows.
+
+    Does not commit; the caller notifies view listeners after its commit.
+    """
+    if not deltas:
+        return []
+    table = model.__table__
+    db.execute(
+        update(table)
+        .where(table.c.id == bindparam("item_id"))
+        .values(views=func.coalesce(table.c.views, 0) + bindparam("delta"))
+        .execution_options(synchronize_session=False),
+        [{"item_id": item_id, "delta": delta} for item_id, delta in deltas.items()],
+    )
+    rows = db.execute(
+        select(table.c.id, table.c.views, table.c.language).where(id_in(db, model, list(deltas)))
+    ).all()
+    return [(row.id, row.views, row.language) for row in rows]
+
+
+# Размер фрагмента текста по умолчанию и максимум (в символах)
+CONTENT_CHUNK_DEFAULT = 20000
+CONTENT_CHUNK_MAX = 200000
+
+
+def content_chunk(db: Session, model, item_id: int, offset: int, length: int) -> Optional[dict]:
+    """Slice of the document body cut in SQL, plus its total length.
+
+    The length comes from content_length stored at write time: length(content)
+    would read the whole body on every chunk. Rows not yet backfilled fall back to it.
+    """
+    row = db.execute(
+        select(
+            func.substr(model.content, offset + 1, length),
+            func.coalesce(model.content_length, func.length(model.content)),
+        ).where(model.id == item_id)
+    ).first()
+    if row is None:
+        return None
+    chunk = row[0] or ""
+    total = row[1] or 0
+    return {
+        "id": item_id,
+        "offset": offset,
+        "length": len(chunk),
+        "total_length": total,
+        "has_more": offset + len(chunk) < total,
+        "content": chunk,
+    }
+
+
+def apply_rating_deltas(db: Session, ctype: ContentType, deltas: Dict[int, Tuple[int, float]]) -> List[int]:
+    """Fold (count_delta, sum_delta) per item into the stored aggregates.
+
+    One executemany UPDATE for the whole batch; each row is recomputed from
+    its own current values, so concurrent batches never lose updates.
+    Returns the ids that exist (and were updated). Does not commit.
+    """
+    if not deltas:
+        return []
+    table = ctype.model.__table__
+    existing = db.execute(
+        select(table.c.id).where(table.c.id.in_(list(deltas)))
+    ).scalars().all()
+    if not existing:
+        return []
+
+    count = func.coalesce(table.c.rating_count, 0)
+    average = func.coalesce(table.c.average_rating, 0.0)
+    new_count = count + bindparam("d_count")
+    new_average = case(
+        (new_count > 0, (average * count + bindparam("d_sum")) / new_count),
+        else_=0.0,
+    )
+    stmt = (
+        update(table)
+        .where(table.c.id == bindparam("item_id"))
+        .values(
+            rating_count=case((new_count > 0, new_count), else_=0),
+            average_rating=new_average,
+            rating=new_average,
+        )
+    )
+    db.execute(stmt, [
+        {"item_id": item_id, "d_count": deltas[item_id][0], "d_sum": float(deltas[item_id][1])}
+        for item_id in existing
+    ])
+    return sorted(existing)
@@ -0,0 +1,58 @@
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from sqlalchemy.orm import Session
+from typing import Optional
+from slow_queries import recent_slow_queries, clear_slow_queries
+from cache_warmup import warmer
+from content_types import CONTENT_TYPES
+from database import get_db
+from routers.saved import HIGHLIGHT_TOMBSTONE_DAYS, purge_highlight_tombstones
+import hmac
+import os
+import slow_queries
+
+router = APIRouter()
+
+# Служебные эндпоинты: монтируются без /api/v1, gateway их не проксирует.
+# Порт сервиса при этом опубликован, поэтому они требуют X-Admin-Token;
+# без ADMIN_TOKEN в окружении они выключены
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
+
+
+def require_admin(token: Optional[str] = Header(None, alias="X-Admin-Token")):
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Admin endpoints are disabled")
+    if not token or not hmac.compare_digest(token.encode(), ADMIN_TOKEN.encode()):
+        raise HTTPException(status_code=401, detail="Admin token required")
+
+
+@router.get("/slow-queries", dependencies=[Depends(require_admin)])
+async def list_slow_queries(limit: Optional[int] = Query(None, ge=1, le=1000)):
+    """Последние медленные запросы (новые первыми) с планами EXPLAIN"""
+    return {
+        "enabled": slow_queries.SLOW_QUERY_MS > 0,
+        "threshold_ms": slow_queries.SLOW_QUERY_MS,
+        "items": recent_slow_queries(limit),
+    }
+
+@router.delete("/slow-queries", status_code=204, dependencies=[Depends(require_admin)])
+async def reset_slow_queries():
+    """Очистить журнал медленных запросов"""
+    clear_slow_queries()
+
+@router.post("/cache-warmup", status_code=202, dependencies=[Depends(require_admin)])
+async def schedule_cache_warmup(content_type: Optional[str] = None):
+    """Запланировать прогрев кэша (всех типов или одного) в фоне"""
+    names = [content_type] if content_type else list(CONTENT_TYPES)
+    if content_type and content_type not in CONTENT_TYPES:
+        raise HTTPException(status_code=404, detail="Unknown content type")
+    for name in names:
+        warmer.schedule(name, delay=0)
+    return {"scheduled": warmer.pending()}
+
+@router.delete("/highlight-tombstones", dependencies=[Depends(require_admin)])
+async def purge_tombstones(
+    older_than_days: int = Query(HIGHLIGHT_TOMBSTONE_DAYS, ge=1),
+    db: Session = Depends(get_db)
+):
+    """Удалить надгробия выделений старше срока (запускается по cron)"""
+    return {"deleted": purge_highlight_tombstones(db, older_than_days)}
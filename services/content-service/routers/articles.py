@@ -1,16 +1,23 @@
-from fastapi import APIRouter, Depends, HTTPException, Query, Header
-from sqlalchemy.orm import Session, selectinload
+from fastapi import APIRouter, Depends, HTTPException, Query, Header, Request, Response
+from sqlalchemy.orm import Session, selectinload, undefer
 from typing import List, Optional
-from database import get_db
+from database import get_db, get_read_db
 from models import Article, ArticleCategory
 from schemas import ArticleCreate, ArticleUpdate, ArticleResponse
-from cache import get_cache, set_cache, invalidate_cache
-import math
+from cache import get_cache, set_cache
+from item_cache import get_items, parse_ids
+from content_types import CONTENT_TYPES
+from queries import list_page, content_chunk, CONTENT_CHUNK_DEFAULT, CONTENT_CHUNK_MAX
+from unique_views import count_view
+from content_meta import content_fields
+from encoding import NegotiatedResponse
 
-router = APIRouter()
+# JSON или MessagePack по заголовку Accept, см. encoding.py
+router = APIRouter(default_response_class=NegotiatedResponse)
+CACHE = CONTENT_TYPES["articles"].cache
 
 @router.get("/articles", response_model=dict)
-async def list_articles(
+def list_articles(
     page: int = Query(1, ge=1),
     per_page: int = Query(20, ge=1, le=100),
     author: Optional[str] = None,
@@ -19,92 +26,57 @@ async def list_articles(
     category_id: Optional[int] = None,
     search: Optional[str] = None,
     sort: Optional[str] = None,
-    db: Session = Depends(get_db)
+    ids: Optional[str] = Query(None, description="1,2,3 - карточки по id в этом порядке"),
+    db: Session = Depends(get_read_db)
 ):
-    """Список статей с пагинацией и фильтрами"""
-    cache_key = (
-        f"articles:list:{page}:{per_page}:{author}:{language}:{type}:"
-        f"{category_id}:{search}:{sort}"
+    """Список статей с пагинацией и фильтрами; с ids - выборка по id"""
+    if ids is not None:
+        return get_items(db, CONTENT_TYPES["articles"], parse_ids(ids))
+
+    cache_key = CACHE.list_page_key(
+        page, per_page, sort,
+        author=author, language=language, type=type, category_id=category_id, search=search,
     )
     cached = get_cache(cache_key)
     if cached is not None:
         return cached
 
-    query = db.query(Article)
-    
-    # Фильтры
-    if author:
-        query = query.filter(Article.author.ilike(f"%{author}%"))
-    if language:
-        query = query.filter(Article.language == language)
-    if type:
-        query = query.filter(Article.type == type)
-    if category_id:
-        query = query.join(Article.categories).filter(ArticleCategory.id == category_id)
-    if search:
-        query = query.filter(
-            (Article.title.ilike(f"%{search}%")) | 
-            (Article.author.ilike(f"%{search}%"))
-        )
-    if sort == "views_desc":
-        query = query.order_by(Article.views.desc())
-    
-    # Пагинация
-    total = query.count()
-    articles = query.options(selectinload(Article.categories)).offset((page - 1) * per_page).limit(per_page).all()
-    
-    # Конвертируем в dict для правильной сериализации
-    items = []
-    for article in articles:
-        items.append({
-            "id": article.id,
-            "title": article.title,
-            "author": article.author,
-            "authors_workplace": article.authors_workplace,
-            "thumbnail": article.thumbnail,
-            "content": article.content,
-            "publication_date": article.publication_date,
-            "language": article.language,
-            "type": article.type,
-            "views": article.views,
-            "rating": article.rating,
-            "average_rating": article.average_rating,
-            "rating_count": article.rating_count,
-            "categories": [{"id": c.id, "name": c.name} for c in article.categories],
-            "created_at": article.created_at,
-            "updated_at": article.updated_at
-        })
-    
-    result = {
-        "items": items,
-        "total": total,
-        "page": page,
-        "per_page": per_page,
-        "pages": math.ceil(total / per_page)
-    }
-    set_cache(cache_key, result, ttl=300)
+    result = list_page(
+        db, CONTENT_TYPES["articles"], page, per_page, sort=sort,
+        author=author, language=language, type=type,
+        category_id=category_id, search=search,
+    )
+    set_cache(cache_key, result, ttl=CACHE.list_ttl)
     return result
 
 @router.get("/articles/{article_id}", response_model=ArticleResponse)
-async def get_article(article_id: int, db: Session = Depends(get_db)):
+def get_article(
+    article_id: int,
+    request: Request,
+    db: Session = Depends(get_db),
+    read_db: Session = Depends(get_read_db)
+):
     """Получение статьи по ID"""
-    cache_key = f"articles:item:{article_id}"
+    cache_key = CACHE.item_key(article_id)
     cached = get_cache(cache_key)
     if cached is not None:
-        # Still increment view count but return the cached dict directly
-        article = db.query(Article).filter(Article.id == article_id).first()
-        if article:
-            article.views += 1
-            db.commit()
+        # Просмотр засчитывается и для ответа из кэша
+        count_view(db, CONTENT_TYPES["articles"], article_id, request)
         return cached
 
-    article = db.query(Article).options(selectinload(Article.categories)).filter(Article.id == article_id).first()
-    if not article:
+    # Читаем с реплики; только что созданная запись может ещё не доехать
+    # до неё - тогда с основной базы
+    article = None
+    for session in (read_db, db):
+        article = session.query(Article).options(
+            selectinload(Article.categories), undefer(Article.content)
+        ).filter(Article.id == article_id).first()
+        if article is not None:
+            break
+    if article is None:
         raise HTTPException(status_code=404, detail="Article not found")
-
-    article.views += 1
-    db.commit()
-    db.refresh(article)
+    # Счётчик мог измениться на основной базе: в ответ и кэш - новое значение
+    views = count_view(db, CONTENT_TYPES["articles"], article_id, request)
 
     # Serialize to a plain dict so json.dumps can handle it correctly
     article_dict = {
@@ -114,10 +86,13 @@ async def get_article(article_id: int, db: Session = Depends(get_db)):
         "authors_workplace": article.authors_workplace,
         "thumbnail": article.thumbnail,
         "content": article.content,
+        "excerpt": article.excerpt,
+        "word_count": article.word_count,
+        "reading_minutes": article.reading_minutes,
         "publication_date": article.publication_date,
         "language": article.language,
         "type": article.type,
-        "views": article.views,
+        "views": article.views if views is None else views,
         "rating": article.rating,
         "average_rating": article.average_rating,
         "rating_count": article.rating_count,
@@ -125,11 +100,35 @@ async def get_article(article_id: int, db: Session = Depends(get_db)):
         "created_at": article.created_at,
         "updated_at": article.updated_at,
     }
-    set_cache(cache_key, article_dict, ttl=600)
-    return article
+    set_cache(cache_key, article_dict, ttl=CACHE.item_ttl)
+    return article_dict
+
+@router.get("/articles/{article_id}/content")
+def get_article_content(
+    article_id: int,
+    response: Response,
+    offset: int = Query(0, ge=0),
+    length: int = Query(CONTENT_CHUNK_DEFAULT, ge=1, le=CONTENT_CHUNK_MAX),
+    db: Session = Depends(get_db),
+    read_db: Session = Depends(get_read_db)
+):
+    """Фрагмент текста статьи, offset/length в символах"""
+    cache_key = CACHE.content_key(article_id, offset, length)
+    chunk = get_cache(cache_key)
+    if chunk is None:
+        # Как и у GET по id: новой записи на реплике может ещё не быть
+        for session in (read_db, db):
+            chunk = content_chunk(session, Article, article_id, offset, length)
+            if chunk is not None:
+                break
+        if chunk is None:
+            raise HTTPException(status_code=404, detail="Article not found")
+        set_cache(cache_key, chunk, ttl=CACHE.content_ttl)
+    response.headers["X-Total-Length"] = str(chunk["total_length"])
+    return chunk
 
 @router.post("/articles", response_model=ArticleResponse, status_code=201)
-async def create_article(
+def create_article(
     article: ArticleCreate,
     user_id: Optional[str] = Header(None, alias="X-User-ID"),
     db: Session = Depends(get_db)
@@ -139,7 +138,7 @@ async def create_article(
     """Создание новой статьи"""
     try:
         # Создаем статью
-        db_article = Article(**article.model_dump(exclude={"category_ids"}))
+        db_article = Article(**article.model_dump(exclude={"category_ids"}), **content_fields(article.content))
         
         # Добавляем категории
         if article.category_ids:
@@ -149,7 +148,7 @@ async def create_article(
         db.add(db_article)
         db.commit()
         db.refresh(db_article)
-        invalidate_cache("articles:list:*")
+        CACHE.invalidate_lists()
         return db_article
     except Exception as e:
         db.rollback()
@@ -157,7 +156,7 @@ async def create_article(
         raise HTTPException(status_code=400, detail=f"Failed to create article: {str(e)}")
 
 @router.put("/articles/{article_id}", response_model=ArticleResponse)
-async def update_article(
+def update_article(
     article_id: int,
     article: ArticleUpdate,
     user_id: Optional[str] = Header(None, alias="X-User-ID"),
@@ -172,6 +171,9 @@ async def update_article(
     
     # Обновляем поля
     update_data = article.model_dump(exclude_unset=True, exclude={"category_ids"})
+    if "content" in update_data:
+        # Превью, число слов и время чтения пересчитываются вместе с текстом
+        update_data.update(content_fields(update_data["content"]))
     for key, value in update_data.items():
         setattr(db_article, key, value)
     
@@ -182,12 +184,11 @@ async def update_article(
     
     db.commit()
     db.refresh(db_article)
-    invalidate_cache("articles:list:*")
-    invalidate_cache(f"articles:item:{article_id}")
+    CACHE.invalidate_item(article_id)
     return db_article
 
 @router.delete("/articles/{article_id}", status_code=204)
-async def delete_article(
+def delete_article(
     article_id: int,
     user_id: Optional[str] = Header(None, alias="X-User-ID"),
     db: Session = Depends(get_db)
@@ -201,17 +202,14 @@ async def delete_article(
     
     db.delete(db_article)
     db.commit()
-    invalidate_cache("articles:list:*")
-    invalidate_cache(f"articles:item:{article_id}")
+    CACHE.invalidate_item(article_id)
 
 @router.get("/{article_id}/increment-views")
-async def increment_views(article_id: int, db: Session = Depends(get_db)):
-    """Увеличить счетчик просмотров"""
-    article = db.query(Article).filter(Article.id == article_id).first()
-    if not article:
+def increment_views(article_id: int, request: Request, db: Session = Depends(get_db)):
+    """Засчитать просмотр - как и GET статьи, через уникальные просмотры"""
+    current = db.query(Article.views).filter(Article.id == article_id).first()
+    if current is None:
         raise HTTPException(status_code=404, detail="Article not found")
-    
-    article.views += 1
-    db.commit()
-    
-    return {"views": article.views}
+    views = count_view(db, CONTENT_TYPES["articles"], article_id, request)
+    # В HyperLogLog столбец вырастет при свёртке - отдаём текущее значение
+    return {"views": current.views if views is None else views}
@@ -1,19 +1,28 @@
-from fastapi import APIRouter, Depends, HTTPException, Query, Header
+from fastapi import APIRouter, Depends, HTTPException, Query, Header, Request, Response
 from fastapi.responses import StreamingResponse
-from sqlalchemy.orm import Session, selectinload
+from sqlalchemy.orm import Session, selectinload, undefer
 from typing import List, Optional
-from database import get_db
+from database import get_db, get_read_db
 from models import Book, BookCategory, BookReadingProgress
 from schemas import BookCreate, BookUpdate, BookResponse, BookReadingProgressCreate, BookReadingProgressUpdate, BookReadingProgressResponse
-from cache import get_cache, set_cache, invalidate_cache
-import math
+from cache import get_cache, set_cache
+from item_cache import get_items, parse_ids
+from content_types import CONTENT_TYPES
+from queries import list_page, item_exists, content_chunk, CONTENT_CHUNK_DEFAULT, CONTENT_CHUNK_MAX
+from unique_views import count_view
+from content_meta import content_fields
+from encoding import NegotiatedResponse
+from metrics import PDF_PROXY_BYTES, PDF_PROXY_DURATION
 import httpx
 import io
 import os
 import re
+import time
 from urllib.parse import quote, urlparse
 
-router = APIRouter()
+# JSON или MessagePack по заголовку Accept, см. encoding.py
+router = APIRouter(default_response_class=NegotiatedResponse)
+CACHE = CONTENT_TYPES["books"].cache
 
 MEDIA_SERVICE_URL = os.getenv("MEDIA_SERVICE_URL", "").rstrip("/")
 MINIO_PUBLIC_URL = os.getenv("MINIO_PUBLIC_URL", "").rstrip("/")
@@ -30,8 +39,16 @@ def _primary_pdf_url(url: str) -> str:
     return url
 
 async def _fetch_pdf(url: str) -> httpx.Response:
-    async with httpx.AsyncClient(timeout=60.0, follow_redirects=True) as client:
-        return await client.get(url)
+    started = time.perf_counter()
+    outcome = "error"
+    try:
+        async with httpx.AsyncClient(timeout=60.0, follow_redirects=True) as client:
+            response = await client.get(url)
+        outcome = f"{response.status_code // 100}xx"
+        PDF_PROXY_BYTES.inc(len(response.content))
+        return response
+    finally:
+        PDF_PROXY_DURATION.labels(outcome).observe(time.perf_counter() - started)
 
 def _media_fallback_url(original_url: str, use_download: bool) -> Optional[str]:
     if not MEDIA_SERVICE_URL:
@@ -44,7 +61,7 @@ def _media_fallback_url(original_url: str, use_download: bool) -> Optional[str]:
     return f"{MEDIA_SERVICE_URL}/api/v1/{endpoint}/{basename}"
 
 @router.get("/books", response_model=dict)
-async def list_books(
+def list_books(
     page: int = Query(1, ge=1),
     per_page: int = Query(20, ge=1, le=100),
     author: Optional[str] = None,
@@ -52,88 +69,57 @@ async def list_books(
     category_id: Optional[int] = None,
     search: Optional[str] = None,
     sort: Optional[str] = None,
-    db: Session = Depends(get_db)
+    ids: Optional[str] = Query(None, description="1,2,3 - карточки по id в этом порядке"),
+    db: Session = Depends(get_read_db)
 ):
-    """Список книг с пагинацией и фильтрами"""
-    cache_key = (
-        f"books:list:{page}:{per_page}:{author}:{language}:{category_id}:{search}:{sort}"
+    """Список книг с пагинацией и фильтрами; с ids - выборка по id"""
+    if ids is not None:
+        return get_items(db, CONTENT_TYPES["books"], parse_ids(ids))
+
+    cache_key = CACHE.list_page_key(
+        page, per_page, sort,
+        author=author, language=language, category_id=category_id, search=search,
     )
     cached = get_cache(cache_key)
     if cached is not None:
         return cached
 
-    query = db.query(Book)
-    
-    if author:
-        query = query.filter(Book.author.ilike(f"%{author}%"))
-    if language:
-        query = query.filter(Book.language == language)
-    if category_id:
-        query = query.join(Book.categories).filter(BookCategory.id == category_id)
-    if search:
-        query = query.filter(
-            (Book.title.ilike(f"%{search}%")) | 
-            (Book.author.ilike(f"%{search}%"))
-        )
-    if sort == "views_desc":
-        query = query.order_by(Book.views.desc())
-    
-    total = query.count()
-    books = query.options(selectinload(Book.categories)).offset((page - 1) * per_page).limit(per_page).all()
-    
-    items = []
-    for book in books:
-        items.append({
-            "id": book.id,
-            "title": book.title,
-            "author": book.author,
-            "authors_workplace": book.authors_workplace,
-            "thumbnail": book.thumbnail,
-            "description": book.description,
-            "content": book.content,
-            "pdf_file_url": book.pdf_file_url,
-            "epub_file_url": book.epub_file_url,
-            "publication_date": book.publication_date,
-            "language": book.language,
-            "type": book.type,
-            "views": book.views,
-            "rating": book.rating,
-            "average_rating": book.average_rating,
-            "rating_count": book.rating_count,
-            "categories": [{"id": c.id, "name": c.name, "parent_id": c.parent_id} for c in book.categories],
-            "created_at": book.created_at,
-            "updated_at": book.updated_at
-        })
-    
-    result = {
-        "items": items,
-        "total": total,
-        "page": page,
-        "per_page": per_page,
-        "pages": math.ceil(total / per_page)
-    }
-    set_cache(cache_key, result, ttl=300)
+    result = list_page(
+        db, CONTENT_TYPES["books"], page, per_page, sort=sort,
+        author=author, language=language,
+        category_id=category_id, search=search,
+    )
+    set_cache(cache_key, result, ttl=CACHE.list_ttl)
     return result
 
 @router.get("/books/{book_id}")
-async def get_book(book_id: int, db: Session = Depends(get_db)):
+def get_book(
+    book_id: int,
+    request: Request,
+    db: Session = Depends(get_db),
+    read_db: Session = Depends(get_read_db)
+):
     """Получение книги по ID"""
-    item_cache_key = f"books:item:{book_id}"
+    item_cache_key = CACHE.item_key(book_id)
     cached = get_cache(item_cache_key)
     if cached is not None:
-        book = db.query(Book).filter(Book.id == book_id).first()
-        if book:
-            book.views += 1
-            db.commit()
+        # Просмотр засчитывается и для ответа из кэша
+        count_view(db, CONTENT_TYPES["books"], book_id, request)
         return cached
 
-    book = db.query(Book).filter(Book.id == book_id).first()
-    if not book:
+    # Читаем с реплики; только что созданная запись может ещё не доехать
+    # до неё - тогда с основной базы
+    book = None
+    for session in (read_db, db):
+        book = session.query(Book).options(
+            selectinload(Book.categories), undefer(Book.content)
+        ).filter(Book.id == book_id).first()
+        if book is not None:
+            break
+    if book is None:
         raise HTTPException(status_code=404, detail="Book not found")
-    
-    book.views += 1
-    db.commit()
-    db.refresh(book)
+    # Счётчик мог измениться на основной базе: в ответ и кэш - новое значение
+    views = count_view(db, CONTENT_TYPES["books"], book_id, request)
 
     book_data = {
         "id": book.id,
@@ -143,12 +129,15 @@ async def get_book(book_id: int, db: Session = Depends(get_db)):
         "thumbnail": book.thumbnail,
         "description": book.description,
         "content": book.content,
+        "excerpt": book.excerpt,
+        "word_count": book.word_count,
+        "reading_minutes": book.reading_minutes,
         "pdf_file_url": book.pdf_file_url,
         "epub_file_url": book.epub_file_url,
         "publication_date": book.publication_date,
         "language": book.language,
         "type": book.type,
-        "views": book.views,
+        "views": book.views if views is None else views,
         "rating": book.rating,
         "average_rating": book.average_rating,
         "rating_count": book.rating_count,
@@ -156,11 +145,35 @@ async def get_book(book_id: int, db: Session = Depends(get_db)):
         "created_at": book.created_at,
         "updated_at": book.updated_at
     }
-    set_cache(item_cache_key, book_data, ttl=600)
+    set_cache(item_cache_key, book_data, ttl=CACHE.item_ttl)
     return book_data
 
+@router.get("/books/{book_id}/content")
+def get_book_content(
+    book_id: int,
+    response: Response,
+    offset: int = Query(0, ge=0),
+    length: int = Query(CONTENT_CHUNK_DEFAULT, ge=1, le=CONTENT_CHUNK_MAX),
+    db: Session = Depends(get_db),
+    read_db: Session = Depends(get_read_db)
+):
+    """Фрагмент текста книги, offset/length в символах"""
+    cache_key = CACHE.content_key(book_id, offset, length)
+    chunk = get_cache(cache_key)
+    if chunk is None:
+        # Как и у GET по id: новой записи на реплике может ещё не быть
+        for session in (read_db, db):
+            chunk = content_chunk(session, Book, book_id, offset, length)
+            if chunk is not None:
+                break
+        if chunk is None:
+            raise HTTPException(status_code=404, detail="Book not found")
+        set_cache(cache_key, chunk, ttl=CACHE.content_ttl)
+    response.headers["X-Total-Length"] = str(chunk["total_length"])
+    return chunk
+
 @router.post("/books", status_code=201)
-async def create_book(
+def create_book(
     book: BookCreate,
     user_id: Optional[str] = Header(None, alias="X-User-ID"),
     db: Session = Depends(get_db)
@@ -168,7 +181,7 @@ async def create_book(
     if not user_id:
         raise HTTPException(status_code=401, detail="Authentication required")
     """Создание новой книги"""
-    db_book = Book(**book.model_dump(exclude={"category_ids"}))
+    db_book = Book(**book.model_dump(exclude={"category_ids"}), **content_fields(book.content))
     
     if book.category_ids:
         categories = db.query(BookCategory).filter(BookCategory.id.in_(book.category_ids)).all()
@@ -186,6 +199,9 @@ async def create_book(
         "thumbnail": db_book.thumbnail,
         "description": db_book.description,
         "content": db_book.content,
+        "excerpt": db_book.excerpt,
+        "word_count": db_book.word_count,
+        "reading_minutes": db_book.reading_minutes,
         "pdf_file_url": db_book.pdf_file_url,
         "epub_file_url": db_book.epub_file_url,
         "publication_date": db_book.publication_date,
@@ -199,11 +215,11 @@ async def create_book(
         "created_at": db_book.created_at,
         "updated_at": db_book.updated_at
     }
-    invalidate_cache("books:list:*")
+    CACHE.invalidate_lists()
     return book_resp
 
 @router.put("/books/{book_id}")
-async def update_book(
+def update_book(
     book_id: int,
     book: BookUpdate,
     user_id: Optional[str] = Header(None, alias="X-User-ID"),
@@ -217,6 +233,9 @@ async def update_book(
         raise HTTPException(status_code=404, detail="Book not found")
     
     update_data = book.model_dump(exclude_unset=True, exclude={"category_ids"})
+    if "content" in update_data:
+        # Превью, число слов и время чтения пересчитываются вместе с текстом
+        update_data.update(content_fields(update_data["content"]))
     for key, value in update_data.items():
         setattr(db_book, key, value)
     
@@ -235,6 +254,9 @@ async def update_book(
         "thumbnail": db_book.thumbnail,
         "description": db_book.description,
         "content": db_book.content,
+        "excerpt": db_book.excerpt,
+        "word_count": db_book.word_count,
+        "reading_minutes": db_book.reading_minutes,
         "pdf_file_url": db_book.pdf_file_url,
         "epub_file_url": db_book.epub_file_url,
         "publication_date": db_book.publication_date,
@@ -248,12 +270,11 @@ async def update_book(
         "created_at": db_book.created_at,
         "updated_at": db_book.updated_at
     }
-    invalidate_cache("books:list:*")
-    invalidate_cache(f"books:item:{book_id}")
+    CACHE.invalidate_item(book_id)
     return update_resp
 
 @router.delete("/books/{book_id}")
-async def delete_book(
+def delete_book(
     book_id: int,
     user_id: Optional[str] = Header(None, alias="X-User-ID"),
     db: Session = Depends(get_db)
@@ -267,13 +288,12 @@ async def delete_book(
     
     db.delete(db_book)
     db.commit()
-    invalidate_cache("books:list:*")
-    invalidate_cache(f"books:item:{book_id}")
+    CACHE.invalidate_item(book_id)
     return {"message": "Book deleted successfully"}
 
 # Reading Progress endpoints
 @router.get("/books/{book_id}/progress")
-async def get_reading_progress(
+def get_reading_progress(
     book_id: int,
     user_id: Optional[str] = Header(None, alias="X-User-ID"),
     db: Session = Depends(get_db)
@@ -309,7 +329,7 @@ async def get_reading_progress(
     }
 
 @router.post("/books/{book_id}/progress")
-async def save_reading_progress(
+def save_reading_progress(
     book_id: int,
     progress_data: BookReadingProgressCreate,
     user_id: Optional[str] = Header(None, alias="X-User-ID"),
@@ -320,8 +340,7 @@ async def save_reading_progress(
         raise HTTPException(status_code=401, detail="User not authenticated")
     
     # Проверяем, существует ли книга
-    book = db.query(Book).filter(Book.id == book_id).first()
-    if not book:
+    if not item_exists(db, Book, book_id):
         raise HTTPException(status_code=404, detail="Book not found")
     
     # Ищем существующий прогресс
@@ -381,7 +400,7 @@ async def save_reading_progress(
         }
 
 @router.get("/books/{book_id}/read")
-async def read_book(book_id: int, db: Session = Depends(get_db)):
+async def read_book(book_id: int, db: Session = Depends(get_read_db)):
     """Proxy endpoint для чтения PDF файла книги"""
     book = db.query(Book).filter(Book.id == book_id).first()
     if not book:
@@ -423,7 +442,7 @@ async def read_book(book_id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=502, detail=f"Failed to fetch PDF: {str(e)}")
 
 @router.get("/books/{book_id}/download")
-async def download_book(book_id: int, db: Session = Depends(get_db)):
+async def download_book(book_id: int, db: Session = Depends(get_read_db)):
     """Download endpoint for PDF files"""
     book = db.query(Book).filter(Book.id == book_id).first()
     if not book:
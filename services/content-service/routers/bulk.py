@@ -0,0 +1,256 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, Header, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy import insert, select
+from sqlalchemy.orm import Session
+from pydantic import ValidationError
+from starlette.concurrency import run_in_threadpool
+from typing import AsyncIterator, Dict, Iterator, List, Optional, Tuple
+from datetime import datetime
+from database import get_db, ReadSessionLocal
+from content_types import ContentType, get_content_type
+from content_meta import content_fields
+from json_cleaner import clean_json_string
+import csv
+import io
+import json
+
+router = APIRouter()
+
+# Не раздуваем ответ, если в файле тысячи битых строк
+MAX_REPORTED_ERRORS = 1000
+
+
+async def _iter_ndjson_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[Tuple[int, bytes]]:
+    """Yield (line_number, raw_line) pairs from a byte stream as it arrives."""
+    buffer = b""
+    line_no = 0
+    async for chunk in chunks:
+        if not chunk:
+            continue
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for raw in lines:
+            line_no += 1
+            yield line_no, raw
+    if buffer:
+        line_no += 1
+        yield line_no, buffer
+
+
+class _ImportReport:
+    def __init__(self):
+        self.inserted = 0
+        self.failed = 0
+        self.errors: List[dict] = []
+
+    def error(self, line_no: int, message: str):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"line": line_no, "error": message})
+
+
+def _parse_batch(ctype: ContentType, batch: List[Tuple[int, bytes]], report: _ImportReport):
+    """Decode and validate raw lines; invalid ones go to the report."""
+    parsed = []
+    for line_no, raw in batch:
+        try:
+            data = json.loads(clean_json_string(raw.decode("utf-8")))
+            item = ctype.create_schema.model_validate(data)
+        except UnicodeDecodeError:
+            report.error(line_no, "Line is not valid UTF-8")
+            continue
+        except json.JSONDecodeError as e:
+            report.error(line_no, f"Invalid JSON: {e.msg}")
+            continue
+        except ValidationError as e:
+            report.error(line_no, "; ".join(
+                f"{'.'.join(str(p) for p in err['loc'])}: {err['msg']}" for err in e.errors()
+            ))
+            continue
+        parsed.append((line_no, item))
+    return parsed
+
+
+def _insert_rows(db: Session, ctype: ContentType, rows: List[dict], category_ids: List[List[int]]) -> int:
+    """Multi-row INSERT of items and their category links. Returns rows inserted."""
+    model = ctype.model
+    ids = db.scalars(
+        insert(model).returning(model.id, sort_by_parameter_order=True),
+        rows,
+    ).all()
+
+    links = [
+        {ctype.link_column: item_id, "category_id": category_id}
+        for item_id, cats in zip(ids, category_ids)
+        for category_id in cats
+    ]
+    if links:
+        db.execute(insert(ctype.link_table), links)
+    return len(ids)
+
+
+def _flush_batch(db: Session, ctype: ContentType, batch: List[Tuple[int, bytes]], report: _ImportReport):
+    parsed = _parse_batch(ctype, batch, report)
+    if not parsed:
+        return
+
+    # Категории разрешаем одним запросом на весь батч, неизвестные id отбрасываем,
+    # как и одиночный POST
+    requested = {cid for _, item in parsed for cid in (item.category_ids or [])}
+    known = set()
+    if requested:
+        known = set(db.scalars(
+            select(ctype.category_model.id).where(ctype.category_model.id.in_(requested))
+        ).all())
+
+    rows = [{**item.model_dump(exclude={"category_ids"}), **content_fields(item.content)} for _, item in parsed]
+    category_ids = [
+        sorted({cid for cid in (item.category_ids or []) if cid in known})
+        for _, item in parsed
+    ]
+
+    try:
+        report.inserted += _insert_rows(db, ctype, rows, category_ids)
+        db.commit()
+        return
+    except Exception:
+        db.rollback()
+
+    # Батч отклонён базой - повторяем построчно, чтобы найти виновные строки
+    for (line_no, _), row, cats in zip(parsed, rows, category_ids):
+        try:
+            with db.begin_nested():
+                report.inserted += _insert_rows(db, ctype, [row], [cats])
+        except Exception as e:
+            report.error(line_no, f"Database error: {str(e).splitlines()[0]}")
+    db.commit()
+
+
+@router.post("/import/{content_type}")
+async def import_content(
+    content_type: str,
+    request: Request,
+    batch_size: int = Query(500, ge=1, le=5000),
+    user_id: Optional[str] = Header(None, alias="X-User-ID"),
+    db: Session = Depends(get_db)
+):
+    """Потоковый импорт NDJSON: один объект *Create на строку"""
+    if not user_id:
+        raise HTTPException(status_code=401, detail="Authentication required")
+    ctype = get_content_type(content_type)
+    if ctype is None:
+        raise HTTPException(status_code=404, detail="Unknown content type")
+
+    report = _ImportReport()
+    batch: List[Tuple[int, bytes]] = []
+    # Тело читается асинхронно, а вставки батчей - синхронные запросы к базе:
+    # они идут в пул потоков, чтобы долгий импорт не держал цикл событий
+    async for line_no, raw in _iter_ndjson_lines(request.stream()):
+        if not raw.strip():
+            continue
+        batch.append((line_no, raw))
+        if len(batch) >= batch_size:
+            await run_in_threadpool(_flush_batch, db, ctype, batch, report)
+            batch = []
+    if batch:
+        await run_in_threadpool(_flush_batch, db, ctype, batch, report)
+
+    if report.inserted:
+        ctype.cache.invalidate_lists()
+
+    return {
+        "content_type": ctype.name,
+        "inserted": report.inserted,
+        "failed": report.failed,
+        "errors": report.errors,
+    }
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+def _category_ids_for(db: Session, ctype: ContentType, item_ids: List[int]) -> Dict[int, List[int]]:
+    link = ctype.link_table
+    item_col = link.c[ctype.link_column]
+    rows = db.execute(
+        select(item_col, link.c.category_id)
+        .where(item_col.in_(item_ids))
+        .order_by(item_col, link.c.category_id)
+    ).all()
+    result: Dict[int, List[int]] = {}
+    for item_id, category_id in rows:
+        result.setdefault(item_id, []).append(category_id)
+    return result
+
+
+def _export_stream(
+    ctype: ContentType,
+    fmt: str,
+    columns: List[str],
+    updated_since: Optional[datetime],
+    batch_size: int,
+) -> Iterator[bytes]:
+    """Stream rows from a server-side cursor, one encoded chunk per fetched batch."""
+    # Сессия зависимости get_db закрывается до отправки тела ответа,
+    # поэтому генератор держит собственную; выгрузка целиком идёт с реплики
+    db = ReadSessionLocal()
+    try:
+        model = ctype.model
+        stmt = select(*(model.__table__.c[name] for name in columns)).order_by(model.id)
+        if updated_since is not None:
+            stmt = stmt.where(model.updated_at >= updated_since)
+        result = db.execute(stmt.execution_options(yield_per=batch_size))
+
+        header = columns + ["category_ids"]
+        if fmt == "csv":
+            buf = io.StringIO()
+            writer = csv.writer(buf)
+            writer.writerow(header)
+            yield buf.getvalue().encode("utf-8")
+
+        for partition in result.partitions():
+            categories = _category_ids_for(db, ctype, [row.id for row in partition])
+            if fmt == "csv":
+                buf = io.StringIO()
+                writer = csv.writer(buf)
+                for row in partition:
+                    values = [v.isoformat() if isinstance(v, datetime) else v for v in row]
+                    writer.writerow(values + [json.dumps(categories.get(row.id, []))])
+                yield buf.getvalue().encode("utf-8")
+            else:
+                lines = []
+                for row in partition:
+                    record = dict(row._mapping)
+                    record["category_ids"] = categories.get(row.id, [])
+                    lines.append(json.dumps(record, default=_json_default, ensure_ascii=False))
+                yield ("\n".join(lines) + "\n").encode("utf-8")
+    finally:
+        db.close()
+
+
+@router.get("/export/{content_type}")
+def export_content(
+    content_type: str,
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    updated_since: Optional[datetime] = None,
+    include_content: bool = True,
+    batch_size: int = Query(1000, ge=1, le=10000),
+):
+    """Потоковая выгрузка всего каталога (NDJSON или CSV)"""
+    ctype = get_content_type(content_type)
+    if ctype is None:
+        raise HTTPException(status_code=404, detail="Unknown content type")
+
+    columns = [c.name for c in ctype.model.__table__.columns]
+    if not include_content:
+        columns.remove("content")
+
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    return StreamingResponse(
+        _export_stream(ctype, format, columns, updated_since, batch_size),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{ctype.name}.{format}"'},
+    )
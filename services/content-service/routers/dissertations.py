@@ -1,15 +1,23 @@
-from fastapi import APIRouter, Depends, HTTPException, Query, Header
-from sqlalchemy.orm import Session, selectinload
+from fastapi import APIRouter, Depends, HTTPException, Query, Header, Request, Response
+from sqlalchemy.orm import Session, selectinload, undefer
 from typing import List, Optional
-from database import get_db
+from database import get_db, get_read_db
 from models import Dissertation, DissertationCategory
 from schemas import DissertationCreate, DissertationUpdate, DissertationResponse
-import math
+from content_types import CONTENT_TYPES
+from cache import get_cache, set_cache
+from item_cache import get_items, parse_ids
+from queries import list_page, content_chunk, CONTENT_CHUNK_DEFAULT, CONTENT_CHUNK_MAX
+from unique_views import count_view
+from content_meta import content_fields
+from encoding import NegotiatedResponse
 
-router = APIRouter()
+# JSON или MessagePack по заголовку Accept, см. encoding.py
+router = APIRouter(default_response_class=NegotiatedResponse)
+CACHE = CONTENT_TYPES["dissertations"].cache
 
 @router.get("/dissertations", response_model=dict)
-async def list_dissertations(
+def list_dissertations(
     page: int = Query(1, ge=1),
     per_page: int = Query(20, ge=1, le=100),
     author: Optional[str] = None,
@@ -17,74 +25,72 @@ async def list_dissertations(
     category_id: Optional[int] = None,
     search: Optional[str] = None,
     sort: Optional[str] = None,
-    db: Session = Depends(get_db)
+    ids: Optional[str] = Query(None, description="1,2,3 - карточки по id в этом порядке"),
+    db: Session = Depends(get_read_db)
 ):
-    """Список диссертаций с пагинацией и фильтрами"""
-    query = db.query(Dissertation)
-    
-    if author:
-        query = query.filter(Dissertation.author.ilike(f"%{author}%"))
-    if language:
-        query = query.filter(Dissertation.language == language)
-    if category_id:
-        query = query.join(Dissertation.categories).filter(DissertationCategory.id == category_id)
-    if search:
-        query = query.filter(
-            (Dissertation.title.ilike(f"%{search}%")) | 
-            (Dissertation.author.ilike(f"%{search}%"))
-        )
-    if sort == "views_desc":
-        query = query.order_by(Dissertation.views.desc())
-    
-    total = query.count()
-    dissertations = query.options(selectinload(Dissertation.categories)).offset((page - 1) * per_page).limit(per_page).all()
-    
-    items = []
-    for diss in dissertations:
-        items.append({
-            "id": diss.id,
-            "title": diss.title,
-            "author": diss.author,
-            "authors_workplace": diss.authors_workplace,
-            "thumbnail": diss.thumbnail,
-            "content": diss.content,
-            "publication_date": diss.publication_date,
-            "language": diss.language,
-            "type": diss.type,
-            "views": diss.views,
-            "rating": diss.rating,
-            "average_rating": diss.average_rating,
-            "rating_count": diss.rating_count,
-            "categories": [{"id": c.id, "name": c.name, "parent_id": c.parent_id} for c in diss.categories],
-            "created_at": diss.created_at,
-            "updated_at": diss.updated_at
-        })
-    
-    return {
-        "items": items,
-        "total": total,
-        "page": page,
-        "per_page": per_page,
-        "pages": math.ceil(total / per_page)
-    }
+    """Список диссертаций с пагинацией и фильтрами; с ids - выборка по id"""
+    if ids is not None:
+        return get_items(db, CONTENT_TYPES["dissertations"], parse_ids(ids))
+
+    cache_key = CACHE.list_page_key(
+        page, per_page, sort,
+        author=author, language=language, category_id=category_id, search=search,
+    )
+    cached = get_cache(cache_key)
+    if cached is not None:
+        return cached
+
+    result = list_page(
+        db, CONTENT_TYPES["dissertations"], page, per_page, sort=sort,
+        author=author, language=language,
+        category_id=category_id, search=search,
+    )
+    set_cache(cache_key, result, ttl=CACHE.list_ttl)
+    return result
 
 @router.get("/dissertations/{dissertation_id}")
-async def get_dissertation(dissertation_id: int, db: Session = Depends(get_db)):
-    dissertation = db.query(Dissertation).filter(Dissertation.id == dissertation_id).first()
-    if not dissertation:
+def get_dissertation(
+    dissertation_id: int,
+    request: Request,
+    db: Session = Depends(get_db),
+    read_db: Session = Depends(get_read_db)
+):
+    """Получение диссертации по ID"""
+    cache_key = CACHE.item_key(dissertation_id)
+    cached = get_cache(cache_key)
+    if cached is not None:
+        # Просмотр засчитывается и для ответа из кэша
+        count_view(db, CONTENT_TYPES["dissertations"], dissertation_id, request)
+        return cached
+
+    # Читаем с реплики; только что созданная запись может ещё не доехать
+    # до неё - тогда с основной базы
+    dissertation = None
+    for session in (read_db, db):
+        dissertation = session.query(Dissertation).options(
+            selectinload(Dissertation.categories), undefer(Dissertation.content)
+        ).filter(Dissertation.id == dissertation_id).first()
+        if dissertation is not None:
+            break
+    if dissertation is None:
         raise HTTPException(status_code=404, detail="Dissertation not found")
-    
-    return {
+    # Счётчик мог измениться на основной базе: в ответ и кэш - новое значение
+    views = count_view(db, CONTENT_TYPES["dissertations"], dissertation_id, request)
+
+    dissertation_data = {
         "id": dissertation.id,
         "title": dissertation.title,
         "author": dissertation.author,
         "authors_workplace": dissertation.authors_workplace,
         "thumbnail": dissertation.thumbnail,
         "content": dissertation.content,
+        "excerpt": dissertation.excerpt,
+        "word_count": dissertation.word_count,
+        "reading_minutes": dissertation.reading_minutes,
         "publication_date": dissertation.publication_date,
         "language": dissertation.language,
         "type": dissertation.type,
-        "views": dissertation.views,
+        "views": dissertation.views if views is None else views,
         "rating": dissertation.rating,
         "average_rating": dissertation.average_rating,
         "rating_count": dissertation.rating_count,
@@ -92,16 +98,42 @@ async def get_dissertation(dissertation_id: int, db: Session = Depends(get_db)):
         "created_at": dissertation.created_at,
         "updated_at": dissertation.updated_at
     }
+    set_cache(cache_key, dissertation_data, ttl=CACHE.item_ttl)
+    return dissertation_data
+
+@router.get("/dissertations/{dissertation_id}/content")
+def get_dissertation_content(
+    dissertation_id: int,
+    response: Response,
+    offset: int = Query(0, ge=0),
+    length: int = Query(CONTENT_CHUNK_DEFAULT, ge=1, le=CONTENT_CHUNK_MAX),
+    db: Session = Depends(get_db),
+    read_db: Session = Depends(get_read_db)
+):
+    """Фрагмент текста диссертации, offset/length в символах"""
+    cache_key = CACHE.content_key(dissertation_id, offset, length)
+    chunk = get_cache(cache_key)
+    if chunk is None:
+        # Как и у GET по id: новой записи на реплике может ещё не быть
+        for session in (read_db, db):
+            chunk = content_chunk(session, Dissertation, dissertation_id, offset, length)
+            if chunk is not None:
+                break
+        if chunk is None:
+            raise HTTPException(status_code=404, detail="Dissertation not found")
+        set_cache(cache_key, chunk, ttl=CACHE.content_ttl)
+    response.headers["X-Total-Length"] = str(chunk["total_length"])
+    return chunk
 
 @router.post("/dissertations", status_code=201)
-async def create_dissertation(
+def create_dissertation(
     dissertation: DissertationCreate,
     user_id: Optional[str] = Header(None, alias="X-User-ID"),
     db: Session = Depends(get_db)
 ):
     if not user_id:
         raise HTTPException(status_code=401, detail="Authentication required")
-    db_dissertation = Dissertation(**dissertation.model_dump(exclude={"category_ids"}))
+    db_dissertation = Dissertation(**dissertation.model_dump(exclude={"category_ids"}), **content_fields(dissertation.content))
     
     if dissertation.category_ids:
         categories = db.query(DissertationCategory).filter(
@@ -112,6 +144,7 @@ async def create_dissertation(
     db.add(db_dissertation)
     db.commit()
     db.refresh(db_dissertation)
+    CACHE.invalidate_lists()
     
     return {
         "id": db_dissertation.id,
@@ -120,6 +153,9 @@ async def create_dissertation(
         "authors_workplace": db_dissertation.authors_workplace,
         "thumbnail": db_dissertation.thumbnail,
         "content": db_dissertation.content,
+        "excerpt": db_dissertation.excerpt,
+        "word_count": db_dissertation.word_count,
+        "reading_minutes": db_dissertation.reading_minutes,
         "publication_date": db_dissertation.publication_date,
         "language": db_dissertation.language,
         "type": db_dissertation.type,
@@ -133,7 +169,7 @@ async def create_dissertation(
     }
 
 @router.put("/dissertations/{dissertation_id}")
-async def update_dissertation(
+def update_dissertation(
     dissertation_id: int,
     dissertation: DissertationUpdate,
     user_id: Optional[str] = Header(None, alias="X-User-ID"),
@@ -146,6 +182,9 @@ async def update_dissertation(
         raise HTTPException(status_code=404, detail="Dissertation not found")
     
     update_data = dissertation.model_dump(exclude_unset=True, exclude={"category_ids"})
+    if "content" in update_data:
+        # Превью, число слов и время чтения пересчитываются вместе с текстом
+        update_data.update(content_fields(update_data["content"]))
     for key, value in update_data.items():
         setattr(db_dissertation, key, value)
     
@@ -157,6 +196,7 @@ async def update_dissertation(
     
     db.commit()
     db.refresh(db_dissertation)
+    CACHE.invalidate_item(dissertation_id)
     
     return {
         "id": db_dissertation.id,
@@ -165,6 +205,9 @@ async def update_dissertation(
         "authors_workplace": db_dissertation.authors_workplace,
         "thumbnail": db_dissertation.thumbnail,
         "content": db_dissertation.content,
+        "excerpt": db_dissertation.excerpt,
+        "word_count": db_dissertation.word_count,
+        "reading_minutes": db_dissertation.reading_minutes,
         "publication_date": db_dissertation.publication_date,
         "language": db_dissertation.language,
         "type": db_dissertation.type,
@@ -178,7 +221,7 @@ async def update_dissertation(
     }
 
 @router.delete("/dissertations/{dissertation_id}")
-async def delete_dissertation(
+def delete_dissertation(
     dissertation_id: int,
     user_id: Optional[str] = Header(None, alias="X-User-ID"),
     db: Session = Depends(get_db)
@@ -191,5 +234,6 @@ async def delete_dissertation(
     
     db.delete(db_dissertation)
     db.commit()
+    CACHE.invalidate_item(dissertation_id)
     
     return {"message": "Dissertation deleted successfully"}
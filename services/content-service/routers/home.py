@@ -0,0 +1,112 @@
+from fastapi import APIRouter, Depends, Query, Response
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import select
+from starlette.concurrency import run_in_threadpool
+from typing import Optional
+from cache import add_list_invalidation_listener, delete_cache, get_raw_cache, set_raw_cache
+from content_types import CONTENT_TYPES
+from database import get_read_sessionmaker, get_sessionmaker, is_primary_pinned, mark_primary
+from models import ArticleCategory, BookCategory, DissertationCategory
+from queries import fetch_rows, list_filters, list_order_by, serialize_rows
+import asyncio
+import json
+import os
+
+router = APIRouter()
+
+# Главная страница одним запросом: вместо шести вызовов со своим COUNT каждый.
+# Ответ хранится в Redis уже закодированным JSON и отдаётся одним GET без разбора.
+HOME_CACHE_TTL = int(os.getenv("HOME_CACHE_TTL", "60"))
+HOME_SECTION_SIZE = int(os.getenv("HOME_SECTION_SIZE", "10"))
+HOME_LANGUAGES = ("tm", "ru", "en")
+
+# секция -> (тип контента, сортировка)
+HOME_SECTIONS = {
+    "latest_articles": ("articles", "newest"),
+    "popular_books": ("books", "views_desc"),
+    "recent_dissertations": ("dissertations", "newest"),
+}
+HOME_CATEGORIES = {
+    "article_categories": ArticleCategory,
+    "book_categories": BookCategory,
+    "dissertation_categories": DissertationCategory,
+}
+
+
+def home_key(language: Optional[str]) -> str:
+    return f"home:{language or 'all'}"
+
+
+# Метка свежей инвалидации: пока она жива, главная собирается с основной базы
+HOME_PRIMARY_KEY = "home"
+
+
+def invalidate_home() -> None:
+    """Drop every language variant with one DEL and pin rebuilds to the primary."""
+    # Реплика может ещё не получить запись: страница, собранная с неё,
+    # закэшировалась бы без изменений на весь HOME_CACHE_TTL
+    mark_primary(HOME_PRIMARY_KEY)
+    delete_cache(*(home_key(language) for language in (None,) + HOME_LANGUAGES))
+
+
+def _on_lists_invalidated(prefix: str) -> None:
+    # Любая запись, сбросившая списки типа, меняет и главную
+    invalidate_home()
+
+
+add_list_invalidation_listener(_on_lists_invalidated)
+
+
+def _load_section(session_factory, content_type: str, sort: str, language: Optional[str]) -> list:
+    ctype = CONTENT_TYPES[content_type]
+    db = session_factory()
+    try:
+        # Без COUNT: главной нужны только первые карточки
+        rows = fetch_rows(
+            db, ctype, list_filters(ctype, language=language), list_order_by(ctype, sort),
+            limit=HOME_SECTION_SIZE,
+        )
+        return serialize_rows(ctype, rows)
+    finally:
+        db.close()
+
+
+def _load_categories(session_factory, model) -> list:
+    columns = [model.id, model.name] + ([model.parent_id] if hasattr(model, "parent_id") else [])
+    db = session_factory()
+    try:
+        return [dict(row) for row in db.execute(select(*columns).order_by(model.id)).mappings()]
+    finally:
+        db.close()
+
+
+async def build_home(session_factory, language: Optional[str]) -> dict:
+    """All sections at once, each on its own session from *session_factory* in the thread pool."""
+    tasks = {
+        name: run_in_threadpool(_load_section, session_factory, content_type, sort, language)
+        for name, (content_type, sort) in HOME_SECTIONS.items()
+    }
+    tasks.update({
+        name: run_in_threadpool(_load_categories, session_factory, model)
+        for name, model in HOME_CATEGORIES.items()
+    })
+    results = await asyncio.gather(*tasks.values())
+    return dict(zip(tasks, results), language=language)
+
+
+@router.get("/home")
+async def home(
+    language: Optional[str] = Query(None, pattern="^(" + "|".join(HOME_LANGUAGES) + ")$"),
+    session_factory=Depends(get_read_sessionmaker),
+    primary_factory=Depends(get_sessionmaker)
+):
+    """Данные главной страницы: свежие статьи, популярные книги, новые диссертации и категории"""
+    cache_key = home_key(language)
+    body = get_raw_cache(cache_key)
+    if body is None:
+        if is_primary_pinned(HOME_PRIMARY_KEY):
+            session_factory = primary_factory
+        payload = await build_home(session_factory, language)
+        body = json.dumps(jsonable_encoder(payload), ensure_ascii=False, separators=(",", ":"))
+        set_raw_cache(cache_key, body, ttl=HOME_CACHE_TTL)
+    return Response(content=body, media_type="application/json")
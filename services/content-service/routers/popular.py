@@ -0,0 +1,69 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+from typing import Optional
+from database import get_read_db
+from content_types import get_content_type
+from item_cache import get_items
+from queries import list_page
+from popularity import TRENDING_WINDOWS, forget, top_ids
+import math
+
+router = APIRouter()
+
+# Подключается раньше роутеров типов: иначе /articles/popular поймал бы /articles/{article_id}
+
+
+def _leaderboard_page(db: Session, content_type: str, page: int, per_page: int,
+                      language: Optional[str], window: Optional[str]) -> dict:
+    ctype = get_content_type(content_type)
+    if ctype is None:
+        raise HTTPException(status_code=404, detail="Unknown content type")
+
+    ranked = top_ids(db, ctype, (page - 1) * per_page, per_page, language=language, window=window)
+    if ranked is None:
+        # Redis недоступен - тот же порядок из базы
+        return list_page(db, ctype, page, per_page, sort="views_desc", language=language)
+
+    entries, total = ranked
+    hydrated = get_items(db, ctype, [item_id for item_id, _ in entries]) if entries else {"items": [], "missing": []}
+    if hydrated["missing"]:
+        # Удалённые записи убираем из рейтинга при первом же чтении
+        forget(ctype, hydrated["missing"])
+
+    items = hydrated["items"]
+    if window is not None:
+        scores = dict(entries)
+        for item in items:
+            item["trending_score"] = round(scores[item["id"]], 3)
+    return {
+        "items": items,
+        "total": total,
+        "page": page,
+        "per_page": per_page,
+        "pages": math.ceil(total / per_page),
+    }
+
+
+@router.get("/{content_type}/popular")
+def popular(
+    content_type: str,
+    language: Optional[str] = None,
+    page: int = Query(1, ge=1),
+    per_page: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_read_db)
+):
+    """Самые просматриваемые за всё время (sorted set в Redis)"""
+    return _leaderboard_page(db, content_type, page, per_page, language, None)
+
+
+@router.get("/{content_type}/trending")
+def trending(
+    content_type: str,
+    window: str = Query("24h", pattern="^(" + "|".join(TRENDING_WINDOWS) + ")$"),
+    language: Optional[str] = None,
+    page: int = Query(1, ge=1),
+    per_page: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_read_db)
+):
+    """Набирающие просмотры за окно 24h или 7d, свежие просмотры весят больше"""
+    return _leaderboard_page(db, content_type, page, per_page, language, window)
@@ -0,0 +1,35 @@
+from fastapi import APIRouter, Depends, HTTPException, Header
+from sqlalchemy.orm import Session
+from typing import Optional
+from database import get_db
+from schemas import RatingDeltaBatch
+from rating_events import apply_rating_batch, content_type_name
+
+router = APIRouter()
+
+@router.post("/rating-deltas")
+def apply_rating_deltas(
+    batch: RatingDeltaBatch,
+    user_id: Optional[str] = Header(None, alias="X-User-ID"),
+    db: Session = Depends(get_db)
+):
+    """Применить изменения оценок пачкой: rating_count += count_delta, среднее пересчитывается в SQL"""
+    if not user_id:
+        raise HTTPException(status_code=401, detail="Authentication required")
+    
+    requested = {
+        (content_type_name(d.content_type), d.content_id)
+        for d in batch.deltas if d.count_delta or d.sum_delta
+    }
+    updated = apply_rating_batch(
+        db, [(d.content_type, d.content_id, d.count_delta, d.sum_delta) for d in batch.deltas]
+    )
+    applied = {(name, item_id) for name, ids in updated.items() for item_id in ids}
+    
+    return {
+        "updated": {name: ids for name, ids in updated.items() if ids},
+        "missing": sorted(
+            [{"content_type": name, "id": item_id} for name, item_id in requested - applied],
+            key=lambda m: (m["content_type"], m["id"])
+        ),
+    }
@@ -1,7 +1,11 @@
-from fastapi import APIRouter, Depends, HTTPException, Header
+from fastapi import APIRouter, Depends, HTTPException, Header, Query
+from sqlalchemy import exists, tuple_
 from sqlalchemy.orm import Session
-from typing import List, Optional
-from database import get_db
+from typing import Iterable, List, Optional, Set, Tuple
+from datetime import datetime, timedelta
+import base64
+import os
+from database import get_db, get_read_db
 from models import (
     SavedArticle,
     Article,
@@ -27,13 +31,109 @@ from schemas import (
     DissertationHighlightCreate,
     DissertationHighlightResponse,
 )
+from content_types import CONTENT_TYPES
+from queries import fetch_items_by_id, item_exists
+from encoding import NegotiatedResponse
 import math
 
-router = APIRouter()
+# JSON или MessagePack по заголовку Accept, см. encoding.py
+router = APIRouter(default_response_class=NegotiatedResponse)
+
+
+def _visible_highlights(query, model, start: Optional[int], end: Optional[int]):
+    """Only highlights overlapping [start, end), ordered by position."""
+    if start is not None and end is not None and end < start:
+        raise HTTPException(status_code=400, detail="end must be greater than or equal to start")
+    # Пересечение интервалов: начинается до конца окна и заканчивается после его начала.
+    # Равенство user_id/doc_id и диапазон по start_offset идут по индексу
+    # (user_id, <doc>_id, start_offset)
+    if end is not None:
+        query = query.filter(model.start_offset < end)
+    if start is not None:
+        query = query.filter(model.end_offset > start)
+    return query.order_by(model.start_offset, model.id)
+
+# Источники ленты синхронизации; порядок задаёт ранг в курсоре при равном updated_at
+_SYNC_SOURCES = (
+    ("article", ArticleHighlight, "article_id"),
+    ("book", BookHighlight, "book_id"),
+    ("dissertation", DissertationHighlight, "dissertation_id"),
+)
+
+# updated_at ставится до коммита: строка со временем раньше курсора может стать
+# видна уже после того, как клиент синхронизировался дальше. Считаем, что
+# транзакция коммитится не позже чем через HIGHLIGHT_SYNC_OVERLAP_SECONDS после
+# отметки, и перечитываем это окно перед временем прошлой синхронизации; строки
+# окна, которые клиент уже получил, курсор помнит и повторно не отдаёт
+HIGHLIGHT_SYNC_OVERLAP_SECONDS = float(os.getenv("HIGHLIGHT_SYNC_OVERLAP_SECONDS", "30"))
+# Сверх этого курсор строки окна не помнит - они придут ещё раз (применение идемпотентно)
+_SYNC_SEEN_MAX = 200
+# Надгробия старше срока удаляются; курсор старше срока - полная синхронизация заново
+HIGHLIGHT_TOMBSTONE_DAYS = int(os.getenv("HIGHLIGHT_TOMBSTONE_DAYS", "90"))
+
+# (updated_at, ранг источника, id) - позиция в общем порядке ленты
+SyncKey = Tuple[datetime, int, int]
+
+
+def _encode_sync_cursor(position: SyncKey, served_at: datetime, seen: Iterable[SyncKey]) -> str:
+    at = position[0]
+    # Просмотренные строки - смещением от позиции в микросекундах, чтобы курсор был коротким
+    marks = ";".join(
+        f"{rank}.{item_id}.{(at - updated_at) // timedelta(microseconds=1)}"
+        for updated_at, rank, item_id in sorted(seen)
+    )
+    raw = f"{at.isoformat()}|{position[1]}|{position[2]}|{served_at.isoformat()}|{marks}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _decode_sync_cursor(cursor: str) -> Tuple[SyncKey, datetime, Set[SyncKey]]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        updated_at, rank, item_id, *rest = raw.split("|")
+        at = datetime.fromisoformat(updated_at)
+        # Курсоры старого формата без времени синхронизации: окно от позиции, оно шире
+        served_at = datetime.fromisoformat(rest[0]) if rest else at
+        seen = set()
+        for mark in filter(None, rest[1].split(";") if len(rest) > 1 else []):
+            mark_rank, mark_id, offset = mark.split(".")
+            seen.add((at - timedelta(microseconds=int(offset)), int(mark_rank), int(mark_id)))
+        return (at, int(rank), int(item_id)), served_at, seen
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid sync cursor")
+
+
+def purge_highlight_tombstones(db: Session, days: int = HIGHLIGHT_TOMBSTONE_DAYS) -> int:
+    """Delete soft-deleted highlights older than *days*; returns rows deleted."""
+    before = datetime.utcnow() - timedelta(days=days)
+    deleted = 0
+    for _, model, _ in _SYNC_SOURCES:
+        deleted += db.query(model).filter(model.deleted_at < before).delete(synchronize_session=False)
+    db.commit()
+    return deleted
+
+
+def _sync_change(kind: str, fk: str, h) -> dict:
+    if h.deleted_at is not None:
+        # Надгробие: клиенту достаточно знать, что удалять
+        return {"type": kind, "id": h.id, fk: getattr(h, fk), "deleted": True,
+                "updated_at": h.updated_at, "deleted_at": h.deleted_at}
+    return {
+        "type": kind,
+        "id": h.id,
+        fk: getattr(h, fk),
+        "deleted": False,
+        "text": h.text,
+        "start_offset": h.start_offset,
+        "end_offset": h.end_offset,
+        "color": h.color,
+        "note": h.note,
+        "created_at": h.created_at,
+        "updated_at": h.updated_at,
+    }
 
 # Закладки
 @router.post("/saved-articles", status_code=201)
-async def save_article(
+def save_article(
     saved: SavedArticleCreate,
     user_id: Optional[str] = Header(None, alias="X-User-ID"),
     db: Session = Depends(get_db)
@@ -43,8 +143,7 @@ async def save_article(
         raise HTTPException(status_code=401, detail="User not authenticated")
     
     # Проверяем, существует ли статья
-    article = db.query(Article).filter(Article.id == saved.article_id).first()
-    if not article:
+    if not item_exists(db, Article, saved.article_id):
         raise HTTPException(status_code=404, detail="Article not found")
     
     # Проверяем, не сохранена ли уже
@@ -65,7 +164,7 @@ async def save_article(
     return {"id": db_saved.id, "article_id": db_saved.article_id, "created_at": db_saved.created_at}
 
 @router.delete("/saved-articles/{article_id}")
-async def unsave_article(
+def unsave_article(
     article_id: int,
     user_id: Optional[str] = Header(None, alias="X-User-ID"),
     db: Session = Depends(get_db)
@@ -88,11 +187,11 @@ async def unsave_article(
     return {"message": "Article removed from saved"}
 
 @router.get("/saved-articles")
-async def get_saved_articles(
+def get_saved_articles(
     user_id: Optional[str] = Header(None, alias="X-User-ID"),
     page: int = 1,
     per_page: int = 20,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Получить список сохраненных статей"""
     if not user_id:
@@ -101,27 +200,15 @@ async def get_saved_articles(
     query = db.query(SavedArticle).filter(SavedArticle.user_id == user_id)
     
     total = query.count()
-    saved_articles = query.offset((page - 1) * per_page).limit(per_page).all()
+    saved_rows = query.with_entities(SavedArticle.article_id, SavedArticle.created_at).offset((page - 1) * per_page).limit(per_page).all()
+    articles = fetch_items_by_id(db, CONTENT_TYPES["articles"], [r.article_id for r in saved_rows])
     
     items = []
-    for saved in saved_articles:
-        article = saved.article
-        items.append({
-            "id": article.id,
-            "title": article.title,
-            "author": article.author,
-            "authors_workplace": article.authors_workplace,
-            "thumbnail": article.thumbnail,
-            "content": article.content,
-            "publication_date": article.publication_date,
-            "language": article.language,
-            "type": article.type,
-            "views": article.views,
-            "average_rating": article.average_rating,
-            "rating_count": article.rating_count,
-            "saved_at": saved.created_at,
-            "categories": [{"id": c.id, "name": c.name} for c in article.categories],
-        })
+    for article_id, saved_at in saved_rows:
+        article = articles.get(article_id)
+        if article is None:
+            continue
+        items.append({**article, "saved_at": saved_at})
     
     return {
         "items": items,
@@ -132,25 +219,25 @@ async def get_saved_articles(
     }
 
 @router.get("/saved-articles/check/{article_id}")
-async def check_if_saved(
+def check_if_saved(
     article_id: int,
     user_id: Optional[str] = Header(None, alias="X-User-ID"),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Проверить, сохранена ли статья"""
     if not user_id:
         return {"is_saved": False}
     
-    saved = db.query(SavedArticle).filter(
+    is_saved = db.query(exists().where(
         SavedArticle.user_id == user_id,
         SavedArticle.article_id == article_id
-    ).first()
+    )).scalar()
     
-    return {"is_saved": saved is not None}
+    return {"is_saved": is_saved}
 
 # Выделения текста
 @router.post("/highlights", status_code=201)
-async def create_highlight(
+def create_highlight(
     highlight: HighlightCreate,
     user_id: Optional[str] = Header(None, alias="X-User-ID"),
     db: Session = Depends(get_db)
@@ -160,8 +247,7 @@ async def create_highlight(
         raise HTTPException(status_code=401, detail="User not authenticated")
     
     # Проверяем, существует ли статья
-    article = db.query(Article).filter(Article.id == highlight.article_id).first()
-    if not article:
+    if not item_exists(db, Article, highlight.article_id):
         raise HTTPException(status_code=404, detail="Article not found")
     
     db_highlight = ArticleHighlight(
@@ -189,20 +275,90 @@ async def create_highlight(
         "created_at": db_highlight.created_at
     }
 
+@router.get("/highlights/sync")
+def sync_highlights(
+    since: Optional[str] = None,
+    limit: int = Query(500, ge=1, le=2000),
+    user_id: Optional[str] = Header(None, alias="X-User-ID"),
+    db: Session = Depends(get_db)
+):
+    """Изменения выделений пользователя (статьи, книги, диссертации) после курсора since"""
+    if not user_id:
+        raise HTTPException(status_code=401, detail="User not authenticated")
+
+    # Время берётся до запросов: всё, что отмечено раньше served_at - окно, уже закоммичено
+    served_at = datetime.utcnow()
+    position, synced_at, seen = _decode_sync_cursor(since) if since else (None, None, set())
+    # Срок считается от прошлой синхронизации, а не от позиции: у клиента без
+    # изменений позиция стоит на месте, но курсор каждый раз продлевается
+    if synced_at is not None and synced_at < served_at - timedelta(days=HIGHLIGHT_TOMBSTONE_DAYS):
+        # Надгробия, появившиеся после неё, могли быть уже удалены - дельта была бы неполной
+        raise HTTPException(status_code=410, detail="Sync cursor expired, sync from scratch")
+
+    overlap = timedelta(seconds=HIGHLIGHT_SYNC_OVERLAP_SECONDS)
+    rows = []
+    late = []
+    for rank, (kind, model, fk) in enumerate(_SYNC_SOURCES):
+        query = db.query(model).filter(model.user_id == user_id)
+        if position is None:
+            # Первая синхронизация: удалённое клиенту ещё не известно
+            page = query.filter(model.deleted_at.is_(None))
+        else:
+            since_at, since_rank, since_id = position
+            # Общий порядок ленты - (updated_at, ранг типа, id)
+            if rank == since_rank:
+                page = query.filter(tuple_(model.updated_at, model.id) > tuple_(since_at, since_id))
+            elif rank > since_rank:
+                page = query.filter(model.updated_at >= since_at)
+            else:
+                page = query.filter(model.updated_at > since_at)
+            # Опоздавшие коммиты: строки не дальше позиции из окна перед прошлой синхронизацией
+            window = query.filter(model.updated_at > synced_at - overlap, model.updated_at <= since_at)
+            for h in window.order_by(model.updated_at, model.id):
+                key = (h.updated_at, rank, h.id)
+                if key <= position and key not in seen:
+                    late.append((key, kind, fk, h))
+        # limit + 1 с каждого источника хватает, чтобы после слияния знать has_more
+        for h in page.order_by(model.updated_at, model.id).limit(limit + 1):
+            rows.append(((h.updated_at, rank, h.id), kind, fk, h))
+
+    rows.sort(key=lambda row: row[0])
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    # Опоздавшие идут первыми и в limit не входят, чтобы не задерживать листание
+    late.sort(key=lambda row: row[0])
+    changes = late + rows
+
+    # Пустой ответ тоже даёт новый курсор: время синхронизации в нём сдвигается.
+    # Пользователю без выделений позицией служит само время ответа
+    next_position = rows[-1][0] if rows else position or (served_at, 0, 0)
+    # Помнить нужно только строки, которые ещё могут попасть в окно следующего запроса
+    recent = sorted(
+        key for key in seen | {row[0] for row in changes} if key[0] > served_at - overlap
+    )[-_SYNC_SEEN_MAX:]
+    return {
+        "changes": [_sync_change(kind, fk, h) for _, kind, fk, h in changes],
+        "next_cursor": _encode_sync_cursor(next_position, served_at, recent),
+        "has_more": has_more,
+    }
+
 @router.get("/highlights/{article_id}")
-async def get_highlights(
+def get_highlights(
     article_id: int,
+    start: Optional[int] = Query(None, ge=0),
+    end: Optional[int] = Query(None, ge=0),
     user_id: Optional[str] = Header(None, alias="X-User-ID"),
     db: Session = Depends(get_db)
 ):
-    """Получить все выделения для статьи"""
+    """Получить выделения для статьи; start/end - только пересекающие окно текста"""
     if not user_id:
         return []
     
-    highlights = db.query(ArticleHighlight).filter(
+    highlights = _visible_highlights(db.query(ArticleHighlight).filter(
         ArticleHighlight.user_id == user_id,
-        ArticleHighlight.article_id == article_id
-    ).all()
+        ArticleHighlight.article_id == article_id,
+        ArticleHighlight.deleted_at.is_(None)
+    ), ArticleHighlight, start, end).all()
     
     return [
         {
@@ -220,7 +376,7 @@ async def get_highlights(
     ]
 
 @router.put("/highlights/{highlight_id}")
-async def update_highlight(
+def update_highlight(
     highlight_id: int,
     highlight: HighlightCreate,
     user_id: Optional[str] = Header(None, alias="X-User-ID"),
@@ -232,7 +388,8 @@ async def update_highlight(
     
     db_highlight = db.query(ArticleHighlight).filter(
         ArticleHighlight.id == highlight_id,
-        ArticleHighlight.user_id == user_id
+        ArticleHighlight.user_id == user_id,
+        ArticleHighlight.deleted_at.is_(None)
     ).first()
     
     if not db_highlight:
@@ -258,7 +415,7 @@ async def update_highlight(
     }
 
 @router.delete("/highlights/{highlight_id}")
-async def delete_highlight(
+def delete_highlight(
     highlight_id: int,
     user_id: Optional[str] = Header(None, alias="X-User-ID"),
     db: Session = Depends(get_db)
@@ -269,20 +426,24 @@ async def delete_highlight(
     
     db_highlight = db.query(ArticleHighlight).filter(
         ArticleHighlight.id == highlight_id,
-        ArticleHighlight.user_id == user_id
+        ArticleHighlight.user_id == user_id,
+        ArticleHighlight.deleted_at.is_(None)
     ).first()
     
     if not db_highlight:
         raise HTTPException(status_code=404, detail="Highlight not found")
     
-    db.delete(db_highlight)
+    # Мягкое удаление: строка уходит в ленту синхронизации как надгробие
+    now = datetime.utcnow()
+    db_highlight.deleted_at = now
+    db_highlight.updated_at = now
     db.commit()
     
     return {"message": "Highlight deleted"}
 
 # Закладки книг
 @router.post("/saved-books", status_code=201)
-async def save_book(
+def save_book(
     saved: SavedBookCreate,
     user_id: Optional[str] = Header(None, alias="X-User-ID"),
     db: Session = Depends(get_db)
@@ -290,8 +451,7 @@ async def save_book(
     if not user_id:
         raise HTTPException(status_code=401, detail="User not authenticated")
 
-    book = db.query(Book).filter(Book.id == saved.book_id).first()
-    if not book:
+    if not item_exists(db, Book, saved.book_id):
         raise HTTPException(status_code=404, detail="Book not found")
 
     existing = db.query(SavedBook).filter(
@@ -310,7 +470,7 @@ async def save_book(
     return {"id": db_saved.id, "book_id": db_saved.book_id, "created_at": db_saved.created_at}
 
 @router.delete("/saved-books/{book_id}")
-async def unsave_book(
+def unsave_book(
     book_id: int,
     user_id: Optional[str] = Header(None, alias="X-User-ID"),
     db: Session = Depends(get_db)
@@ -332,40 +492,26 @@ async def unsave_book(
     return {"message": "Book removed from saved"}
 
 @router.get("/saved-books")
-async def get_saved_books(
+def get_saved_books(
     user_id: Optional[str] = Header(None, alias="X-User-ID"),
     page: int = 1,
     per_page: int = 20,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     if not user_id:
         raise HTTPException(status_code=401, detail="User not authenticated")
 
     query = db.query(SavedBook).filter(SavedBook.user_id == user_id)
     total = query.count()
-    saved_books = query.offset((page - 1) * per_page).limit(per_page).all()
+    saved_rows = query.with_entities(SavedBook.book_id, SavedBook.created_at).offset((page - 1) * per_page).limit(per_page).all()
+    books = fetch_items_by_id(db, CONTENT_TYPES["books"], [r.book_id for r in saved_rows])
 
     items = []
-    for saved in saved_books:
-        book = saved.book
-        items.append({
-            "id": book.id,
-            "title": book.title,
-            "author": book.author,
-            "authors_workplace": book.authors_workplace,
-            "thumbnail": book.thumbnail,
-            "description": book.description,
-            "content": book.content,
-            "pdf_file_url": book.pdf_file_url,
-            "publication_date": book.publication_date,
-            "language": book.language,
-            "type": book.type,
-            "views": book.views,
-            "average_rating": book.average_rating,
-            "rating_count": book.rating_count,
-            "saved_at": saved.created_at,
-            "categories": [{"id": c.id, "name": c.name} for c in book.categories],
-        })
+    for book_id, saved_at in saved_rows:
+        book = books.get(book_id)
+        if book is None:
+            continue
+        items.append({**book, "saved_at": saved_at})
 
     return {
         "items": items,
@@ -376,24 +522,24 @@ async def get_saved_books(
     }
 
 @router.get("/saved-books/check/{book_id}")
-async def check_if_saved_book(
+def check_if_saved_book(
     book_id: int,
     user_id: Optional[str] = Header(None, alias="X-User-ID"),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     if not user_id:
         return {"is_saved": False}
 
-    saved = db.query(SavedBook).filter(
+    is_saved = db.query(exists().where(
         SavedBook.user_id == user_id,
         SavedBook.book_id == book_id
-    ).first()
+    )).scalar()
 
-    return {"is_saved": saved is not None}
+    return {"is_saved": is_saved}
 
 # Выделения текста книг
 @router.post("/book-highlights", status_code=201)
-async def create_book_highlight(
+def create_book_highlight(
     highlight: BookHighlightCreate,
     user_id: Optional[str] = Header(None, alias="X-User-ID"),
     db: Session = Depends(get_db)
@@ -401,8 +547,7 @@ async def create_book_highlight(
     if not user_id:
         raise HTTPException(status_code=401, detail="User not authenticated")
 
-    book = db.query(Book).filter(Book.id == highlight.book_id).first()
-    if not book:
+    if not item_exists(db, Book, highlight.book_id):
         raise HTTPException(status_code=404, detail="Book not found")
 
     db_highlight = BookHighlight(
@@ -431,18 +576,21 @@ async def create_book_highlight(
     }
 
 @router.get("/book-highlights/{book_id}")
-async def get_book_highlights(
+def get_book_highlights(
     book_id: int,
+    start: Optional[int] = Query(None, ge=0),
+    end: Optional[int] = Query(None, ge=0),
     user_id: Optional[str] = Header(None, alias="X-User-ID"),
     db: Session = Depends(get_db)
 ):
     if not user_id:
         return []
 
-    highlights = db.query(BookHighlight).filter(
+    highlights = _visible_highlights(db.query(BookHighlight).filter(
         BookHighlight.user_id == user_id,
-        BookHighlight.book_id == book_id
-    ).all()
+        BookHighlight.book_id == book_id,
+        BookHighlight.deleted_at.is_(None)
+    ), BookHighlight, start, end).all()
 
     return [
         {
@@ -460,7 +608,7 @@ async def get_book_highlights(
     ]
 
 @router.put("/book-highlights/{highlight_id}")
-async def update_book_highlight(
+def update_book_highlight(
     highlight_id: int,
     highlight: BookHighlightCreate,
     user_id: Optional[str] = Header(None, alias="X-User-ID"),
@@ -471,7 +619,8 @@ async def update_book_highlight(
 
     db_highlight = db.query(BookHighlight).filter(
         BookHighlight.id == highlight_id,
-        BookHighlight.user_id == user_id
+        BookHighlight.user_id == user_id,
+        BookHighlight.deleted_at.is_(None)
     ).first()
 
     if not db_highlight:
@@ -497,7 +646,7 @@ async def update_book_highlight(
     }
 
 @router.delete("/book-highlights/{highlight_id}")
-async def delete_book_highlight(
+def delete_book_highlight(
     highlight_id: int,
     user_id: Optional[str] = Header(None, alias="X-User-ID"),
     db: Session = Depends(get_db)
@@ -507,20 +656,24 @@ async def delete_book_highlight(
 
     db_highlight = db.query(BookHighlight).filter(
         BookHighlight.id == highlight_id,
-        BookHighlight.user_id == user_id
+        BookHighlight.user_id == user_id,
+        BookHighlight.deleted_at.is_(None)
     ).first()
 
     if not db_highlight:
         raise HTTPException(status_code=404, detail="Highlight not found")
 
-    db.delete(db_highlight)
+    # Мягкое удаление: строка уходит в ленту синхронизации как надгробие
+    now = datetime.utcnow()
+    db_highlight.deleted_at = now
+    db_highlight.updated_at = now
     db.commit()
 
     return {"message": "Highlight deleted"}
 
 # Закладки диссертаций
 @router.post("/saved-dissertations", status_code=201)
-async def save_dissertation(
+def save_dissertation(
     saved: SavedDissertationCreate,
     user_id: Optional[str] = Header(None, alias="X-User-ID"),
     db: Session = Depends(get_db)
@@ -528,8 +681,7 @@ async def save_dissertation(
     if not user_id:
         raise HTTPException(status_code=401, detail="User not authenticated")
 
-    diss = db.query(Dissertation).filter(Dissertation.id == saved.dissertation_id).first()
-    if not diss:
+    if not item_exists(db, Dissertation, saved.dissertation_id):
         raise HTTPException(status_code=404, detail="Dissertation not found")
 
     existing = db.query(SavedDissertation).filter(
@@ -548,7 +700,7 @@ async def save_dissertation(
     return {"id": db_saved.id, "dissertation_id": db_saved.dissertation_id, "created_at": db_saved.created_at}
 
 @router.delete("/saved-dissertations/{dissertation_id}")
-async def unsave_dissertation(
+def unsave_dissertation(
     dissertation_id: int,
     user_id: Optional[str] = Header(None, alias="X-User-ID"),
     db: Session = Depends(get_db)
@@ -570,38 +722,26 @@ async def unsave_dissertation(
     return {"message": "Dissertation removed from saved"}
 
 @router.get("/saved-dissertations")
-async def get_saved_dissertations(
+def get_saved_dissertations(
     user_id: Optional[str] = Header(None, alias="X-User-ID"),
     page: int = 1,
     per_page: int = 20,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     if not user_id:
         raise HTTPException(status_code=401, detail="User not authenticated")
 
     query = db.query(SavedDissertation).filter(SavedDissertation.user_id == user_id)
     total = query.count()
-    saved_items = query.offset((page - 1) * per_page).limit(per_page).all()
+    saved_rows = query.with_entities(SavedDissertation.dissertation_id, SavedDissertation.created_at).offset((page - 1) * per_page).limit(per_page).all()
+    dissertations = fetch_items_by_id(db, CONTENT_TYPES["dissertations"], [r.dissertation_id for r in saved_rows])
 
     items = []
-    for saved in saved_items:
-        diss = saved.dissertation
-        items.append({
-            "id": diss.id,
-            "title": diss.title,
-            "author": diss.author,
-            "authors_workplace": diss.authors_workplace,
-            "thumbnail": diss.thumbnail,
-            "content": diss.content,
-            "publication_date": diss.publication_date,
-            "language": diss.language,
-            "type": diss.type,
-            "views": diss.views,
-            "average_rating": diss.average_rating,
-            "rating_count": diss.rating_count,
-            "saved_at": saved.created_at,
-            "categories": [{"id": c.id, "name": c.name} for c in diss.categories],
-        })
+    for dissertation_id, saved_at in saved_rows:
+        diss = dissertations.get(dissertation_id)
+        if diss is None:
+            continue
+        items.append({**diss, "saved_at": saved_at})
 
     return {
         "items": items,
@@ -612,24 +752,24 @@ async def get_saved_dissertations(
     }
 
 @router.get("/saved-dissertations/check/{dissertation_id}")
-async def check_if_saved_dissertation(
+def check_if_saved_dissertation(
     dissertation_id: int,
     user_id: Optional[str] = Header(None, alias="X-User-ID"),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     if not user_id:
         return {"is_saved": False}
 
-    saved = db.query(SavedDissertation).filter(
+    is_saved = db.query(exists().where(
         SavedDissertation.user_id == user_id,
         SavedDissertation.dissertation_id == dissertation_id
-    ).first()
+    )).scalar()
 
-    return {"is_saved": saved is not None}
+    return {"is_saved": is_saved}
 
 # Выделения текста диссертаций
 @router.post("/dissertation-highlights", status_code=201)
-async def create_dissertation_highlight(
+def create_dissertation_highlight(
     highlight: DissertationHighlightCreate,
     user_id: Optional[str] = Header(None, alias="X-User-ID"),
     db: Session = Depends(get_db)
@@ -637,8 +777,7 @@ async def create_dissertation_highlight(
     if not user_id:
         raise HTTPException(status_code=401, detail="User not authenticated")
 
-    diss = db.query(Dissertation).filter(Dissertation.id == highlight.dissertation_id).first()
-    if not diss:
+    if not item_exists(db, Dissertation, highlight.dissertation_id):
         raise HTTPException(status_code=404, detail="Dissertation not found")
 
     db_highlight = DissertationHighlight(
@@ -667,18 +806,21 @@ async def create_dissertation_highlight(
     }
 
 @router.get("/dissertation-highlights/{dissertation_id}")
-async def get_dissertation_highlights(
+def get_dissertation_highlights(
     dissertation_id: int,
+    start: Optional[int] = Query(None, ge=0),
+    end: Optional[int] = Query(None, ge=0),
     user_id: Optional[str] = Header(None, alias="X-User-ID"),
     db: Session = Depends(get_db)
 ):
     if not user_id:
         return []
 
-    highlights = db.query(DissertationHighlight).filter(
+    highlights = _visible_highlights(db.query(DissertationHighlight).filter(
         DissertationHighlight.user_id == user_id,
-        DissertationHighlight.dissertation_id == dissertation_id
-    ).all()
+        DissertationHighlight.dissertation_id == dissertation_id,
+        DissertationHighlight.deleted_at.is_(None)
+    ), DissertationHighlight, start, end).all()
 
     return [
         {
@@ -696,7 +838,7 @@ async def get_dissertation_highlights(
     ]
 
 @router.put("/dissertation-highlights/{highlight_id}")
-async def update_dissertation_highlight(
+def update_dissertation_highlight(
     highlight_id: int,
     highlight: DissertationHighlightCreate,
     user_id: Optional[str] = Header(None, alias="X-User-ID"),
@@ -707,7 +849,8 @@ async def update_dissertation_highlight(
 
     db_highlight = db.query(DissertationHighlight).filter(
         DissertationHighlight.id == highlight_id,
-        DissertationHighlight.user_id == user_id
+        DissertationHighlight.user_id == user_id,
+        DissertationHighlight.deleted_at.is_(None)
     ).first()
 
     if not db_highlight:
@@ -733,7 +876,7 @@ async def update_dissertation_highlight(
     }
 
 @router.delete("/dissertation-highlights/{highlight_id}")
-async def delete_dissertation_highlight(
+def delete_dissertation_highlight(
     highlight_id: int,
     user_id: Optional[str] = Header(None, alias="X-User-ID"),
     db: Session = Depends(get_db)
@@ -743,13 +886,17 @@ async def delete_dissertation_highlight(
 
     db_highlight = db.query(DissertationHighlight).filter(
         DissertationHighlight.id == highlight_id,
-        DissertationHighlight.user_id == user_id
+        DissertationHighlight.user_id == user_id,
+        DissertationHighlight.deleted_at.is_(None)
     ).first()
 
     if not db_highlight:
         raise HTTPException(status_code=404, detail="Highlight not found")
 
-    db.delete(db_highlight)
+    # Мягкое удаление: строка уходит в ленту синхронизации как надгробие
+    now = datetime.utcnow()
+    db_highlight.deleted_at = now
+    db_highlight.updated_at = now
     db.commit()
 
     return {"message": "Highlight deleted"}
@@ -50,6 +50,9 @@ class ArticleResponse(ArticleBase):
     rating: float
     average_rating: float
     rating_count: int
+    excerpt: Optional[str] = None
+    word_count: Optional[int] = None
+    reading_minutes: Optional[int] = None
     categories: List[ArticleCategoryResponse]
     created_at: datetime
     updated_at: datetime
@@ -110,6 +113,9 @@ class BookResponse(BookBase):
     rating: float
     average_rating: float
     rating_count: int
+    excerpt: Optional[str] = None
+    word_count: Optional[int] = None
+    reading_minutes: Optional[int] = None
     categories: List[BookCategoryResponse]
     created_at: datetime
     updated_at: datetime
@@ -164,6 +170,9 @@ class DissertationResponse(DissertationBase):
     rating: float
     average_rating: float
     rating_count: int
+    excerpt: Optional[str] = None
+    word_count: Optional[int] = None
+    reading_minutes: Optional[int] = None
     categories: List[DissertationCategoryResponse]
     created_at: datetime
     updated_at: datetime
@@ -311,3 +320,14 @@ class BookReadingProgressResponse(BaseModel):
 
     class Config:
         from_attributes = True
+
+# Rating aggregates
+class RatingDelta(BaseModel):
+    # article / book / dissertation, как в user-activity (мн. число тоже принимаем)
+    content_type: str = Field(..., pattern="^(article|book|dissertation)s?$")
+    content_id: int = Field(..., ge=1)
+    count_delta: int = Field(0, ge=-1000, le=1000)  # +1 новая оценка, -1 удалённая
+    sum_delta: float  # изменение суммы оценок
+
+class RatingDeltaBatch(BaseModel):
+    deltas: List[RatingDelta] = Field(..., max_length=1000)
@@ -0,0 +1,136 @@
+"""Opt-in slow-query log for content-service.
+
+With SLOW_QUERY_MS set, every statement slower than the threshold is kept
+in an in-memory ring buffer (last SLOW_QUERY_LOG_SIZE entries) with its
+normalized SQL, bind-parameter shapes (types and lengths, never values),
+duration and request path. On PostgreSQL a sample of slow SELECTs is
+re-run as EXPLAIN (ANALYZE, BUFFERS) on a separate pooled connection in a
+background thread, so the plan the planner actually chose is visible at
+/admin/slow-queries.
+"""
+import logging
+import os
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Deque, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from metrics import query_stats
+
+logger = logging.getLogger(__name__)
+
+# 0 - журнал выключен
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "0"))
+SLOW_QUERY_LOG_SIZE = int(os.getenv("SLOW_QUERY_LOG_SIZE", "100"))
+# Доля медленных SELECT, для которых снимаем план (EXPLAIN ANALYZE повторно
+# выполняет запрос, поэтому не на каждый)
+SLOW_QUERY_EXPLAIN_SAMPLE = float(os.getenv("SLOW_QUERY_EXPLAIN_SAMPLE", "0.1"))
+SLOW_QUERY_EXPLAIN_TIMEOUT_MS = int(os.getenv("SLOW_QUERY_EXPLAIN_TIMEOUT_MS", "5000"))
+
+_entries: Deque[dict] = deque(maxlen=SLOW_QUERY_LOG_SIZE)
+_lock = threading.Lock()
+
+# Один фоновый поток; пока он занят, новые EXPLAIN пропускаем
+_explain_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="slow-query-explain")
+_explain_busy = threading.Event()
+
+
+def normalize_sql(statement: str) -> str:
+    return " ".join(statement.split())
+
+
+def _value_shape(value) -> str:
+    name = type(value).__name__
+    if isinstance(value, (str, bytes, list, tuple, set, frozenset)):
+        return f"{name}[{len(value)}]"
+    return name
+
+
+def param_shapes(parameters, executemany: bool):
+    """Types (and lengths for strings and sequences) of bind parameters."""
+    if executemany:
+        rows = list(parameters or [])
+        return {"rows": len(rows), "first": param_shapes(rows[0], False) if rows else None}
+    if isinstance(parameters, dict):
+        return {key: _value_shape(value) for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [_value_shape(value) for value in parameters]
+    return None
+
+
+def _explain(bind: Engine, statement: str, parameters, entry: dict) -> None:
+    try:
+        with bind.connect().execution_options(slow_query_log=False) as conn:
+            conn.exec_driver_sql(f"SET LOCAL statement_timeout = {SLOW_QUERY_EXPLAIN_TIMEOUT_MS}")
+            rows = conn.exec_driver_sql(f"EXPLAIN (ANALYZE, BUFFERS) {statement}", parameters).all()
+            conn.rollback()
+        entry["plan"] = "\n".join(row[0] for row in rows)
+    except Exception as exc:
+        entry["plan_error"] = str(exc).splitlines()[0]
+    finally:
+        _explain_busy.clear()
+
+
+def _should_explain(conn, statement: str, executemany: bool) -> bool:
+    if executemany or conn.dialect.name != "postgresql":
+        return False
+    # ANALYZE выполняет запрос по-настоящему - только чтение
+    if not statement.lstrip().lower().startswith("select"):
+        return False
+    return random.random() < SLOW_QUERY_EXPLAIN_SAMPLE
+
+
+# Как и в metrics.py, старт - на контексте выполнения: упавший запрос не
+# оставляет отметок на соединении из пула
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if SLOW_QUERY_MS > 0:
+        context._slow_query_start = time.perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, "_slow_query_start", None)
+    if SLOW_QUERY_MS <= 0 or started is None:
+        return
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    if elapsed_ms < SLOW_QUERY_MS:
+        return
+    if context is not None and not context.execution_options.get("slow_query_log", True):
+        return
+
+    stats = query_stats.get()
+    entry = {
+        "at": datetime.now(timezone.utc).isoformat(),
+        "duration_ms": round(elapsed_ms, 3),
+        "path": stats.path if stats is not None else None,
+        "sql": normalize_sql(statement),
+        "params": param_shapes(parameters, executemany),
+        "plan": None,
+    }
+    with _lock:
+        _entries.append(entry)
+    logger.warning("Slow query %.1f ms: %s", elapsed_ms, entry["sql"][:300])
+
+    if _should_explain(conn, statement, executemany) and not _explain_busy.is_set():
+        _explain_busy.set()
+        _explain_executor.submit(_explain, conn.engine, statement, parameters, entry)
+
+
+def recent_slow_queries(limit: Optional[int] = None) -> List[dict]:
+    """Newest first."""
+    with _lock:
+        entries = list(_entries)
+    entries.reverse()
+    return entries[:limit] if limit else entries
+
+
+def clear_slow_queries() -> None:
+    with _lock:
+        _entries.clear()
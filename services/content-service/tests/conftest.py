@@ -1,17 +1,25 @@
 import os
 # Must be set before any app module is imported, because database.py reads
-# DATABASE_URL at module level and main.py calls create_all at module level.
+# DATABASE_URL at module level.
 os.environ.setdefault("DATABASE_URL", "sqlite:///./test.db")
+# Фоновый прогрев кэша в тестах мешал бы проверкам содержимого кэша
+os.environ.setdefault("CACHE_WARMUP_ENABLED", "false")
+# Токен служебных эндпоинтов /admin, см. фикстуру admin_headers
+os.environ.setdefault("ADMIN_TOKEN", "test-admin-token")
 
+import fnmatch
 import pytest
 from datetime import datetime
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
-from database import Base, get_db
+import cache
+from database import Base, get_db, get_read_db, get_read_sessionmaker, get_sessionmaker
 from main import app
 from models import ArticleCategory, Article
 
+pytest_plugins = ["query_budget"]
+
 # Test database
 SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
 
@@ -28,6 +36,10 @@ def override_get_db():
 
 
 app.dependency_overrides[get_db] = override_get_db
+# Реплика в общих тестах - та же база; маршрутизацию проверяет test_read_replica.py
+app.dependency_overrides[get_read_db] = override_get_db
+app.dependency_overrides[get_read_sessionmaker] = lambda: TestingSessionLocal
+app.dependency_overrides[get_sessionmaker] = lambda: TestingSessionLocal
 
 
 @pytest.fixture(scope="function")
@@ -39,6 +51,26 @@ def db():
     Base.metadata.drop_all(bind=engine)
 
 
+@pytest.fixture
+def separate_read_db():
+    """get_read_db on its own session, not the one shared with get_db within a request."""
+    def override_get_read_db():
+        try:
+            db = TestingSessionLocal()
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_read_db] = override_get_read_db
+    yield
+    app.dependency_overrides[get_read_db] = override_get_db
+
+
+@pytest.fixture
+def admin_headers():
+    return {"X-Admin-Token": os.environ["ADMIN_TOKEN"]}
+
+
 @pytest.fixture
 def client(db):
     return TestClient(app, headers={"X-User-ID": "test-user-123"})
@@ -74,3 +106,134 @@ def test_article(db, test_category):
     db.commit()
     db.refresh(article)
     return article
+
+
+class FakeRedis:
+    """In-memory stand-in for the redis-py calls the service makes; records them in calls."""
+
+    def __init__(self):
+        self.data = {}
+        self.zsets = {}
+        # Множества и HyperLogLog (точный подсчёт вместо вероятностного)
+        self.sets = {}
+        self.calls = []
+
+    def get(self, key):
+        self.calls.append(("get", key))
+        return self.data.get(key)
+
+    def setex(self, key, ttl, value):
+        self.calls.append(("setex", key))
+        self.data[key] = value
+
+    def mget(self, keys):
+        self.calls.append(("mget", len(keys)))
+        return [self.data.get(key) for key in keys]
+
+    def set(self, key, value, nx=False, ex=None):
+        if nx and key in self.data:
+            return None
+        self.data[key] = str(value)
+        return True
+
+    def delete(self, *keys):
+        self.calls.append(("delete", len(keys)))
+        for key in keys:
+            self.data.pop(key, None)
+            self.zsets.pop(key, None)
+            self.sets.pop(key, None)
+
+    def eval(self, script, numkeys, *args):
+        # Единственный скрипт сервиса - снятие блокировки свёртки по токену
+        key, token = args
+        if self.data.get(key) == token:
+            self.delete(key)
+            return 1
+        return 0
+
+    def keys(self, pattern):
+        return [key for key in list(self.data) + list(self.zsets) + list(self.sets)
+                if fnmatch.fnmatchcase(key, pattern)]
+
+    def exists(self, *keys):
+        return sum(1 for key in keys if key in self.data or key in self.zsets or key in self.sets)
+
+    def expire(self, key, seconds):
+        return key in self.data or key in self.zsets or key in self.sets
+
+    def sadd(self, key, *members):
+        members = {str(member) for member in members}
+        added = members - self.sets.setdefault(key, set())
+        self.sets[key] |= members
+        return len(added)
+
+    def spop(self, key, count):
+        members = sorted(self.sets.get(key, set()))[:count]
+        self.sets.get(key, set()).difference_update(members)
+        return members
+
+    def pfadd(self, key, *elements):
+        return 1 if self.sadd(key, *elements) else 0
+
+    def pfcount(self, key):
+        return len(self.sets.get(key, set()))
+
+    def zadd(self, key, mapping):
+        zset = self.zsets.setdefault(key, {})
+        zset.update({str(member): float(score) for member, score in mapping.items()})
+
+    def zincrby(self, key, amount, member):
+        zset = self.zsets.setdefault(key, {})
+        zset[str(member)] = zset.get(str(member), 0.0) + amount
+        return zset[str(member)]
+
+    def zrem(self, key, *members):
+        zset = self.zsets.get(key, {})
+        for member in members:
+            zset.pop(str(member), None)
+
+    def zcard(self, key):
+        return len(self.zsets.get(key, {}))
+
+    def zrevrange(self, key, start, end, withscores=False):
+        self.calls.append(("zrevrange", key))
+        ranked = sorted(self.zsets.get(key, {}).items(), key=lambda item: (-item[1], item[0]))
+        ranked = ranked[start:end + 1]
+        return ranked if withscores else [member for member, _ in ranked]
+
+    def zunionstore(self, dest, keys):
+        result = {}
+        for key, weight in keys.items():
+            for member, score in self.zsets.get(key, {}).items():
+                result[member] = result.get(member, 0.0) + score * weight
+        if result:
+            self.zsets[dest] = result
+        return len(result)
+
+    def pipeline(self, transaction=True):
+        fake = self
+
+        class _Pipeline:
+            def __init__(self):
+                self.ops = []
+
+            def __getattr__(self, name):
+                return lambda *args, **kwargs: self.ops.append((name, args, kwargs))
+
+            def execute(self):
+                fake.calls.append(("pipeline", len(self.ops)))
+                # Команды конвейера - один вызов, по отдельности не записываем
+                calls, fake.calls = fake.calls, []
+                try:
+                    return [getattr(fake, name)(*args, **kwargs) for name, args, kwargs in self.ops]
+                finally:
+                    fake.calls = calls
+
+        return _Pipeline()
+
+
+@pytest.fixture
+def fake_redis(monkeypatch):
+    fake = FakeRedis()
+    monkeypatch.setattr(cache, "_redis_client", fake)
+    return fake
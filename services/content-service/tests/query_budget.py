@@ -0,0 +1,46 @@
+"""pytest plugin: per-request SQL budget.
+
+    @pytest.mark.query_budget(3)
+    def test_list(client): ...
+
+Fails the test if any HTTP request made through the app during the test
+executes more than the declared number of SQL statements. Counts come from
+the MetricsMiddleware hooks, so fixtures that talk to the database directly
+are not counted.
+"""
+import pytest
+
+from metrics import add_request_listener, remove_request_listener
+
+
+def pytest_configure(config):
+    config.addinivalue_line(
+        "markers", "query_budget(max_queries): max SQL statements per HTTP request in this test"
+    )
+
+
+@pytest.fixture(autouse=True)
+def _query_budget(request):
+    marker = request.node.get_closest_marker("query_budget")
+    if marker is None:
+        yield
+        return
+
+    budget = marker.args[0]
+    over_budget = []
+
+    def check(method, path, route, stats):
+        if stats.count > budget:
+            repeated = stats.statements.most_common(1)[0]
+            over_budget.append(
+                f"{method} {path}: {stats.count} queries (budget {budget}); "
+                f"most repeated x{repeated[1]}: {' '.join(repeated[0].split())[:200]}"
+            )
+
+    add_request_listener(check)
+    try:
+        yield
+    finally:
+        remove_request_listener(check)
+    if over_budget:
+        pytest.fail("Query budget exceeded:\n" + "\n".join(over_budget), pytrace=False)
@@ -0,0 +1,99 @@
+import asyncio
+import time
+
+import anyio.to_thread
+import httpx
+import pytest
+from fastapi import status
+
+import admission
+from admission import AdmissionLimiter, route_class, size_threadpool
+from main import app
+
+
+def test_route_class():
+    assert route_class("GET", "/api/v1/articles") == "list"
+    assert route_class("GET", "/api/v1/export/books") == "list"
+    assert route_class("GET", "/api/v1/articles/5") == "read"
+    assert route_class("GET", "/api/v1/highlights/5") == "read"
+    assert route_class("POST", "/api/v1/articles") == "write"
+    assert route_class("DELETE", "/api/v1/highlights/5") == "write"
+    assert route_class("GET", "/api/v1/books/5/download") == "pdf"
+    assert route_class("GET", "/health") is None
+    assert route_class("GET", "/admin/slow-queries") is None
+
+
+@pytest.mark.asyncio
+async def test_limiter_queues_in_order_and_sheds():
+    limiter = AdmissionLimiter("test", concurrency=1, queue_size=1, timeout=1.0)
+    assert await limiter.acquire() is None
+
+    waiting = asyncio.ensure_future(limiter.acquire())
+    await asyncio.sleep(0)
+    assert limiter.queued == 1
+    # Очередь полна - отказ сразу, без ожидания
+    assert await limiter.acquire() == "queue_full"
+
+    limiter.release()
+    assert await waiting is None
+    assert (limiter.active, limiter.queued) == (1, 0)
+
+    limiter.release()
+    assert limiter.active == 0
+
+
+@pytest.mark.asyncio
+async def test_limiter_deadline():
+    limiter = AdmissionLimiter("test", concurrency=1, queue_size=5, timeout=0.01)
+    assert await limiter.acquire() is None
+    assert await limiter.acquire() == "timeout"
+    assert limiter.queued == 0
+
+    limiter.release()
+    assert limiter.active == 0
+
+
+def test_saturated_class_gets_fast_503(client, test_article, monkeypatch):
+    saturated = AdmissionLimiter("read", concurrency=0, queue_size=0, timeout=0)
+    monkeypatch.setitem(admission.LIMITERS, "read", saturated)
+
+    response = client.get(f"/api/v1/articles/{test_article.id}")
+    assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+    assert response.headers["retry-after"] == admission.ADMISSION_RETRY_AFTER
+
+    # Другие классы и служебные маршруты не задеты
+    assert client.get("/api/v1/articles").status_code == status.HTTP_200_OK
+    assert client.get("/health").status_code == status.HTTP_200_OK
+
+    text = client.get("/metrics").text
+    assert 'content_admission_shed_total{reason="queue_full",route_class="read"}' in text
+
+
+@pytest.mark.asyncio
+async def test_slow_list_does_not_block_other_classes(test_article, monkeypatch):
+    def slow_list_page(*args, **kwargs):
+        # Синхронный запрос к базе, который тормозит
+        time.sleep(0.5)
+        return {"items": [], "total": 0, "page": 1, "per_page": 20, "pages": 0}
+
+    monkeypatch.setattr("routers.articles.list_page", slow_list_page)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://testserver") as http:
+        slow = asyncio.ensure_future(http.get("/api/v1/articles?search=slow"))
+        await asyncio.sleep(0.1)
+        started = time.perf_counter()
+        response = await http.get(f"/api/v1/articles/{test_article.id}")
+        # Карточка не ждёт, пока список держит поток
+        assert response.status_code == status.HTTP_200_OK
+        assert time.perf_counter() - started < 0.3
+        assert not slow.done()
+        assert (await slow).status_code == status.HTTP_200_OK
+
+
+@pytest.mark.asyncio
+async def test_threadpool_fits_all_class_limits(monkeypatch):
+    threads = anyio.to_thread.current_default_thread_limiter()
+    monkeypatch.setattr(threads, "total_tokens", 4)
+    limiters = {name: AdmissionLimiter(name, n, 0, 0) for name, n in (("read", 10), ("list", 5))}
+    assert size_threadpool(limiters) == 15
+    assert threads.total_tokens == 15
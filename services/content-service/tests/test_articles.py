@@ -1,6 +1,9 @@
 import pytest
 from fastapi import status
 
+from models import Article
+from queries import LIST_CONTENT_PREVIEW
+
 
 def test_create_article(client, test_category):
     response = client.post(
@@ -25,6 +28,7 @@ def test_create_article(client, test_category):
     assert data["rating"] == 0.0
 
 
+@pytest.mark.query_budget(2)
 def test_get_articles(client, test_article):
     response = client.get("/api/v1/articles")
     assert response.status_code == status.HTTP_200_OK
@@ -119,3 +123,87 @@ def test_create_article_invalid_data(client):
         }
     )
     assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+
+def test_list_returns_content_preview(client, db, test_article):
+    test_article.content = "x" * (LIST_CONTENT_PREVIEW + 100)
+    db.commit()
+
+    item = client.get("/api/v1/articles").json()["items"][0]
+    assert len(item["content"]) == LIST_CONTENT_PREVIEW
+
+    detail = client.get(f"/api/v1/articles/{test_article.id}").json()
+    assert len(detail["content"]) == LIST_CONTENT_PREVIEW + 100
+
+
+def test_get_article_content_chunk(client, db, test_article):
+    test_article.content = "0123456789" * 10
+    db.commit()
+
+    response = client.get(f"/api/v1/articles/{test_article.id}/content?offset=95&length=10")
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["X-Total-Length"] == "100"
+    data = response.json()
+    assert data["content"] == "56789"
+    assert data["length"] == 5
+    assert data["has_more"] is False
+
+    response = client.get(f"/api/v1/articles/{test_article.id}/content?length=10")
+    data = response.json()
+    assert data["content"] == "0123456789"
+    assert data["has_more"] is True
+
+
+def test_content_chunk_total_from_stored_length(client):
+    from metrics import add_request_listener, remove_request_listener
+
+    created = client.post("/api/v1/articles", json={"title": "T", "author": "A", "content": "абв" * 40})
+    statements = []
+    listener = lambda method, path, route, stats: statements.extend(stats.statements)
+    add_request_listener(listener)
+    try:
+        response = client.get(f"/api/v1/articles/{created.json()['id']}/content?length=10")
+    finally:
+        remove_request_listener(listener)
+    assert response.json()["total_length"] == 120
+    # Длина - из content_length; length(content) только для строк без неё (COALESCE ленив)
+    assert any("coalesce(articles.content_length, length(articles.content))" in s for s in statements)
+
+
+def test_get_content_chunk_not_found(client):
+    response = client.get("/api/v1/dissertations/99999/content")
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+def test_multi_get_preserves_order(client, db, test_article):
+    other = Article(title="Other", author="A", content="x" * (LIST_CONTENT_PREVIEW + 50))
+    db.add(other)
+    db.commit()
+
+    response = client.get(f"/api/v1/articles?ids={other.id},99999,{test_article.id},{other.id}")
+    assert response.status_code == status.HTTP_200_OK
+    data = response.json()
+    assert [item["id"] for item in data["items"]] == [other.id, test_article.id]
+    assert data["missing"] == [99999]
+    assert len(data["items"][0]["content"]) == LIST_CONTENT_PREVIEW
+    assert data["items"][1]["categories"][0]["name"] == "Test Category"
+
+    assert client.get("/api/v1/articles?ids=1,abc").status_code == status.HTTP_400_BAD_REQUEST
+
+
+def test_multi_get_reads_and_backfills_item_cache(client, test_article, fake_redis):
+    fake = fake_redis
+
+    ids = f"{test_article.id},99999"
+    first = client.get(f"/api/v1/articles?ids={ids}").json()
+    # Один MGET, промах догружен и записан одним конвейером
+    assert fake.calls == [("mget", 2), ("pipeline", 1)]
+    # Карточка под своим ключом; полный документ GET /articles/{id} не подменяется
+    assert f"articles:card:{test_article.id}" in fake.data
+    assert f"articles:item:{test_article.id}" not in fake.data
+
+    fake.calls.clear()
+    second = client.get(f"/api/v1/articles?ids={ids}").json()
+    assert fake.calls == [("mget", 2)]
+    assert [item["id"] for item in second["items"]] == [item["id"] for item in first["items"]]
+    assert second["missing"] == [99999]
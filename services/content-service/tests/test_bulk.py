@@ -0,0 +1,117 @@
+import asyncio
+import json
+from fastapi import status
+from routers import bulk
+
+
+def _ndjson(*objects):
+    return "\n".join(o if isinstance(o, str) else json.dumps(o) for o in objects).encode()
+
+
+def test_import_articles(client, test_category):
+    body = _ndjson(
+        {"title": "Bulk 1", "author": "A", "content": "one", "category_ids": [test_category.id]},
+        {"title": "Bulk 2", "author": "B", "content": "two", "category_ids": [test_category.id, 99999]},
+        {"title": "Bulk 3", "author": "C", "content": "three"},
+    )
+    response = client.post(
+        "/api/v1/import/articles",
+        content=body,
+        headers={"Content-Type": "application/x-ndjson"},
+    )
+    assert response.status_code == status.HTTP_200_OK
+    data = response.json()
+    assert data["inserted"] == 3
+    assert data["failed"] == 0
+
+    response = client.get(f"/api/v1/articles?category_id={test_category.id}")
+    titles = {item["title"] for item in response.json()["items"]}
+    assert titles == {"Bulk 1", "Bulk 2"}
+
+
+def test_import_reports_bad_lines(client):
+    body = _ndjson(
+        {"title": "Good", "author": "A", "content": "ok"},
+        "{not json",
+        {"title": "Missing author", "content": "x"},
+        "",
+        {"title": "Also good", "author": "B", "content": "ok"},
+    )
+    response = client.post(
+        "/api/v1/import/dissertations?batch_size=2",
+        content=body,
+        headers={"Content-Type": "application/x-ndjson"},
+    )
+    assert response.status_code == status.HTTP_200_OK
+    data = response.json()
+    assert data["inserted"] == 2
+    assert data["failed"] == 2
+    assert [e["line"] for e in data["errors"]] == [2, 3]
+
+
+def test_import_flushes_batches_off_event_loop(client, monkeypatch):
+    flush_batch = bulk._flush_batch
+    threads = []
+
+    def flush(*args):
+        try:
+            asyncio.get_running_loop()
+            threads.append("event loop")
+        except RuntimeError:
+            threads.append("worker")
+        return flush_batch(*args)
+
+    monkeypatch.setattr(bulk, "_flush_batch", flush)
+    body = _ndjson(*({"title": f"Bulk {n}", "author": "A", "content": "x"} for n in range(3)))
+    response = client.post("/api/v1/import/articles?batch_size=2", content=body)
+    assert response.json()["inserted"] == 3
+    # Вставки батчей идут в пуле потоков, а не в цикле событий
+    assert threads == ["worker", "worker"]
+
+
+def test_import_unknown_type(client):
+    response = client.post("/api/v1/import/videos", content=b"{}")
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+def test_import_requires_user(client):
+    response = client.post(
+        "/api/v1/import/articles",
+        content=_ndjson({"title": "x", "author": "y", "content": "z"}),
+        headers={"X-User-ID": ""},
+    )
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+
+def test_export_ndjson(client, test_article, test_category):
+    response = client.get("/api/v1/export/articles")
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    records = [json.loads(line) for line in response.text.splitlines()]
+    assert len(records) == 1
+    assert records[0]["id"] == test_article.id
+    assert records[0]["content"] == test_article.content
+    assert records[0]["category_ids"] == [test_category.id]
+
+
+def test_export_csv_without_content(client, test_article):
+    response = client.get("/api/v1/export/articles?format=csv&include_content=false")
+    assert response.status_code == status.HTTP_200_OK
+    lines = response.text.splitlines()
+    header = lines[0].split(",")
+    assert "content" not in header
+    assert header[-1] == "category_ids"
+    assert len(lines) == 2
+
+
+def test_export_updated_since(client, test_article):
+    response = client.get("/api/v1/export/articles?updated_since=2999-01-01T00:00:00")
+    assert response.status_code == status.HTTP_200_OK
+    assert response.text == ""
+
+
+def test_export_roundtrips_into_import(client, test_article):
+    exported = client.get("/api/v1/export/articles").content
+    response = client.post("/api/v1/import/articles", content=exported)
+    assert response.json()["inserted"] == 1
+    assert client.get("/api/v1/articles").json()["total"] == 2
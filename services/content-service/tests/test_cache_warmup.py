@@ -0,0 +1,52 @@
+import cache_warmup
+from cache_warmup import CacheWarmer, warmer
+from content_types import CONTENT_TYPES
+from models import Article
+
+
+def test_warm_fills_keys_read_by_list_and_multi_get_endpoints(client, db, test_article, fake_redis):
+    db.add(Article(title="Popular", author="A", content="Body", language="ru", views=100))
+    db.commit()
+
+    result = warmer.warm("articles", pause=0)
+    assert result["items"] == 2
+
+    policy = CONTENT_TYPES["articles"].cache
+    assert policy.list_page_key(1, 20, None) in fake_redis.data
+    assert policy.list_page_key(1, 20, "views_desc", language="ru") in fake_redis.data
+    # Популярные - карточками без тела, полные документы не прогреваются
+    assert policy.card_key(test_article.id) in fake_redis.data
+    assert policy.item_key(test_article.id) not in fake_redis.data
+
+    # Прогретые страницы отдаются без обращения к базе и без перезаписи
+    fake_redis.calls.clear()
+    assert client.get("/api/v1/articles?language=ru&sort=views_desc").json()["items"][0]["title"] == "Popular"
+    assert [call[0] for call in fake_redis.calls] == ["get"]
+
+
+def test_schedule_debounces_requests():
+    delayed = CacheWarmer(delay=3600, min_interval=0)
+    delayed.schedule("articles")
+    delayed.schedule("articles")
+    delayed.schedule("unknown")
+    assert delayed.pending() == ["articles"]
+
+
+def test_list_invalidation_schedules_warmup(client, test_article, fake_redis, monkeypatch):
+    scheduled = []
+    monkeypatch.setattr(cache_warmup, "CACHE_WARMUP_ENABLED", True)
+    monkeypatch.setattr(warmer, "schedule", lambda name, delay=None: scheduled.append(name))
+
+    client.put(f"/api/v1/articles/{test_article.id}", json={"title": "Renamed"})
+    assert scheduled == ["articles"]
+
+
+def test_manual_warmup_requires_admin_token(client, admin_headers, monkeypatch):
+    scheduled = []
+    monkeypatch.setattr(warmer, "schedule", lambda name, delay=None: scheduled.append(name))
+    assert client.post("/admin/cache-warmup").status_code == 401
+    assert scheduled == []
+
+    response = client.post("/admin/cache-warmup?content_type=books", headers=admin_headers)
+    assert response.status_code == 202
+    assert scheduled == ["books"]
@@ -0,0 +1,94 @@
+import json
+
+import zstandard
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse, Response
+from fastapi.testclient import TestClient
+
+from compression import CompressionMiddleware, PrecompressedCache, choose_encoding
+from models import Article
+
+
+def test_choose_encoding_prefers_zstd_then_br():
+    assert choose_encoding("gzip, deflate, br, zstd") == "zstd"
+    assert choose_encoding("gzip;q=1.0, br;q=0.8") == "br"
+    assert choose_encoding("gzip, zstd;q=0") == "gzip"
+    assert choose_encoding("identity") is None
+    assert choose_encoding("") is None
+
+
+def test_large_list_compressed_small_detail_not(client, db, test_article):
+    small = client.get(f"/api/v1/articles/{test_article.id}", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in small.headers
+
+    db.add_all([Article(title=f"Article {n}", author="A", content="Body " * 50) for n in range(20)])
+    db.commit()
+    response = client.get("/api/v1/articles", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert "Accept-Encoding" in response.headers["vary"]
+    # httpx распаковывает gzip сам
+    assert response.json()["total"] == 21
+
+
+def test_content_fragment_brotli(client, db):
+    article = Article(title="Long", author="A", content="<p>Türkmen dili we edebiýaty.</p>" * 500)
+    db.add(article)
+    db.commit()
+    response = client.get(f"/api/v1/articles/{article.id}/content", headers={"Accept-Encoding": "br"})
+    assert response.headers["content-encoding"] == "br"
+    assert int(response.headers["content-length"]) < len(article.content) / 5
+
+
+def test_export_streams_zstd(client, db, test_article):
+    db.add_all([Article(title=f"Article {n}", author="A", content="Body " * 100) for n in range(5)])
+    db.commit()
+    response = client.get("/api/v1/export/articles?batch_size=2", headers={"Accept-Encoding": "zstd"})
+    assert response.headers["content-encoding"] == "zstd"
+    assert "content-length" not in response.headers
+    lines = zstandard.ZstdDecompressor().decompressobj().decompress(response.content).splitlines()
+    assert [json.loads(line)["title"] for line in lines][0] == "Test Article"
+    assert len(lines) == 6
+
+
+def _app(cache: PrecompressedCache) -> TestClient:
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, minimum_size=100, cache=cache)
+
+    @app.get("/api/v1/articles/1")
+    async def text():
+        return PlainTextResponse("Kitap " * 1000)
+
+    @app.get("/api/v1/articles/1/pdf")
+    async def pdf():
+        return Response(b"%PDF-" + b"\x00" * 5000, media_type="application/pdf")
+
+    return TestClient(app)
+
+
+def test_repeated_body_served_from_precompressed_cache():
+    cache = PrecompressedCache(max_bytes=1024 * 1024)
+    client = _app(cache)
+    for _ in range(3):
+        response = client.get("/api/v1/articles/1", headers={"Accept-Encoding": "gzip"})
+        assert response.headers["content-encoding"] == "gzip"
+        assert response.text == "Kitap " * 1000
+    assert cache.hits == 2
+    # Другая кодировка - свой вариант
+    response = client.get("/api/v1/articles/1", headers={"Accept-Encoding": "br"})
+    assert response.headers["content-encoding"] == "br"
+    assert response.text == "Kitap " * 1000
+    assert cache.hits == 2 and len(cache._items) == 2
+
+
+def test_binary_passes_through():
+    client = _app(PrecompressedCache())
+    pdf = client.get("/api/v1/articles/1/pdf", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in pdf.headers
+    assert pdf.content.startswith(b"%PDF-")
+
+
+def test_precompressed_cache_is_bounded():
+    cache = PrecompressedCache(max_bytes=10)
+    for n in range(5):
+        cache.put(cache.key("gzip", 6, bytes([n])), b"xxxx")
+    assert cache.size <= 10 and len(cache._items) == 2
@@ -0,0 +1,44 @@
+from concurrent.futures import ProcessPoolExecutor
+
+from content_meta import backfill, content_fields
+from content_types import CONTENT_TYPES
+from models import Article, Book
+
+
+def test_content_fields_from_html():
+    body = "<p>Hello&nbsp;<b>world</b></p><script>var x = 1;</script>" + "<p>word </p>" * 450
+    fields = content_fields(body)
+    assert fields["excerpt"].startswith("Hello world word word")
+    assert fields["excerpt"].endswith("…") and len(fields["excerpt"]) <= 301
+    assert fields["word_count"] == 452
+    assert fields["reading_minutes"] == 3
+    assert len(fields["content_hash"]) == 64
+    assert content_fields(None) == {**content_fields(""), "excerpt": None, "word_count": 0, "reading_minutes": 0}
+
+
+def test_fields_computed_on_write_and_served_by_lists(client, db):
+    created = client.post("/api/v1/articles", json={"title": "T", "author": "A", "content": "<h1>One two</h1> three"})
+    article_id = created.json()["id"]
+    assert (created.json()["excerpt"], created.json()["word_count"], created.json()["reading_minutes"]) == ("One two three", 3, 1)
+
+    client.put(f"/api/v1/articles/{article_id}", json={"content": "Just two"})
+    item = client.get("/api/v1/articles").json()["items"][0]
+    # В карточке списка content - сохранённый excerpt, тело не читается
+    assert (item["content"], item["excerpt"], item["word_count"]) == ("Just two", "Just two", 2)
+    assert client.get(f"/api/v1/articles/{article_id}").json()["content"] == "Just two"
+
+
+def test_backfill_fills_old_rows_in_process_pool(db):
+    db.add_all([Article(title=f"Old {n}", author="A", content=f"<p>{'w ' * n}</p>") for n in range(1, 6)])
+    db.add(Book(title="Old book", author="B", content=None))
+    db.commit()
+
+    with ProcessPoolExecutor(max_workers=2) as pool:
+        assert backfill(db, CONTENT_TYPES["articles"], pool, batch=2) == 5
+    assert backfill(db, CONTENT_TYPES["books"], batch=2) == 1
+    # Повторный запуск обрабатывает только новые строки
+    assert backfill(db, CONTENT_TYPES["articles"], batch=2) == 0
+
+    db.expire_all()
+    assert [a.word_count for a in db.query(Article).order_by(Article.id)] == [1, 2, 3, 4, 5]
+    assert db.query(Book).one().content_hash is not None
@@ -0,0 +1,61 @@
+import json
+
+from fastapi import status
+
+import unique_views
+from models import Dissertation
+from unique_views import rollup
+
+
+def _dissertation(db, **fields):
+    fields.setdefault("views", 0)
+    dissertation = Dissertation(title="Test Dissertation", author="Test Author", content="Body", **fields)
+    db.add(dissertation)
+    db.commit()
+    db.refresh(dissertation)
+    return dissertation
+
+
+def test_get_dissertation_counts_views_and_caches(client, db, fake_redis):
+    dissertation = _dissertation(db)
+    key = f"dissertations:item:{dissertation.id}"
+
+    assert client.get(f"/api/v1/dissertations/{dissertation.id}").json()["views"] == 0
+    assert key in fake_redis.data
+
+    # Из кэша: база не читается, но просмотр всё равно засчитан (другим читателем)
+    response = client.get(f"/api/v1/dissertations/{dissertation.id}", headers={"X-User-ID": "other"})
+    assert response.status_code == status.HTTP_200_OK
+    assert rollup(db) == {"dissertations": 1}
+    db.refresh(dissertation)
+    assert dissertation.views == 2
+
+    assert client.get("/api/v1/dissertations/99999").status_code == status.HTTP_404_NOT_FOUND
+
+
+def test_get_returns_and_caches_incremented_views(client, db, separate_read_db, fake_redis, monkeypatch):
+    monkeypatch.setattr(unique_views, "UNIQUE_VIEWS_ENABLED", False)
+    dissertation = _dissertation(db, views=5)
+
+    # Просмотр пишется сразу на основную базу, а документ читается отдельной сессией
+    assert client.get(f"/api/v1/dissertations/{dissertation.id}").json()["views"] == 6
+    assert json.loads(fake_redis.data[f"dissertations:item:{dissertation.id}"])["views"] == 6
+
+
+def test_dissertation_writes_invalidate_cache(client, db, fake_redis):
+    dissertation = _dissertation(db)
+    client.get("/api/v1/dissertations")
+    client.get(f"/api/v1/dissertations/{dissertation.id}")
+    client.get(f"/api/v1/dissertations/{dissertation.id}/content?length=2")
+    assert {key.split(":")[1] for key in fake_redis.data} == {"list", "item", "content"}
+
+    response = client.put(f"/api/v1/dissertations/{dissertation.id}", json={"title": "Renamed"})
+    assert response.status_code == status.HTTP_200_OK
+    # Кэш пуст, осталась только метка сборки главной с основной базы
+    assert fake_redis.data == {"db:primary:home": "1"}
+    assert client.get(f"/api/v1/dissertations/{dissertation.id}").json()["title"] == "Renamed"
+
+    client.get("/api/v1/dissertations")
+    response = client.post("/api/v1/dissertations", json={"title": "New", "author": "A", "content": "Body"})
+    assert response.status_code == status.HTTP_201_CREATED
+    assert not any(key.startswith("dissertations:list:") for key in fake_redis.data)
@@ -0,0 +1,49 @@
+import msgpack
+import zstandard
+
+from encoding import negotiate
+from models import Article
+
+MSGPACK = {"Accept": "application/msgpack"}
+
+
+def test_negotiate_headers():
+    assert negotiate("application/msgpack") is True
+    assert negotiate("application/json, application/x-msgpack;q=0.5") is True
+    assert negotiate("application/msgpack;q=0") is False
+    assert negotiate("*/*") is False
+
+
+def test_msgpack_list_and_detail_match_json(client, test_article):
+    as_json = client.get("/api/v1/articles").json()
+    response = client.get("/api/v1/articles", headers=MSGPACK)
+    assert response.headers["content-type"] == "application/msgpack"
+    assert "Accept" in response.headers["vary"]
+    assert msgpack.unpackb(response.content) == as_json
+
+    detail = msgpack.unpackb(client.get(f"/api/v1/articles/{test_article.id}", headers=MSGPACK).content)
+    assert (detail["title"], detail["content"]) == ("Test Article", "Test content")
+
+    saved = client.get("/api/v1/saved-articles", headers=MSGPACK)
+    assert msgpack.unpackb(saved.content)["items"] == []
+    # Ошибки и остальные роутеры - как раньше, JSON
+    assert client.get("/api/v1/articles/99999", headers=MSGPACK).json()["detail"] == "Article not found"
+
+
+def test_zstd_only_for_large_bodies(client, db, test_article):
+    small = client.get(f"/api/v1/articles/{test_article.id}", headers={"Accept-Encoding": "zstd"})
+    assert "content-encoding" not in small.headers
+
+    db.add_all([Article(title=f"Article {n}", author="A", content="Body " * 50) for n in range(20)])
+    db.commit()
+    response = client.get("/api/v1/articles", headers={**MSGPACK, "Accept-Encoding": "zstd"})
+    assert response.headers["content-encoding"] == "zstd"
+    body = msgpack.unpackb(zstandard.ZstdDecompressor().decompress(response.content))
+    assert body["total"] == 21
+
+
+def test_cached_datetimes_are_iso(client, test_article, fake_redis):
+    fresh = client.get(f"/api/v1/articles/{test_article.id}").json()
+    cached = client.get(f"/api/v1/articles/{test_article.id}").json()
+    assert cached["created_at"] == fresh["created_at"]
+    assert cached["publication_date"] == "2024-01-01T00:00:00"
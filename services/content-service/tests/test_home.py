@@ -0,0 +1,55 @@
+import pytest
+from fastapi import status
+
+from models import Article, Book, BookCategory, Dissertation
+
+
+@pytest.fixture
+def home_content(db, test_category):
+    db.add_all([
+        Article(title="Old", author="A", content="Body", language="tm"),
+        Article(title="New", author="A", content="Body", language="ru"),
+        Book(title="Quiet", author="B", content="Body", language="tm", views=1),
+        Book(title="Loud", author="B", content="Body", language="tm", views=90),
+        Dissertation(title="Thesis", author="C", content="Body", language="en"),
+        BookCategory(name="Fiction"),
+    ])
+    db.commit()
+
+
+@pytest.mark.query_budget(6)
+def test_home_aggregates_sections(client, home_content):
+    data = client.get("/api/v1/home").json()
+    assert [item["title"] for item in data["latest_articles"]] == ["New", "Old"]
+    assert [item["title"] for item in data["popular_books"]] == ["Loud", "Quiet"]
+    assert [item["title"] for item in data["recent_dissertations"]] == ["Thesis"]
+    assert data["article_categories"] == [{"id": 1, "name": "Test Category"}]
+    assert data["book_categories"][0]["name"] == "Fiction"
+    assert data["dissertation_categories"] == []
+
+    data = client.get("/api/v1/home?language=tm").json()
+    assert [item["title"] for item in data["latest_articles"]] == ["Old"]
+    assert data["recent_dissertations"] == []
+    assert client.get("/api/v1/home?language=de").status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+
+@pytest.mark.query_budget(0)
+def test_home_served_from_one_cache_read(client, home_content, fake_redis):
+    fake_redis.data["home:ru"] = '{"latest_articles":[]}'
+    fake_redis.calls.clear()
+    response = client.get("/api/v1/home?language=ru")
+    assert response.json() == {"latest_articles": []}
+    assert response.headers["content-type"] == "application/json"
+    assert fake_redis.calls == [("get", "home:ru")]
+
+
+def test_home_cache_dropped_on_writes(client, home_content, fake_redis):
+    client.get("/api/v1/home")
+    assert "home:all" in fake_redis.data
+
+    client.post("/api/v1/articles", json={"title": "Fresh", "author": "A", "content": "Body"})
+    assert "home:all" not in fake_redis.data
+    assert client.get("/api/v1/home").json()["latest_articles"][0]["title"] == "Fresh"
+
+    client.post("/api/v1/dissertation-categories", json={"name": "Physics"})
+    assert "home:all" not in fake_redis.data
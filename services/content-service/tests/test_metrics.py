@@ -0,0 +1,73 @@
+import pytest
+from fastapi import status
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+from metrics import QueryStats, cache_family, query_stats
+
+
+def _sample(text, name, **labels):
+    wanted = ",".join(f'{k}="{v}"' for k, v in labels.items())
+    for line in text.splitlines():
+        if line.startswith(f"{name}{{") and all(part in line for part in wanted.split(",")):
+            return float(line.rsplit(" ", 1)[1])
+    return None
+
+
+def test_metrics_endpoint_reports_route_templates(client, test_article):
+    client.get(f"/api/v1/articles/{test_article.id}")
+    client.get("/api/v1/articles/999999")
+
+    response = client.get("/metrics")
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["content-type"].startswith("text/plain")
+    text = response.text
+
+    route = "/api/v1/articles/{article_id}"
+    assert _sample(text, "content_http_requests_total", route=route, status="200") >= 1
+    assert _sample(text, "content_http_requests_total", route=route, status="404") >= 1
+    assert f"/api/v1/articles/{test_article.id}\"" not in text
+    assert _sample(text, "content_db_queries_per_request_count", route=route) >= 2
+    assert _sample(text, "content_db_queries_per_request_sum", route=route) > 0
+    assert "content_db_pool_checked_out" in text
+
+
+def test_cache_family():
+    assert cache_family("articles:list:1:20:None") == "articles:list"
+    assert cache_family("books:item:5") == "books:item"
+    assert cache_family("articles:*") == "articles"
+
+
+def test_server_timing_header(client, test_article):
+    response = client.get("/api/v1/articles")
+    timing = response.headers["server-timing"]
+    assert timing.startswith("db;dur=")
+    assert 'desc="2 queries"' in timing
+    assert "cache;dur=" in timing
+
+
+def test_repeated_statement_warning(client, db, monkeypatch, caplog):
+    monkeypatch.setattr("metrics.N_PLUS_ONE_THRESHOLD", 2)
+    for i in range(3):
+        client.post("/api/v1/articles", json={"title": f"A{i}", "author": "x", "content": "y"})
+    client.get("/api/v1/articles")
+    assert "Possible N+1" not in caplog.text
+
+    # Экспорт с batch_size=1 запрашивает категории на каждую строку
+    client.get("/api/v1/export/articles?batch_size=1")
+    assert "Possible N+1" in caplog.text
+
+
+def test_failed_statement_leaves_no_timing_state(db):
+    stats = QueryStats("/test")
+    token = query_stats.set(stats)
+    try:
+        with db.get_bind().connect() as conn:
+            for _ in range(3):
+                with pytest.raises(OperationalError):
+                    conn.execute(text("SELECT * FROM no_such_table"))
+            conn.execute(text("SELECT 1"))
+            # Упавшие запросы не оставляют отметок на соединении из пула
+            assert not any("started" in str(key) for key in conn.info)
+    finally:
+        query_stats.reset(token)
+    assert stats.count == 1 and stats.seconds < 1
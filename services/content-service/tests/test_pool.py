@@ -0,0 +1,46 @@
+from fastapi import status
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+from database import InstrumentedQueuePool, _engine_pool_stats, _pool_options
+
+
+def _engine(tmp_path, prefix="DB_"):
+    url = f"sqlite:///{tmp_path / 'pool.db'}"
+    return create_engine(url, **_pool_options(url, prefix))
+
+
+def test_session_checks_out_connection_on_first_use(tmp_path):
+    engine = _engine(tmp_path)
+    assert isinstance(engine.pool, InstrumentedQueuePool)
+    session = sessionmaker(bind=engine)()
+
+    assert _engine_pool_stats(engine)["checked_out"] == 0
+    session.execute(text("SELECT 1"))
+    stats = _engine_pool_stats(engine)
+    assert stats["checked_out"] == 1
+    assert stats["checkouts"] == 1
+
+    session.close()
+    stats = _engine_pool_stats(engine)
+    assert stats["checked_out"] == 0
+    assert stats["idle"] == 1
+
+
+def test_pool_size_from_env(tmp_path, monkeypatch):
+    monkeypatch.setenv("READ_DB_POOL_SIZE", "3")
+    monkeypatch.setenv("READ_DB_MAX_OVERFLOW", "0")
+    stats = _engine_pool_stats(_engine(tmp_path, "READ_DB_"))
+    assert stats["size"] == 3
+    assert stats["max_overflow"] == 0
+
+
+def test_pgbouncer_mode_disables_local_pool(tmp_path, monkeypatch):
+    monkeypatch.setenv("DB_PGBOUNCER", "true")
+    assert isinstance(_engine(tmp_path).pool, NullPool)
+
+
+def test_health_reports_pool(client):
+    response = client.get("/health")
+    assert response.status_code == status.HTTP_200_OK
+    assert "checked_out" in response.json()["db_pool"]["primary"]
@@ -0,0 +1,52 @@
+from fastapi import status
+
+from models import Article
+from unique_views import rollup
+
+
+def _articles(db, *specs):
+    articles = [Article(title=title, author="A", content="Body", language=language, views=views)
+                for title, language, views in specs]
+    db.add_all(articles)
+    db.commit()
+    return articles
+
+
+def test_popular_rebuilds_from_db_and_follows_views(client, db, fake_redis):
+    low, high, ru = _articles(db, ("Low", "tm", 5), ("High", "tm", 50), ("Ru", "ru", 20))
+
+    data = client.get("/api/v1/articles/popular").json()
+    assert [item["title"] for item in data["items"]] == ["High", "Ru", "Low"]
+    assert data["total"] == 3
+    assert [item["title"] for item in client.get("/api/v1/articles/popular?language=tm").json()["items"]] == ["High", "Low"]
+
+    # Свёрнутые уникальные просмотры двигают счёт в Redis, база для чтения рейтинга не нужна
+    for reader in range(50):
+        client.get(f"/api/v1/articles/{low.id}", headers={"X-User-ID": f"reader-{reader}"})
+    rollup(db)
+    fake_redis.calls.clear()
+    data = client.get("/api/v1/articles/popular?per_page=1").json()
+    assert [item["title"] for item in data["items"]] == ["Low"]
+    assert ("zrevrange", "popular:articles") in fake_redis.calls
+
+
+def test_trending_counts_recent_views_only(client, db, fake_redis):
+    old, fresh = _articles(db, ("Old", "en", 1000), ("Fresh", "en", 0))
+    client.get(f"/api/v1/articles/{fresh.id}", headers={"X-User-ID": "first"})
+    client.get(f"/api/v1/articles/{fresh.id}", headers={"X-User-ID": "second"})
+    rollup(db)
+
+    data = client.get("/api/v1/articles/trending?window=24h").json()
+    assert [item["title"] for item in data["items"]] == ["Fresh"]
+    assert data["items"][0]["trending_score"] == 2.0
+    assert client.get("/api/v1/articles/trending?window=7d&language=en").json()["total"] == 1
+    assert client.get("/api/v1/articles/trending?window=1y").status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+
+def test_popular_without_redis_falls_back_to_db(client, db):
+    _articles(db, ("Low", "tm", 5), ("High", "tm", 50))
+    data = client.get("/api/v1/books/popular").json()
+    assert data["items"] == []
+    data = client.get("/api/v1/articles/popular").json()
+    assert [item["title"] for item in data["items"]] == ["High", "Low"]
+    assert client.get("/api/v1/podcasts/popular").status_code == status.HTTP_404_NOT_FOUND
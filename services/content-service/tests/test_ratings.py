@@ -0,0 +1,65 @@
+from datetime import datetime
+from fastapi import status
+from models import Article, Book
+
+
+def _post(client, *deltas):
+    return client.post("/api/v1/rating-deltas", json={"deltas": list(deltas)})
+
+
+def test_deltas_update_aggregates(client, db, test_article):
+    response = _post(
+        client,
+        {"content_type": "article", "content_id": test_article.id, "count_delta": 1, "sum_delta": 5},
+        {"content_type": "article", "content_id": test_article.id, "count_delta": 1, "sum_delta": 3},
+        {"content_type": "articles", "content_id": 99999, "count_delta": 1, "sum_delta": 4},
+    )
+    assert response.status_code == status.HTTP_200_OK
+    data = response.json()
+    assert data["updated"] == {"articles": [test_article.id]}
+    assert data["missing"] == [{"content_type": "articles", "id": 99999}]
+
+    db.expire_all()
+    article = db.get(Article, test_article.id)
+    assert article.rating_count == 2
+    assert article.average_rating == 4.0
+    assert article.rating == 4.0
+
+    # Смена оценки 5 -> 1 и удаление оценки 3
+    _post(client, {"content_type": "article", "content_id": test_article.id, "count_delta": 0, "sum_delta": -4})
+    _post(client, {"content_type": "article", "content_id": test_article.id, "count_delta": -1, "sum_delta": -3})
+    db.expire_all()
+    article = db.get(Article, test_article.id)
+    assert article.rating_count == 1
+    assert article.average_rating == 1.0
+
+    _post(client, {"content_type": "article", "content_id": test_article.id, "count_delta": -1, "sum_delta": -1})
+    db.expire_all()
+    article = db.get(Article, test_article.id)
+    assert article.rating_count == 0
+    assert article.average_rating == 0.0
+
+
+def test_sort_by_rating(client, db):
+    for title, avg in (("Low", 2.0), ("High", 4.5), ("Mid", 3.0)):
+        db.add(Book(title=title, author="A", publication_date=datetime(2024, 1, 1),
+                    average_rating=avg, rating=avg, rating_count=2))
+    db.commit()
+    items = client.get("/api/v1/books?sort=rating_desc").json()["items"]
+    assert [b["title"] for b in items] == ["High", "Mid", "Low"]
+
+
+def test_deltas_validation(client):
+    response = _post(client, {"content_type": "video", "content_id": 1, "sum_delta": 1})
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+    response = client.post("/api/v1/rating-deltas", json={"deltas": []}, headers={"X-User-ID": ""})
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+
+def test_event_to_delta():
+    from rating_events import event_to_delta
+    assert event_to_delta("rating.article.created", {"contentId": 5, "rating": 4}) == ("article", 5, 1, 4.0)
+    assert event_to_delta("rating.book.updated", {"contentId": 5, "rating": 2, "previousRating": 5}) == ("book", 5, 0, -3.0)
+    assert event_to_delta("rating.dissertation.deleted", {"contentId": 7, "previousRating": 3}) == ("dissertation", 7, -1, -3.0)
+    assert event_to_delta("rating.article.updated", {"contentId": 5, "rating": 2}) is None
+    assert event_to_delta("content.article.created", {"contentId": 5, "rating": 2}) is None
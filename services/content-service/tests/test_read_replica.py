@@ -0,0 +1,130 @@
+import json
+
+import pytest
+from fastapi import status
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+import database
+from database import Base, get_db, get_read_db, get_read_sessionmaker, get_sessionmaker
+from cache_warmup import warmer
+from content_types import CONTENT_TYPES
+from main import app
+from models import Article
+
+
+@pytest.fixture
+def replica_setup(tmp_path, monkeypatch):
+    """Primary and replica as two separate SQLite files, no replication between them."""
+    sessions = {}
+    for role in ("primary", "replica"):
+        engine = create_engine(
+            f"sqlite:///{tmp_path / role}.db", connect_args={"check_same_thread": False}
+        )
+        Base.metadata.create_all(bind=engine)
+        sessions[role] = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    monkeypatch.setattr(database, "SessionLocal", sessions["primary"])
+    monkeypatch.setattr(database, "ReadSessionLocal", sessions["replica"])
+    monkeypatch.setattr(database, "_primary_until", {})
+    # Нужны настоящие зависимости, а не общие переопределения из conftest
+    overrides = {
+        dep: app.dependency_overrides.pop(dep)
+        for dep in (get_db, get_read_db, get_read_sessionmaker, get_sessionmaker)
+    }
+    yield sessions
+    app.dependency_overrides.update(overrides)
+
+
+def _add_article(session_factory, title):
+    db = session_factory()
+    article = Article(title=title, author="Author", content="Body")
+    db.add(article)
+    db.commit()
+    article_id = article.id
+    db.close()
+    return article_id
+
+
+def _titles(client, user):
+    response = client.get("/api/v1/articles", headers={"X-User-ID": user})
+    assert response.status_code == status.HTTP_200_OK
+    return [item["title"] for item in response.json()["items"]]
+
+
+def test_lists_are_served_from_replica(replica_setup, client):
+    _add_article(replica_setup["replica"], "On replica")
+    _add_article(replica_setup["primary"], "On primary")
+
+    assert _titles(client, "reader") == ["On replica"]
+    response = client.get("/api/v1/article-categories", headers={"X-User-ID": "reader"})
+    assert response.status_code == status.HTTP_200_OK
+
+
+def test_writer_reads_own_writes_from_primary(replica_setup, client):
+    response = client.post(
+        "/api/v1/articles",
+        json={"title": "Fresh", "author": "Writer", "content": "text"},
+        headers={"X-User-ID": "writer"},
+    )
+    assert response.status_code == status.HTTP_201_CREATED
+
+    assert _titles(client, "writer") == ["Fresh"]
+    assert _titles(client, "someone-else") == []
+
+
+def test_get_falls_back_to_primary_when_replica_lags(replica_setup, client):
+    article_id = _add_article(replica_setup["primary"], "Not replicated yet")
+
+    response = client.get(f"/api/v1/articles/{article_id}", headers={"X-User-ID": "reader"})
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["title"] == "Not replicated yet"
+    # Без Redis просмотр пишется сразу в основную базу
+    primary = replica_setup["primary"]()
+    assert primary.get(Article, article_id).views == 1
+    primary.close()
+
+    # Счётчик просмотров - служебная запись, читатель остаётся на реплике
+    assert _titles(client, "reader") == []
+
+
+def test_warmup_reads_primary(replica_setup, fake_redis):
+    _add_article(replica_setup["primary"], "Just written")
+
+    warmer.warm("articles", pause=0)
+    # Реплика ещё не догнала запись, но прогретая страница её уже содержит
+    page = json.loads(fake_redis.data[CONTENT_TYPES["articles"].cache.list_page_key(1, 20, None)])
+    assert [item["title"] for item in page["items"]] == ["Just written"]
+
+
+def test_content_chunk_falls_back_to_primary(replica_setup, client):
+    article_id = _add_article(replica_setup["primary"], "Not replicated yet")
+
+    response = client.get(f"/api/v1/articles/{article_id}/content", headers={"X-User-ID": "reader"})
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["content"] == "Body"
+
+
+def _home_titles(client):
+    response = client.get("/api/v1/home", headers={"X-User-ID": "reader"})
+    assert response.status_code == status.HTTP_200_OK
+    return [item["title"] for item in response.json()["latest_articles"]]
+
+
+def test_home_rebuilt_from_primary_after_write(replica_setup, client, fake_redis):
+    _add_article(replica_setup["replica"], "On replica")
+    assert _home_titles(client) == ["On replica"]
+
+    response = client.post(
+        "/api/v1/articles",
+        json={"title": "Fresh", "author": "Writer", "content": "text"},
+        headers={"X-User-ID": "writer"},
+    )
+    assert response.status_code == status.HTTP_201_CREATED
+    # Реплика запись ещё не получила, но в кэш уходит главная с основной базы
+    assert _home_titles(client) == ["Fresh"]
+    assert "Fresh" in fake_redis.data["home:all"]
+
+    # Метка истекла - главная снова собирается с реплики
+    database._primary_until.clear()
+    fake_redis.delete("db:primary:home", "home:all")
+    assert _home_titles(client) == ["On replica"]
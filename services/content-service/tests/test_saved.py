@@ -0,0 +1,184 @@
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import status
+
+from models import ArticleHighlight, Book
+from routers.saved import HIGHLIGHT_TOMBSTONE_DAYS, _decode_sync_cursor, _encode_sync_cursor
+
+
+@pytest.mark.query_budget(4)
+def test_save_and_list_articles(client, test_article, test_category):
+    response = client.post("/api/v1/saved-articles", json={"article_id": test_article.id})
+    assert response.status_code == status.HTTP_201_CREATED
+
+    response = client.get("/api/v1/saved-articles")
+    assert response.status_code == status.HTTP_200_OK
+    data = response.json()
+    assert data["total"] == 1
+    item = data["items"][0]
+    assert item["id"] == test_article.id
+    assert item["categories"] == [{"id": test_category.id, "name": test_category.name}]
+    assert "saved_at" in item
+
+
+def test_save_missing_article(client):
+    response = client.post("/api/v1/saved-articles", json={"article_id": 99999})
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+def test_check_if_saved(client, test_article):
+    response = client.get(f"/api/v1/saved-articles/check/{test_article.id}")
+    assert response.json() == {"is_saved": False}
+
+    client.post("/api/v1/saved-articles", json={"article_id": test_article.id})
+    response = client.get(f"/api/v1/saved-articles/check/{test_article.id}")
+    assert response.json() == {"is_saved": True}
+
+
+def test_highlight_for_missing_article(client):
+    response = client.post(
+        "/api/v1/highlights",
+        json={"article_id": 99999, "text": "x", "start_offset": 0, "end_offset": 1},
+    )
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+def test_create_and_get_highlights(client, test_article):
+    response = client.post(
+        "/api/v1/highlights",
+        json={"article_id": test_article.id, "text": "Test", "start_offset": 0, "end_offset": 4},
+    )
+    assert response.status_code == status.HTTP_201_CREATED
+
+    response = client.get(f"/api/v1/highlights/{test_article.id}")
+    assert response.status_code == status.HTTP_200_OK
+    assert [h["text"] for h in response.json()] == ["Test"]
+
+
+def test_highlights_in_viewport(client, test_article):
+    for text, start, end in (("late", 900, 950), ("early", 10, 40), ("edge", 90, 120), ("mid", 300, 320)):
+        client.post(
+            "/api/v1/highlights",
+            json={"article_id": test_article.id, "text": text, "start_offset": start, "end_offset": end},
+        )
+
+    response = client.get(f"/api/v1/highlights/{test_article.id}?start=100&end=400")
+    assert [h["text"] for h in response.json()] == ["edge", "mid"]
+
+    # Без окна - все, по порядку в тексте
+    response = client.get(f"/api/v1/highlights/{test_article.id}")
+    assert [h["text"] for h in response.json()] == ["early", "edge", "mid", "late"]
+
+    response = client.get(f"/api/v1/highlights/{test_article.id}?start=500&end=100")
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+def test_highlight_delta_sync(client, db, test_article):
+    book = Book(title="Test Book", author="Test Author")
+    db.add(book)
+    db.commit()
+
+    def create(path, payload):
+        return client.post(path, json={"text": "x", "start_offset": 0, "end_offset": 1, **payload}).json()["id"]
+
+    first = create("/api/v1/highlights", {"article_id": test_article.id})
+    second = create("/api/v1/highlights", {"article_id": test_article.id})
+    book_highlight = create("/api/v1/book-highlights", {"book_id": book.id})
+
+    # Первая синхронизация страницами по две записи
+    page = client.get("/api/v1/highlights/sync?limit=2").json()
+    assert [(c["type"], c["id"]) for c in page["changes"]] == [("article", first), ("article", second)]
+    assert page["has_more"] is True
+    page = client.get(f"/api/v1/highlights/sync?limit=2&since={page['next_cursor']}").json()
+    assert [(c["type"], c["id"]) for c in page["changes"]] == [("book", book_highlight)]
+    assert page["has_more"] is False
+    cursor = page["next_cursor"]
+
+    # Ничего не менялось - пустая дельта; позиция та же, время синхронизации новое
+    page = client.get(f"/api/v1/highlights/sync?since={cursor}").json()
+    assert page["changes"] == [] and page["has_more"] is False
+    assert _decode_sync_cursor(page["next_cursor"])[0] == _decode_sync_cursor(cursor)[0]
+    cursor = page["next_cursor"]
+
+    client.put(f"/api/v1/highlights/{second}",
+               json={"article_id": test_article.id, "text": "x", "start_offset": 0, "end_offset": 1, "note": "n"})
+    assert client.delete(f"/api/v1/highlights/{first}").status_code == status.HTTP_200_OK
+
+    changes = client.get(f"/api/v1/highlights/sync?since={cursor}").json()["changes"]
+    assert [(c["id"], c["deleted"]) for c in changes] == [(second, False), (first, True)]
+    assert changes[0]["note"] == "n"
+    assert "text" not in changes[1]
+
+    # Удалённое не видно в обычной выдаче и повторно не удаляется
+    assert [h["id"] for h in client.get(f"/api/v1/highlights/{test_article.id}").json()] == [second]
+    assert client.delete(f"/api/v1/highlights/{first}").status_code == status.HTTP_404_NOT_FOUND
+
+    assert client.get("/api/v1/highlights/sync?since=garbage").status_code == status.HTTP_400_BAD_REQUEST
+
+
+def test_highlight_sync_returns_late_commits(client, db, test_article):
+    def create():
+        payload = {"article_id": test_article.id, "text": "x", "start_offset": 0, "end_offset": 1}
+        return client.post("/api/v1/highlights", json=payload).json()["id"]
+
+    create()
+    stamped_early = datetime.utcnow()
+    create()
+    cursor = client.get("/api/v1/highlights/sync").json()["next_cursor"]
+
+    # Транзакция отметила время до second, а закоммитилась после синхронизации
+    late = ArticleHighlight(user_id="test-user-123", article_id=test_article.id, text="late",
+                            start_offset=0, end_offset=1, created_at=stamped_early, updated_at=stamped_early)
+    db.add(late)
+    db.commit()
+
+    page = client.get(f"/api/v1/highlights/sync?since={cursor}").json()
+    assert [c["id"] for c in page["changes"]] == [late.id]
+    # Уже полученные first и second из окна повторно не приходят
+    again = client.get(f"/api/v1/highlights/sync?since={page['next_cursor']}").json()
+    assert again["changes"] == []
+
+
+def test_idle_sync_with_old_highlights_does_not_expire(client, db, test_article):
+    payload = {"article_id": test_article.id, "text": "x", "start_offset": 0, "end_offset": 1}
+    client.post("/api/v1/highlights", json=payload)
+    old = datetime.utcnow() - timedelta(days=HIGHLIGHT_TOMBSTONE_DAYS + 30)
+    db.query(ArticleHighlight).update({"created_at": old, "updated_at": old})
+    db.commit()
+
+    page = client.get("/api/v1/highlights/sync").json()
+    assert len(page["changes"]) == 1
+    # Изменений нет, позиция остаётся старой, но синхронизация свежая - не 410
+    for _ in range(3):
+        response = client.get(f"/api/v1/highlights/sync?since={page['next_cursor']}")
+        assert response.status_code == status.HTTP_200_OK
+        page = response.json()
+        assert page["changes"] == []
+
+    # Пользователь без выделений тоже получает курсор, и он работает
+    empty = client.get("/api/v1/highlights/sync", headers={"X-User-ID": "new-reader"}).json()
+    assert empty["changes"] == [] and empty["next_cursor"]
+    client.post("/api/v1/highlights", json=payload, headers={"X-User-ID": "new-reader"})
+    page = client.get(f"/api/v1/highlights/sync?since={empty['next_cursor']}",
+                      headers={"X-User-ID": "new-reader"}).json()
+    assert len(page["changes"]) == 1
+
+
+def test_highlight_tombstones_purged_and_old_cursor_expires(client, db, test_article, admin_headers):
+    payload = {"article_id": test_article.id, "text": "x", "start_offset": 0, "end_offset": 1}
+    highlight_id = client.post("/api/v1/highlights", json=payload).json()["id"]
+    client.delete(f"/api/v1/highlights/{highlight_id}")
+    long_ago = datetime.utcnow() - timedelta(days=HIGHLIGHT_TOMBSTONE_DAYS + 1)
+    db.query(ArticleHighlight).update({"deleted_at": long_ago, "updated_at": long_ago})
+    db.commit()
+
+    # Удаление необратимо: без токена администратора не выполняется
+    assert client.delete("/admin/highlight-tombstones").status_code == status.HTTP_401_UNAUTHORIZED
+    assert db.query(ArticleHighlight).count() == 1
+    assert client.delete("/admin/highlight-tombstones", headers=admin_headers).json() == {"deleted": 1}
+    assert db.query(ArticleHighlight).count() == 0
+
+    old_cursor = _encode_sync_cursor((long_ago, 0, highlight_id), long_ago, [])
+    response = client.get(f"/api/v1/highlights/sync?since={old_cursor}")
+    assert response.status_code == status.HTTP_410_GONE
@@ -0,0 +1,56 @@
+import pytest
+from fastapi import status
+import slow_queries
+from slow_queries import param_shapes
+
+
+@pytest.fixture
+def slow_log(monkeypatch):
+    slow_queries.clear_slow_queries()
+    yield monkeypatch
+    slow_queries.clear_slow_queries()
+
+
+def test_disabled_by_default(client, slow_log, test_article, admin_headers):
+    client.get("/api/v1/articles?search=Test")
+    data = client.get("/admin/slow-queries", headers=admin_headers).json()
+    assert data["enabled"] is False
+    assert data["items"] == []
+
+
+def test_captures_normalized_sql_and_param_shapes(client, slow_log, test_article, admin_headers):
+    slow_log.setattr(slow_queries, "SLOW_QUERY_MS", 0.000001)
+    client.get("/api/v1/articles?search=Test&author=Auth")
+    slow_log.setattr(slow_queries, "SLOW_QUERY_MS", 0)
+
+    response = client.get("/admin/slow-queries", headers=admin_headers)
+    assert response.status_code == status.HTTP_200_OK
+    items = response.json()["items"]
+    assert items
+    entry = next(e for e in items if "FROM articles" in e["sql"])
+    assert entry["path"] == "/api/v1/articles"
+    assert "\n" not in entry["sql"]
+    assert entry["duration_ms"] >= 0
+    # Значения параметров в журнал не попадают
+    assert "%Test%" not in str(entry["params"])
+    assert "str[6]" in str(entry["params"])
+    # На SQLite план не снимается
+    assert entry["plan"] is None
+
+    assert client.delete("/admin/slow-queries", headers=admin_headers).status_code == status.HTTP_204_NO_CONTENT
+    assert client.get("/admin/slow-queries", headers=admin_headers).json()["items"] == []
+
+
+def test_requires_admin_token(client, slow_log, admin_headers):
+    assert client.get("/admin/slow-queries").status_code == status.HTTP_401_UNAUTHORIZED
+    bad = {"X-Admin-Token": "guess"}
+    assert client.delete("/admin/slow-queries", headers=bad).status_code == status.HTTP_401_UNAUTHORIZED
+    # Без ADMIN_TOKEN служебные эндпоинты выключены
+    slow_log.setattr("routers.admin.ADMIN_TOKEN", "")
+    assert client.get("/admin/slow-queries", headers=admin_headers).status_code == status.HTTP_403_FORBIDDEN
+
+
+def test_param_shapes():
+    assert param_shapes({"a": "abc", "b": 5, "c": None}, False) == {"a": "str[3]", "b": "int", "c": "NoneType"}
+    assert param_shapes(("x", [1, 2]), False) == ["str[1]", "list[2]"]
+    assert param_shapes([{"a": 1}, {"a": 2}], True) == {"rows": 2, "first": {"a": "int"}}
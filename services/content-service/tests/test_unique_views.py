@@ -0,0 +1,109 @@
+import unique_views
+from models import Article, DailyView
+from unique_views import _today, hll_key, rollup
+
+
+def _article(db):
+    article = Article(title="Viewed", author="A", content="Body", language="tm", views=10)
+    db.add(article)
+    db.commit()
+    return article
+
+
+def test_reloads_count_once_per_viewer(client, db, fake_redis, monkeypatch):
+    monkeypatch.setattr(unique_views, "VIEW_TRUSTED_PROXIES", 1)
+    article = _article(db)
+    for _ in range(5):
+        client.get(f"/api/v1/articles/{article.id}")
+    client.get(f"/api/v1/articles/{article.id}", headers={"X-User-ID": "someone-else"})
+    # Анонимы различаются по адресу, который дописал gateway
+    client.get(f"/api/v1/articles/{article.id}", headers={"X-User-ID": "", "X-Forwarded-For": "10.0.0.9, 10.0.0.1"})
+    client.get(f"/api/v1/articles/{article.id}", headers={"X-User-ID": "", "X-Forwarded-For": "10.0.0.1"})
+
+    # До свёртки в базу ничего не пишется
+    db.refresh(article)
+    assert article.views == 10
+    members = fake_redis.sets[hll_key("articles", article.id, _today())]
+    assert len(members) == 3
+    assert not any("10.0.0.1" in member for member in members)
+
+    assert rollup(db) == {"articles": 1}
+    db.refresh(article)
+    assert article.views == 13
+    daily = db.query(DailyView).one()
+    assert (daily.content_type, daily.item_id, daily.views) == ("articles", article.id, 3)
+
+
+def test_rollup_adds_only_growth(client, db, fake_redis):
+    article = _article(db)
+    client.get(f"/api/v1/articles/{article.id}")
+    rollup(db)
+    # Повторная свёртка без новых зрителей ничего не меняет
+    assert rollup(db) == {}
+
+    client.get(f"/api/v1/articles/{article.id}")
+    client.get(f"/api/v1/articles/{article.id}", headers={"X-User-ID": "new-reader"})
+    assert rollup(db) == {"articles": 1}
+    db.refresh(article)
+    assert article.views == 12
+    assert db.query(DailyView).one().views == 2
+
+
+def test_rollup_skips_while_locked(client, db, fake_redis):
+    article = _article(db)
+    client.get(f"/api/v1/articles/{article.id}")
+    fake_redis.set("views:rollup:lock", 1)
+    assert rollup(db) == {}
+    fake_redis.delete("views:rollup:lock")
+    assert rollup(db) == {"articles": 1}
+
+
+def test_spoofed_forwarded_for_is_one_viewer(client, db, fake_redis, monkeypatch):
+    article = _article(db)
+    # Без доверенных прокси X-Forwarded-For не читается - только адрес соединения
+    for n in range(5):
+        client.get(f"/api/v1/articles/{article.id}", headers={"X-User-ID": "", "X-Forwarded-For": f"10.0.0.{n}"})
+    assert len(fake_redis.sets[hll_key("articles", article.id, _today())]) == 1
+
+    # За gateway клиентская часть цепочки подделывается, последний хоп - нет
+    monkeypatch.setattr(unique_views, "VIEW_TRUSTED_PROXIES", 1)
+    for n in range(5):
+        client.get(f"/api/v1/articles/{article.id}",
+                   headers={"X-User-ID": "", "X-Forwarded-For": f"10.0.0.{n}, 192.0.2.7"})
+    assert len(fake_redis.sets[hll_key("articles", article.id, _today())]) == 2
+
+
+def test_increment_views_counts_unique_viewers(client, db, fake_redis):
+    article = _article(db)
+    for _ in range(3):
+        response = client.get(f"/api/v1/{article.id}/increment-views")
+        assert response.json() == {"views": 10}
+    assert len(fake_redis.sets[hll_key("articles", article.id, _today())]) == 1
+    assert client.get("/api/v1/99999/increment-views").status_code == 404
+
+
+def test_rollup_keeps_lock_taken_over_by_another_worker(client, db, fake_redis, monkeypatch):
+    article = _article(db)
+    client.get(f"/api/v1/articles/{article.id}")
+
+    def slow_rollup_day(db, client, day, members):
+        # Свёртка дольше _LOCK_TTL: блокировка истекла, её взял другой процесс
+        fake_redis.data["views:rollup:lock"] = "other-worker"
+        return {}
+
+    monkeypatch.setattr(unique_views, "_rollup_day", slow_rollup_day)
+    rollup(db)
+    assert fake_redis.data["views:rollup:lock"] == "other-worker"
+
+    del fake_redis.data["views:rollup:lock"]
+    rollup(db)
+    assert "views:rollup:lock" not in fake_redis.data
+
+
+def test_views_fall_back_to_direct_increment_without_redis(client, db):
+    article = _article(db)
+    client.get(f"/api/v1/articles/{article.id}")
+    client.get(f"/api/v1/articles/{article.id}")
+    db.refresh(article)
+    assert article.views == 12
+    assert client.get("/api/v1/articles/99999").status_code == 404
@@ -0,0 +1,256 @@
+"""Unique views per item and day with Redis HyperLogLog.
+
+Counting every GET as a view lets any client inflate views by reloading
+and costs a primary write per request. Instead a view is:
+
+- PFADD of the viewer (X-User-ID, or a salted hash of the client IP) into
+  views:hll:{type}:{id}:{yyyymmdd} - one HyperLogLog per item and UTC day,
+  ~12 KB at most and a 0.81% standard error;
+- SADD of "{type}:{id}" into views:dirty:{yyyymmdd}, the items to roll up.
+
+The rollup (a background thread every VIEW_ROLLUP_INTERVAL seconds, or
+`python unique_views.py` from cron) SPOPs dirty items, reads PFCOUNT for
+each and stores it in daily_views; the growth since the previous rollup is
+added to the views column with one executemany UPDATE and passed to the
+view listeners (popularity leaderboards). Database writes are bounded by the
+number of viewed items per interval, not by traffic, and daily_views keeps
+per-day popularity history.
+
+The client IP is the ASGI peer address, or with VIEW_TRUSTED_PROXIES = N the
+address N hops from the right of X-Forwarded-For + peer: entries to the left
+of it are written by the client and cannot be trusted.
+
+A Redis lock keeps rollups of several workers from adding the same growth
+twice; it is released only by the worker holding its token. Without Redis
+views fall back to the direct increment.
+"""
+import hashlib
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from fastapi import Request
+from sqlalchemy import bindparam, select, update
+from sqlalchemy.orm import Session
+
+import cache
+from content_types import ContentType, get_content_type
+from metrics import record_cache
+from models import DailyView
+from queries import apply_view_deltas, increment_view_count, notify_view_listeners
+
+logger = logging.getLogger(__name__)
+
+UNIQUE_VIEWS_ENABLED = os.getenv("UNIQUE_VIEWS_ENABLED", "true").strip().lower() in ("1", "true", "yes", "on")
+# 0 - фоновый поток не запускается, свёртку делает cron
+VIEW_ROLLUP_INTERVAL = float(os.getenv("VIEW_ROLLUP_INTERVAL", "60"))
+VIEW_ROLLUP_BATCH = int(os.getenv("VIEW_ROLLUP_BATCH", "1000"))
+VIEW_HASH_SALT = os.getenv("VIEW_HASH_SALT", "")
+# Сколько прокси перед сервисом дописывают X-Forwarded-For (gateway - 1);
+# 0 - заголовок не читается, адрес берётся из соединения
+VIEW_TRUSTED_PROXIES = int(os.getenv("VIEW_TRUSTED_PROXIES", "0"))
+# Сколько последних дней досворачивается (ключи живут на день дольше)
+VIEW_KEY_DAYS = 3
+_KEY_TTL = (VIEW_KEY_DAYS + 1) * 86400
+_LOCK_KEY = "views:rollup:lock"
+_LOCK_TTL = 300
+# Снять блокировку, только если она всё ещё наша: за _LOCK_TTL её мог взять другой процесс
+_UNLOCK_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+
+def hll_key(name: str, item_id: int, day: date) -> str:
+    return f"views:hll:{name}:{item_id}:{day:%Y%m%d}"
+
+
+def dirty_key(day: date) -> str:
+    return f"views:dirty:{day:%Y%m%d}"
+
+
+def _today() -> date:
+    return datetime.utcnow().date()
+
+
+def client_ip(request: Request) -> str:
+    """Peer address, or the hop VIEW_TRUSTED_PROXIES from the right of X-Forwarded-For + peer."""
+    peer = request.client.host if request.client else ""
+    if VIEW_TRUSTED_PROXIES <= 0:
+        return peer
+    # Левые записи X-Forwarded-For пишет сам клиент; доверяем только тому,
+    # что дописали наши прокси справа
+    chain = [part.strip() for part in request.headers.get("X-Forwarded-For", "").split(",") if part.strip()]
+    chain.append(peer)
+    return chain[max(len(chain) - 1 - VIEW_TRUSTED_PROXIES, 0)]
+
+
+def viewer_id(request: Request) -> str:
+    """'u:<user id>' for signed-in readers, otherwise 'ip:<salted hash>' - raw IPs never reach Redis."""
+    user_id = request.headers.get("X-User-ID")
+    if user_id:
+        return f"u:{user_id}"
+    return "ip:" + hashlib.sha256(f"{VIEW_HASH_SALT}:{client_ip(request)}".encode()).hexdigest()[:16]
+
+
+def count_view(db: Session, ctype: ContentType, item_id: int, request: Request) -> Optional[int]:
+    """Register a view of an existing item: HyperLogLog in Redis, direct increment without it.
+
+    Returns the new views value after a direct increment; None when the view went
+    to the HyperLogLog (the column grows at the next rollup).
+    """
+    client = cache._get_client() if UNIQUE_VIEWS_ENABLED else None
+    if client is not None:
+        day = _today()
+        key = hll_key(ctype.name, item_id, day)
+        started = time.perf_counter()
+        try:
+            pipe = client.pipeline(transaction=False)
+            pipe.pfadd(key, viewer_id(request))
+            pipe.expire(key, _KEY_TTL)
+            pipe.sadd(dirty_key(day), f"{ctype.name}:{item_id}")
+            pipe.expire(dirty_key(day), _KEY_TTL)
+            pipe.execute()
+            record_cache(key, "pfadd", "ok", time.perf_counter() - started)
+            return None
+        except Exception as exc:
+            logger.debug("Unique view error for %s: %s", key, exc)
+            record_cache(key, "pfadd", "error", time.perf_counter() - started)
+    return increment_view_count(db, ctype.model, item_id)
+
+
+def _rollup_day(db: Session, client, day: date, members: List[str]) -> Dict[str, int]:
+    """Store PFCOUNTs of *members* for *day*; returns updated items per type."""
+    items: List[Tuple[str, int]] = []
+    for member in members:
+        name, _, raw_id = (member.decode() if isinstance(member, bytes) else member).partition(":")
+        if get_content_type(name) is not None and raw_id.isdigit():
+            items.append((name, int(raw_id)))
+    if not items:
+        return {}
+
+    pipe = client.pipeline(transaction=False)
+    for name, item_id in items:
+        pipe.pfcount(hll_key(name, item_id, day))
+    counts: Dict[str, Dict[int, int]] = defaultdict(dict)
+    for (name, item_id), count in zip(items, pipe.execute()):
+        counts[name][item_id] = int(count)
+
+    table = DailyView.__table__
+    changed: List[Tuple[str, int, int, Optional[str], int]] = []
+    for name, by_id in counts.items():
+        stored = dict(db.execute(
+            select(table.c.item_id, table.c.views).where(
+                table.c.content_type == name,
+                table.c.day == day,
+                table.c.item_id.in_(list(by_id)),
+            )
+        ).all())
+        # PFCOUNT не убывает: в views уходит только прирост с прошлой свёртки
+        deltas = {item_id: count - stored.get(item_id, 0)
+                  for item_id, count in by_id.items() if count > stored.get(item_id, 0)}
+        rows = apply_view_deltas(db, get_content_type(name).model, deltas)
+
+        inserts = [{"content_type": name, "item_id": item_id, "day": day, "views": by_id[item_id]}
+                   for item_id, _, _ in rows if item_id not in stored]
+        updates = [{"row_item_id": item_id, "row_views": by_id[item_id]}
+                   for item_id, _, _ in rows if item_id in stored]
+        if inserts:
+            db.execute(table.insert(), inserts)
+        if updates:
+            db.execute(
+                update(table)
+                .where(table.c.content_type == name, table.c.day == day,
+                       table.c.item_id == bindparam("row_item_id"))
+                .values(views=bindparam("row_views")),
+                updates,
+            )
+        changed.extend((name, item_id, views, language, deltas[item_id]) for item_id, views, language in rows)
+    db.commit()
+
+    for name, item_id, views, language, delta in changed:
+        notify_view_listeners(name, item_id, views, language, delta)
+    updated: Dict[str, int] = defaultdict(int)
+    for name, *_ in changed:
+        updated[name] += 1
+    return dict(updated)
+
+
+def rollup(db: Session, batch: int = VIEW_ROLLUP_BATCH) -> Dict[str, int]:
+    """One pass over the dirty items of the last VIEW_KEY_DAYS days; returns updated items per type."""
+    client = cache._get_client()
+    if client is None:
+        return {}
+    token = f"{os.getpid()}:{uuid.uuid4().hex}"
+    if not client.set(_LOCK_KEY, token, nx=True, ex=_LOCK_TTL):
+        # Свёртку уже делает другой процесс
+        return {}
+    started = time.perf_counter()
+    totals: Dict[str, int] = defaultdict(int)
+    try:
+        today = _today()
+        for age in reversed(range(VIEW_KEY_DAYS)):
+            day = today - timedelta(days=age)
+            while True:
+                members = client.spop(dirty_key(day), batch)
+                if not members:
+                    break
+                try:
+                    for name, count in _rollup_day(db, client, day, members).items():
+                        totals[name] += count
+                except Exception:
+                    db.rollback()
+                    # Не потерять просмотры: вернуть записи в очередь следующей свёртки
+                    client.sadd(dirty_key(day), *members)
+                    raise
+                if len(members) < batch:
+                    break
+    finally:
+        client.eval(_UNLOCK_SCRIPT, 1, _LOCK_KEY, token)
+    if totals:
+        logger.info("View rollup: %s in %.2fs", dict(totals), time.perf_counter() - started)
+    return dict(totals)
+
+
+def _rollup_once() -> None:
+    from database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        rollup(db)
+    finally:
+        db.close()
+
+
+def _rollup_loop(interval: float) -> None:
+    while True:
+        time.sleep(interval)
+        try:
+            _rollup_once()
+        except Exception:
+            logger.exception("View rollup failed")
+
+
+_thread: Optional[threading.Thread] = None
+
+
+def start_view_rollup() -> None:
+    """Start the background rollup thread (once per process)."""
+    global _thread
+    if not UNIQUE_VIEWS_ENABLED or VIEW_ROLLUP_INTERVAL <= 0:
+        return
+    if _thread is None or not _thread.is_alive():
+        _thread = threading.Thread(target=_rollup_loop, args=(VIEW_ROLLUP_INTERVAL,), name="view-rollup", daemon=True)
+        _thread.start()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    _rollup_once()
@@ -1,6 +1,7 @@
 from fastapi import FastAPI, Query, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from starlette.middleware.trustedhost import TrustedHostMiddleware
+from starlette.middleware.gzip import GZipMiddleware
 from elasticsearch import Elasticsearch, NotFoundError
 from typing import List, Optional
 import os
@@ -23,6 +24,14 @@ allowed_hosts = [host.strip() for host in allowed_hosts_env.split(",") if host.s
 if allowed_hosts:
     app.add_middleware(TrustedHostMiddleware, allowed_hosts=allowed_hosts)
 
+# Сжатие ответов: выдача с фрагментами подсветки - текст и хорошо сжимается.
+# Мелкие ответы (подсказки, health) меньше порога и уходят как есть.
+app.add_middleware(
+    GZipMiddleware,
+    minimum_size=int(os.getenv("COMPRESSION_MIN_SIZE", "1024")),
+    compresslevel=int(os.getenv("COMPRESSION_GZIP_LEVEL", "5")),
+)
+
 # CORS
 cors_origins_env = os.getenv("CORS_ORIGINS", "*")
 cors_origins = [origin.strip() for origin in cors_origins_env.split(",") if origin.strip()]
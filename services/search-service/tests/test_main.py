@@ -94,3 +94,37 @@ def test_search_pagination(client):
     data = response.json()
     assert data["page"] == 2
     assert data["per_page"] == 5
+
+
+# ---------------------------------------------------------------------------
+# Compression
+# ---------------------------------------------------------------------------
+
+def _hits(count):
+    fragment = "…машинное <em>обучение</em> и анализ данных в библиотеке…"
+    return {
+        "hits": {
+            "total": {"value": count},
+            "hits": [
+                {
+                    "_index": "articles",
+                    "_score": 1.0,
+                    "_source": {"id": n, "title": f"Article {n}", "author": "A"},
+                    "highlight": {"content": [fragment] * 3},
+                }
+                for n in range(count)
+            ],
+        },
+    }
+
+
+def test_search_results_are_gzipped(client):
+    with patch("main.es.search", return_value=_hits(20)):
+        response = client.get("/api/v1/search?q=обучение", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert len(response.json()["results"]) == 20
+
+
+def test_small_responses_not_compressed(client):
+    response = client.get("/health", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in response.headers